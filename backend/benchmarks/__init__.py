@@ -0,0 +1,8 @@
+"""Performance benchmarks for the montuno engines.
+
+Run individual scripts as modules from the repository root, e.g.
+``python -m backend.benchmarks.bench_generation``; the scripts that replaced
+an implementation accept ``--baseline REV`` to time the former code from that
+git revision.  The full suite with JSON output and baseline comparison lives
+in :mod:`backend.benchmarks.suite` (``python -m backend.benchmarks.suite --help``).
+"""
@@ -0,0 +1,66 @@
+"""Microbenchmark for chord-symbol parsing.
+
+Compares the compiled parser and the interned :func:`analizar_acorde` records
+with ``salsa._parsear_cifrado_seguro`` as of the ``--baseline`` revision (the
+former per-call regex parser when given the commit before the change),
+reporting calls per second for a workload shaped like a render: a handful of
+distinct symbols looked up over and over.
+"""
+from __future__ import annotations
+
+import itertools
+import time
+from typing import Callable, List, Optional
+
+from .. import salsa
+from ..voicings import analizar_acorde
+from .common import arbol_de_revision, main_de, medir_en_revision
+
+SIMBOLOS = ["Am7", "D7", "G∆", "C7", "F#m7(b5)", "B7(b9)", "Em", "A7/3", "Dm7", "G7", "Bbº7", "C9"]
+
+
+def _compilado_sin_memo(cifrado: str):
+    try:
+        return analizar_acorde.__wrapped__(cifrado)
+    except ValueError:
+        return salsa._analizar_cifrado_seguro.__wrapped__(cifrado)
+
+
+def _simbolos(llamadas: int) -> List[str]:
+    return list(itertools.islice(itertools.cycle(SIMBOLOS), llamadas))
+
+
+def _llamadas_por_segundo(fn: Callable[[str], object], llamadas: int) -> float:
+    simbolos = _simbolos(llamadas)
+    inicio = time.perf_counter()
+    for simbolo in simbolos:
+        fn(simbolo)
+    return llamadas / (time.perf_counter() - inicio)
+
+
+def run(llamadas: int, baseline: Optional[str]) -> None:
+    casos = []
+    with arbol_de_revision(baseline) as arbol:
+        if arbol is not None:
+            segundos = medir_en_revision(
+                arbol,
+                "for s in simbolos: _parsear_cifrado_seguro(s)",
+                1,
+                "from backend.salsa import _parsear_cifrado_seguro",
+                simbolos=_simbolos(llamadas),
+            )
+            casos.append((f"baseline {baseline}", llamadas / segundos))
+    casos.append(("compiled, no memo", _llamadas_por_segundo(_compilado_sin_memo, llamadas)))
+    casos.append(
+        ("interned record", _llamadas_por_segundo(salsa._analizar_cifrado_seguro, llamadas))
+    )
+    base = casos[0][1]
+    for nombre, cps in casos:
+        print(f"{nombre:<24} {cps:>14,.0f} calls/s  x{cps / base:.1f}")
+
+
+main = main_de(run, __doc__, calls=200_000, baseline=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Per-position harmonisation vs. the per-chord lookup tables.
+
+``generar_notas_mixtas`` used to sort the chord's voicing, classify the base
+note against the chord intervals and work out the added voice for every
+template position.  It now builds, once per chord, the output pitches of the
+four voicing slots with :func:`~backend.midi_render._tabla_armonizacion` and
+each position is a table lookup.  Traditional renders of long synthetic
+progressions are timed for every harmonisation, next to the same call in the
+``--baseline`` revision when one is given.
+"""
+from __future__ import annotations
+
+import math
+from typing import Optional, Sequence
+
+from .. import midi_utils_tradicional
+from ..midi_common import (
+    construir_posiciones_secuenciales,
+    leer_midi_referencia,
+    obtener_posiciones_referencia,
+)
+from ..voicings_tradicional import generar_voicings_enlazados_tradicional
+from .common import (
+    REFERENCE_ROOT,
+    arbol_de_revision,
+    main_de,
+    medir,
+    medir_en_revision,
+    progresion_sintetica,
+)
+
+ARMONIZACIONES = ("", "Octavas", "Doble octava", "Décimas", "Treceavas")
+
+
+def run(compases: Sequence[int], repeticiones: int, baseline: Optional[str]) -> None:
+    notes, pm = leer_midi_referencia(REFERENCE_ROOT / "tradicional_2-3_A.mid")
+    total_ref, grid, _ = midi_utils_tradicional._grid_and_bpm(pm)
+    base = obtener_posiciones_referencia(notes)
+    print(
+        f"{'bars':>6} {'armonización':>13} {'notes':>7} {'baseline ms':>12} {'table ms':>9} "
+        f"{'speed-up':>9}"
+    )
+    with arbol_de_revision(baseline) as arbol:
+        for n in compases:
+            texto = progresion_sintetica(n)
+            for armonizacion in ARMONIZACIONES:
+                asignaciones, _ = midi_utils_tradicional.procesar_progresion_en_grupos(
+                    texto, armonizacion
+                )
+                voicings = generar_voicings_enlazados_tradicional([a[0] for a in asignaciones])
+                octavaciones = ["Octava arriba", "Original"] * len(asignaciones)
+                total = max(i for _, idxs, _ in asignaciones for i in idxs) + 1
+                posiciones = construir_posiciones_secuenciales(base, total, total_ref, grid)
+                antes = math.nan
+                if arbol is not None:
+                    antes = medir_en_revision(
+                        arbol,
+                        "generar_notas_mixtas(posiciones, voicings, asignaciones, grid, "
+                        "octavaciones=octavaciones)",
+                        repeticiones,
+                        "from backend.midi_utils_tradicional import generar_notas_mixtas",
+                        posiciones=posiciones.como_dicts(),
+                        voicings=voicings,
+                        asignaciones=asignaciones,
+                        grid=grid,
+                        octavaciones=octavaciones,
+                    )
+                despues = medir(
+                    lambda: midi_utils_tradicional.generar_notas_mixtas(
+                        posiciones, voicings, asignaciones, octavaciones=octavaciones
+                    ),
+                    repeticiones,
+                )
+                notas = len(
+                    midi_utils_tradicional.generar_notas_mixtas(
+                        posiciones, voicings, asignaciones, octavaciones=octavaciones
+                    )
+                )
+                print(
+                    f"{n:>6} {armonizacion or '-':>13} {notas:>7} {antes * 1e3:>12.2f} "
+                    f"{despues * 1e3:>9.2f} {antes / despues:>8.1f}x"
+                )
+
+
+main = main_de(run, __doc__, bars=[64, 500], repeat=5, baseline=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Measure how :func:`generate_many` scales with the number of workers.
+
+A songbook-like batch (every clave × variations A–D over a few synthetic
+progressions) is rendered once per worker count; the speed-up is relative to
+rendering the same batch in-process.
+"""
+from __future__ import annotations
+
+import os
+import time
+from typing import List, Sequence
+
+from ..montuno_core import CLAVES, MontunoJob, generate_many
+from .common import REFERENCE_ROOT, main_de, progresion_sintetica
+
+
+def songbook(progresiones: int, compases: int) -> List[MontunoJob]:
+    """Return ``progresiones`` × claves × variations jobs of ``compases`` bars."""
+
+    trabajos = []
+    for i in range(progresiones):
+        texto = progresion_sintetica(compases + i)
+        for clave in CLAVES.values():
+            for variacion in "ABCD":
+                trabajos.append(
+                    MontunoJob(
+                        texto,
+                        clave,
+                        REFERENCE_ROOT,
+                        {"variacion": variacion, "inversion": "root", "seed": i},
+                    )
+                )
+    return trabajos
+
+
+def run(workers: Sequence[int], progresiones: int, compases: int) -> None:
+    trabajos = songbook(progresiones, compases)
+    print(f"{len(trabajos)} jobs of ~{compases} bars")
+    print(f"{'workers':>7} {'seconds':>9} {'speed-up':>9}")
+    base = None
+    for n in workers:
+        inicio = time.perf_counter()
+        resultados = generate_many(trabajos, workers=n)
+        total = time.perf_counter() - inicio
+        assert all(r.ok for r in resultados)
+        base = base or total
+        print(f"{n:>7} {total:>9.2f} {base / total:>9.2f}")
+
+
+_CPUS = os.cpu_count() or 1
+main = main_de(
+    run,
+    __doc__,
+    workers=sorted({1, 2, 4, 8, 16, _CPUS} & set(range(1, _CPUS + 1))),
+    progressions=8,
+    bars=32,
+)
+
+
+if __name__ == "__main__":
+    main()
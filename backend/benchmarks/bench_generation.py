@@ -0,0 +1,56 @@
+"""Measure the render latency of :func:`generate_montuno`.
+
+For synthetic progressions of several lengths, the cost of the former
+temp-file round trip (writing ``segment_0.mid`` and parsing it back with
+``pretty_midi``) is compared with the in-memory tick quantisation that
+replaced it, next to the total render time.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Sequence
+
+import pretty_midi
+
+from .. import salsa
+from ..montuno_core import generate_montuno
+from ..montuno_core.generation import _build_segment_assignments, _write_tick_scale
+from ..note_buffer import NoteBuffer
+from .common import OPCIONES_SALSA, REFERENCE_ROOT, main_de, medir, progresion_sintetica
+
+
+def _ida_y_vuelta_temporal(pm: pretty_midi.PrettyMIDI) -> None:
+    with TemporaryDirectory() as tmpdir:
+        tmp_path = Path(tmpdir) / "segment_0.mid"
+        pm.write(str(tmp_path))
+        pretty_midi.PrettyMIDI(str(tmp_path))
+
+
+def run(compases: Sequence[int], repeticiones: int) -> None:
+    midi_ref = REFERENCE_ROOT / "salsa_2-3_root_A.mid"
+    print(f"{'bars':>6} {'tempfile ms':>12} {'memory ms':>10} {'render ms':>10}")
+    for n in compases:
+        texto = progresion_sintetica(n)
+        asignaciones, _, _ = salsa.procesar_progresion_salsa(texto)
+        pm = salsa.montuno_salsa(
+            "",
+            midi_ref,
+            None,
+            "root",
+            asignaciones_custom=_build_segment_assignments(asignaciones),
+            return_pm=True,
+        )
+        notas = pm.instruments[0].notes
+        antes = medir(lambda: _ida_y_vuelta_temporal(pm), repeticiones)
+        escala = _write_tick_scale(pm.resolution)
+        despues = medir(lambda: NoteBuffer.from_notes(notas).quantise(escala), repeticiones)
+        total = medir(lambda: generate_montuno(texto, seed=0, **OPCIONES_SALSA), repeticiones)
+        print(f"{n:>6} {antes * 1e3:>12.2f} {despues * 1e3:>10.2f} {total * 1e3:>10.1f}")
+
+
+main = main_de(run, __doc__, bars=[8, 64, 512], repeat=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Compare ways of turning a rendered montuno into MIDI bytes.
+
+* ``tempfile``: ``pm.write`` to a temporary file and read it back, as the
+  GUI preview and the web worker used to do;
+* ``bytesio``: ``pm.write`` into an in-memory buffer;
+* ``encoder``: :func:`backend.midi_encoder.encode_midi`.
+"""
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+from typing import Sequence
+
+from ..midi_encoder import encode_midi
+from ..montuno_core import generate_montuno
+from .common import OPCIONES_SALSA, main_de, medir, progresion_sintetica
+
+
+def _tempfile(pm) -> bytes:
+    with tempfile.NamedTemporaryFile(suffix=".mid", delete=False) as tmp:
+        pm.write(tmp.name)
+    try:
+        with open(tmp.name, "rb") as fh:
+            return fh.read()
+    finally:
+        os.unlink(tmp.name)
+
+
+def _bytesio(pm) -> bytes:
+    buffer = io.BytesIO()
+    pm.write(buffer)
+    return buffer.getvalue()
+
+
+def run(compases: Sequence[int], repeat: int) -> None:
+    print(f"{'bars':>6} {'notes':>7} {'tempfile ms':>12} {'bytesio ms':>11} {'encoder ms':>11} {'speed-up':>9}")
+    for n in compases:
+        pm = generate_montuno(progresion_sintetica(n), **OPCIONES_SALSA).midi
+        assert encode_midi(pm) == _bytesio(pm)
+        temporal, memoria, codificador = (
+            medir(lambda: fn(pm), repeat) * 1e3 for fn in (_tempfile, _bytesio, encode_midi)
+        )
+        print(
+            f"{n:>6} {len(pm.instruments[0].notes):>7} {temporal:>12.2f} {memoria:>11.2f} "
+            f"{codificador:>11.2f} {temporal / codificador:>8.1f}x"
+        )
+
+
+main = main_de(run, __doc__, bars=[8, 64, 512, 4096], repeat=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Cost of the columnar note store against ``pretty_midi.Note`` objects.
+
+For each length this reports the latency and peak traced allocation of
+``generate_montuno`` and of the engine alone (translation, trimming and tick
+quantisation into a :class:`~backend.note_buffer.NoteBuffer`), next to the
+memory the same notes take as a buffer and as the ``pretty_midi.Note``
+objects the engine used to carry between stages.
+"""
+from __future__ import annotations
+
+import tracemalloc
+from typing import Callable, Sequence
+
+import pretty_midi
+
+from .. import salsa
+from ..montuno_core import generate_montuno
+from ..montuno_core.generation import _prepare, _write_tick_scale
+from ..note_buffer import NoteBuffer
+from .common import OPCIONES_SALSA, main_de, medir, pico_kib, progresion_sintetica
+
+
+def _motor(texto: str) -> NoteBuffer:
+    plan = _prepare(
+        texto,
+        octavas_por_indice=None,
+        octavacion_default="Original",
+        inversiones_por_indice=None,
+        register_offsets=None,
+        aproximaciones_por_indice=None,
+        voice_leading="greedy",
+        **OPCIONES_SALSA,
+    )
+    plan_salsa = salsa._planificar_montuno_salsa(
+        "", plan.midi_ref, plan.inversion, inicio_cor=0, **plan.kwargs
+    )
+    notas = NoteBuffer.concat([lote for _, lote in salsa._lotes_salsa(plan_salsa)])
+    return notas.quantise(_write_tick_scale(pretty_midi.PrettyMIDI().resolution))
+
+
+def _retenido_kib(fn: Callable[[], object]) -> float:
+    tracemalloc.start()
+    try:
+        resultado = fn()
+        retenido = tracemalloc.get_traced_memory()[0] / 1024
+        del resultado
+        return retenido
+    finally:
+        tracemalloc.stop()
+
+
+def run(compases: Sequence[int], repeticiones: int) -> None:
+    generate_montuno(progresion_sintetica(8), **OPCIONES_SALSA)  # warm the template cache
+    print(
+        f"{'bars':>6} {'notes':>7} {'render ms':>10} {'render KiB':>11} "
+        f"{'engine ms':>10} {'engine KiB':>11} {'buffer KiB':>11} {'Note KiB':>9}"
+    )
+    for n in compases:
+        texto = progresion_sintetica(n)
+        notas = _motor(texto)
+        render_ms = medir(lambda: generate_montuno(texto, **OPCIONES_SALSA), repeticiones) * 1e3
+        render_kib = pico_kib(lambda: generate_montuno(texto, **OPCIONES_SALSA))
+        motor_ms = medir(lambda: _motor(texto), repeticiones) * 1e3
+        motor_kib = pico_kib(lambda: _motor(texto))
+        buffer_kib = _retenido_kib(notas.copy)
+        objetos_kib = _retenido_kib(notas.to_notes)
+        print(
+            f"{n:>6} {len(notas):>7} {render_ms:>10.1f} {render_kib:>11,.0f} "
+            f"{motor_ms:>10.1f} {motor_kib:>11,.0f} {buffer_kib:>11,.0f} {objetos_kib:>9,.0f}"
+        )
+
+
+main = main_de(run, __doc__, bars=[64, 1000, 4096], repeat=5)
+
+
+if __name__ == "__main__":
+    main()
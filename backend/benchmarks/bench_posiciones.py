@@ -0,0 +1,60 @@
+"""Template position expansion through the cached grouped template.
+
+``exportar_montuno`` used to regroup the reference loop into 256 lists of
+per-eighth dicts on every render, emit a new dict per destination note and
+sort the whole list by ``(start, pitch)``.  The grouping now lives in a
+:class:`~backend.midi_common.PlantillaPosiciones` kept in the template cache
+and :meth:`~backend.midi_common.PlantillaPosiciones.expandir` tiles its
+pre-sorted per-eighth blocks into NumPy columns without a final sort.  It is
+timed next to ``construir_posiciones_secuenciales`` of the ``--baseline``
+revision when one is given.
+"""
+from __future__ import annotations
+
+import math
+from typing import Optional, Sequence
+
+from ..midi_common import (
+    construir_posiciones_secuenciales,
+    leer_midi_referencia,
+    obtener_posiciones_referencia,
+)
+from ..midi_render import cargar_plantilla
+from .common import REFERENCE_ROOT, arbol_de_revision, main_de, medir, medir_en_revision
+
+
+def run(compases: Sequence[int], repeticiones: int, baseline: Optional[str]) -> None:
+    path = REFERENCE_ROOT / "tradicional_2-3_A.mid"
+    notes, _ = leer_midi_referencia(path)
+    base = obtener_posiciones_referencia(notes)
+    plantilla = cargar_plantilla(path).posiciones
+    print(f"{'bars':>6} {'notes':>7} {'baseline ms':>12} {'cached ms':>10} {'speed-up':>9}")
+    with arbol_de_revision(baseline) as arbol:
+        for n in compases:
+            total = n * 8
+            antes = math.nan
+            if arbol is not None:
+                antes = medir_en_revision(
+                    arbol,
+                    "construir_posiciones_secuenciales(base, total, 256, 0.25, inicio_cor=3)",
+                    repeticiones,
+                    "from backend.midi_common import construir_posiciones_secuenciales",
+                    base=base,
+                    total=total,
+                )
+            def expandir():
+                return construir_posiciones_secuenciales(plantilla, total, 256, 0.25, inicio_cor=3)
+
+            despues = medir(expandir, repeticiones)
+            notas = len(expandir())
+            print(
+                f"{n:>6} {notas:>7} {antes * 1e3:>12.2f} {despues * 1e3:>10.3f} "
+                f"{antes / despues:>8.1f}x"
+            )
+
+
+main = main_de(run, __doc__, bars=[32, 500, 4096], repeat=5, baseline=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Salsa progression parsing through the compiled lexer.
+
+``procesar_progresion_salsa`` used to split the text on ``|``, run
+``re.findall`` on every bar and several ``re.match`` calls with string
+patterns on every token, rebuilding the harmonisation and inversion maps each
+time.  It now reads the chords of every distinct bar (and incoming
+harmonisation, inversion and approach state) once from the memoised typed
+tokens of the lexer, and slices the eighth indices of each chord from one
+shared list.  The parser is timed on long synthetic charts with the lexer and
+bar caches cleared before each run (cold) and kept (warm, as when a chart is
+re-validated on every keystroke), next to the same call in the
+``--baseline`` revision when one is given.
+"""
+from __future__ import annotations
+
+import math
+from typing import Optional, Sequence
+
+from .. import progression_lexer, salsa
+from .common import arbol_de_revision, main_de, medir, medir_en_revision, progresion_sintetica
+
+
+def run(compases: Sequence[int], repeticiones: int, baseline: Optional[str]) -> None:
+    def limpiar() -> None:
+        progression_lexer._tokens_compas.cache_clear()
+        salsa._acordes_compas.cache_clear()
+
+    print(
+        f"{'bars':>6} {'baseline ms':>12} {'cold ms':>8} {'warm ms':>8} "
+        f"{'tokenize ms':>12} {'speed-up warm':>14}"
+    )
+    with arbol_de_revision(baseline) as arbol:
+        for n in compases:
+            texto = "(8) [C# F] " + progresion_sintetica(n).replace("| Em |", "| /3 Em |")
+            antes = math.nan
+            if arbol is not None:
+                antes = medir_en_revision(
+                    arbol,
+                    "procesar_progresion_salsa(texto)",
+                    repeticiones,
+                    "from backend.salsa import procesar_progresion_salsa",
+                    texto=texto,
+                )
+            frio = medir(lambda: salsa.procesar_progresion_salsa(texto), repeticiones, limpiar)
+            caliente = medir(lambda: salsa.procesar_progresion_salsa(texto), repeticiones)
+            lexer = medir(lambda: progression_lexer.tokenize(texto), repeticiones)
+            print(
+                f"{n:>6} {antes * 1e3:>12.2f} {frio * 1e3:>8.2f} {caliente * 1e3:>8.2f} "
+                f"{lexer * 1e3:>12.2f} {antes / caliente:>13.1f}x"
+            )
+
+
+main = main_de(run, __doc__, bars=[64, 5000], repeat=9, baseline=None)
+
+
+if __name__ == "__main__":
+    main()
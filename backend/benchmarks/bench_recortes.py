@@ -0,0 +1,80 @@
+"""Overlap and limit trimming of rendered note lists.
+
+``exportar_montuno`` trims every render with :func:`_cortar_notas_superpuestas`
+followed by :func:`_recortar_notas_a_limite`.  Both used to loop over
+``Note`` objects (two sorts, a dict of per-pitch lists and a second filtering
+pass); :func:`_limpiar_notas` now does both on a
+:class:`~backend.note_buffer.NoteBuffer` with a lexsort, a shifted compare
+and a mask.  It is timed next to the two-step trimming of the
+``--baseline`` revision when one is given.
+"""
+from __future__ import annotations
+
+import math
+import random
+from typing import List, Optional, Sequence
+
+import pretty_midi
+
+from ..midi_utils import _limpiar_notas
+from .common import arbol_de_revision, main_de, medir, medir_en_revision
+
+
+def notas_sinteticas(cantidad: int, semilla: int = 0) -> List[pretty_midi.Note]:
+    """Return ``cantidad`` notes on an eighth grid with frequent same-pitch overlaps."""
+
+    rng = random.Random(semilla)
+    corcheas = max(1, cantidad // 4)
+    notas = []
+    for _ in range(cantidad):
+        start = rng.randrange(corcheas) * 0.25
+        notas.append(
+            pretty_midi.Note(
+                velocity=100,
+                pitch=rng.randrange(48, 84),
+                start=start,
+                end=start + rng.randrange(1, 6) * 0.25,
+            )
+        )
+    return notas
+
+
+# The functions trim in place, so every repetition gets fresh copies.
+_COPIAR = "notas = [Note(*n) for n in originales]"
+
+
+def run(cantidades: Sequence[int], repeticiones: int, baseline: Optional[str]) -> None:
+    print(f"{'notes':>7} {'baseline ms':>12} {'numpy ms':>9} {'speed-up':>9}")
+    with arbol_de_revision(baseline) as arbol:
+        for cantidad in cantidades:
+            notas = notas_sinteticas(cantidad)
+            originales = [(n.velocity, n.pitch, n.start, n.end) for n in notas]
+            limite = max(n.start for n in notas) * 0.9
+            antes = math.nan
+            if arbol is not None:
+                antes = medir_en_revision(
+                    arbol,
+                    "_recortar_notas_a_limite(_cortar_notas_superpuestas(notas), limite)",
+                    repeticiones,
+                    "from pretty_midi import Note\n"
+                    "from backend.midi_utils import _cortar_notas_superpuestas, "
+                    "_recortar_notas_a_limite\n" + _COPIAR,
+                    originales=originales,
+                    limite=limite,
+                )
+            copia: List[pretty_midi.Note] = []
+
+            def copiar() -> None:
+                copia[:] = [pretty_midi.Note(*n) for n in originales]
+
+            despues = medir(lambda: _limpiar_notas(copia, limite), repeticiones, copiar)
+            print(
+                f"{cantidad:>7} {antes * 1e3:>12.2f} {despues * 1e3:>9.2f} {antes / despues:>8.1f}x"
+            )
+
+
+main = main_de(run, __doc__, notes=[1000, 10000, 50000], repeat=5, baseline=None)
+
+
+if __name__ == "__main__":
+    main()
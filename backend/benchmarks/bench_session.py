@@ -0,0 +1,46 @@
+"""Latency of a single-chord edit: full re-render vs. :class:`MontunoSession`.
+
+Each round changes the register offset of one chord near the start of the
+chart (the worst case for forward voice leading) and measures the time until
+an updated :class:`MontunoGenerateResult` is available.
+"""
+from __future__ import annotations
+
+import statistics
+import time
+from typing import Sequence
+
+from ..montuno_core import MontunoSession, generate_montuno
+from .common import OPCIONES_SALSA, main_de, progresion_sintetica
+
+
+def run(compases: Sequence[int], rondas: int) -> None:
+    print(f"{'bars':>6} {'full ms':>10} {'session ms':>11} {'chords':>7} {'speed-up':>9}")
+    for n in compases:
+        texto = progresion_sintetica(n)
+        sesion = MontunoSession(texto, **OPCIONES_SALSA)
+        offsets = [0] * len(sesion)
+        completos, incrementales, retraducidos = [], [], []
+        for ronda in range(rondas):
+            offsets[3] = (ronda % 2) * 1
+            inicio = time.perf_counter()
+            generate_montuno(texto, register_offsets=offsets, **OPCIONES_SALSA)
+            completos.append(time.perf_counter() - inicio)
+
+            inicio = time.perf_counter()
+            retraducidos.append(len(sesion.set_chord(3, register_offset=offsets[3])))
+            sesion.render()
+            incrementales.append(time.perf_counter() - inicio)
+        completo = statistics.median(completos) * 1e3
+        incremental = statistics.median(incrementales) * 1e3
+        print(
+            f"{n:>6} {completo:>10.1f} {incremental:>11.2f} "
+            f"{max(retraducidos):>7} {completo / incremental:>8.1f}x"
+        )
+
+
+main = main_de(run, __doc__, bars=[50, 200, 1000], rounds=6)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Time to first notes and peak memory of streaming vs. full renders.
+
+``generate_montuno`` returns only after the whole chart is rendered, while
+``iter_montuno`` yields the first chord as soon as the chord-level work
+(parsing, inversions, template loading) is done.  For each length this
+reports the latency until the first notes are available, the time to drain
+the stream, and the peak traced allocation of both paths.
+"""
+from __future__ import annotations
+
+import time
+from typing import Sequence
+
+from ..montuno_core import generate_montuno, iter_montuno
+from .common import OPCIONES_SALSA, main_de, pico_kib, progresion_sintetica
+
+
+def _completo(texto: str) -> float:
+    inicio = time.perf_counter()
+    generate_montuno(texto, **OPCIONES_SALSA)
+    return time.perf_counter() - inicio
+
+
+def _streaming(texto: str) -> tuple:
+    inicio = time.perf_counter()
+    bloques = iter_montuno(texto, **OPCIONES_SALSA)
+    next(bloques)
+    primero = time.perf_counter() - inicio
+    for _ in bloques:
+        pass
+    return primero, time.perf_counter() - inicio
+
+
+def run(compases: Sequence[int]) -> None:
+    _completo(progresion_sintetica(8))  # warm the template cache
+    print(
+        f"{'bars':>6} {'full ms':>10} {'first ms':>9} {'drain ms':>10} "
+        f"{'full KiB':>10} {'stream KiB':>11}"
+    )
+    for n in compases:
+        texto = progresion_sintetica(n)
+        completo = _completo(texto)
+        primero, total = _streaming(texto)
+        pico_completo = pico_kib(lambda: _completo(texto))
+        pico_stream = pico_kib(lambda: _streaming(texto))
+        print(
+            f"{n:>6} {completo * 1e3:>10.1f} {primero * 1e3:>9.2f} {total * 1e3:>10.1f} "
+            f"{pico_completo:>10,.0f} {pico_stream:>11,.0f}"
+        )
+
+
+main = main_de(run, __doc__, bars=[64, 512, 4096])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare greedy and optimal bass voice-leading on long progressions.
+
+For each length the chord list is cycled from a fixed chart and both
+strategies choose the default inversions.  Besides the time per chord (which
+should stay flat for the Viterbi search as the progression grows) the total
+bass motion and the widest register reached are reported.
+"""
+from __future__ import annotations
+
+import time
+from typing import Sequence
+
+from .. import salsa
+from ..utils import calc_default_inversions
+from .common import main_de, progresion_sintetica
+
+
+def _voraz(asignaciones):
+    return calc_default_inversions(
+        asignaciones,
+        lambda: "root",
+        salsa.get_bass_pitch,
+        salsa._ajustar_rango_flexible,
+        salsa.seleccionar_inversion,
+        return_pitches=True,
+    )
+
+
+def _optimo(asignaciones):
+    return salsa.optimizar_inversiones(asignaciones, "root")
+
+
+def run(acordes: Sequence[int]) -> None:
+    print(
+        f"{'chords':>7} {'mode':>8} {'total ms':>10} {'us/chord':>9} "
+        f"{'motion':>8} {'range':>10}"
+    )
+    for n in acordes:
+        compases = 1
+        while True:
+            asignaciones, _, _ = salsa.procesar_progresion_salsa(progresion_sintetica(compases))
+            if len(asignaciones) >= n:
+                break
+            compases *= 2
+        asignaciones = asignaciones[:n]
+        for nombre, fn in (("greedy", _voraz), ("optimal", _optimo)):
+            inicio = time.perf_counter()
+            _, alturas = fn(asignaciones)
+            total = time.perf_counter() - inicio
+            movimiento = sum(abs(b - a) for a, b in zip(alturas, alturas[1:]))
+            print(
+                f"{n:>7} {nombre:>8} {total * 1e3:>10.1f} {total / n * 1e6:>9.1f} "
+                f"{movimiento:>8} {min(alturas):>4}-{max(alturas):<4}"
+            )
+
+
+main = main_de(run, __doc__, chords=[100, 1000, 10000])
+
+
+if __name__ == "__main__":
+    main()
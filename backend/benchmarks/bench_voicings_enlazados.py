@@ -0,0 +1,62 @@
+"""Linked voicings of the traditional modes: memoised transitions.
+
+``_generar_voicings_enlazados`` used to search every chord's voicing from
+scratch and to format the note names of each voicing for a ``logger.debug``
+call even with debug logging off.  The transition from the previous bass is
+now memoised in :func:`~backend.voicings_tradicional._voicing_enlazado` and
+the names are only formatted when debug logging is enabled.  Both modes are
+timed on progressions cycling a fixed chart, with a cold and a warm cache,
+next to the same call in the ``--baseline`` revision when one is given.
+"""
+from __future__ import annotations
+
+import math
+from typing import List, Optional, Sequence
+
+from .. import voicings_tradicional as vt
+from .common import arbol_de_revision, main_de, medir, medir_en_revision, progresion_sintetica
+
+
+def _acordes(n: int) -> List[str]:
+    progresion: List[str] = []
+    compases = 1
+    while len(progresion) < n:
+        progresion = progresion_sintetica(compases).replace("|", " ").split()
+        compases *= 2
+    return progresion[:n]
+
+
+def run(acordes: Sequence[int], repeticiones: int, baseline: Optional[str]) -> None:
+    print(
+        f"{'chords':>7} {'mode':>12} {'baseline ms':>12} {'cold ms':>8} {'warm ms':>8} "
+        f"{'chords/s warm':>14}"
+    )
+    with arbol_de_revision(baseline) as arbol:
+        for n in acordes:
+            progresion = _acordes(n)
+            for modo, fn in (
+                ("tradicional", vt.generar_voicings_enlazados_tradicional),
+                ("extendido", vt.generar_voicings_enlazados_extendido),
+            ):
+                antes = math.nan
+                if arbol is not None:
+                    antes = medir_en_revision(
+                        arbol,
+                        "fn(progresion)",
+                        repeticiones,
+                        f"from backend.voicings_tradicional import {fn.__name__} as fn",
+                        progresion=progresion,
+                    )
+                frio = medir(lambda: fn(progresion), repeticiones, vt._voicing_enlazado.cache_clear)
+                caliente = medir(lambda: fn(progresion), repeticiones)
+                print(
+                    f"{n:>7} {modo:>12} {antes * 1e3:>12.2f} {frio * 1e3:>8.2f} "
+                    f"{caliente * 1e3:>8.2f} {n / caliente:>14.0f}"
+                )
+
+
+main = main_de(run, __doc__, chords=[100, 1000, 10000], repeat=5, baseline=None)
+
+
+if __name__ == "__main__":
+    main()
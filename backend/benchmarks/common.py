@@ -0,0 +1,156 @@
+"""Helpers shared by the benchmark scripts.
+
+Besides the synthetic inputs and the median timer, :func:`arbol_de_revision`
+and :func:`medir_en_revision` time the code of an earlier git revision (for
+instance the commit before an optimisation) in a subprocess, so the scripts
+compare against the real former implementation instead of a copy of it.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import io
+import pickle
+import statistics
+import subprocess
+import sys
+import tarfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Callable, Iterator, List, Optional, Sequence
+
+from ..montuno_core import CLAVES
+
+REFERENCE_ROOT = Path(__file__).resolve().parent.parent / "reference_midi_loops"
+_RAIZ_REPO = REFERENCE_ROOT.parents[1]
+
+# Default ``generate_montuno`` arguments of the salsa benchmarks.
+OPCIONES_SALSA = dict(
+    clave_config=CLAVES["Clave 2-3"],
+    variacion="A",
+    inversion="root",
+    reference_root=REFERENCE_ROOT,
+)
+
+_COMPASES_BASE = ["Am7 D7", "G∆", "C7", "F#m7(b5) B7", "Em", "A7", "Dm7 G7", "C∆"]
+
+
+def progresion_sintetica(compases: int) -> str:
+    """Return a progression of ``compases`` bars cycling a fixed chart."""
+
+    return " | ".join(_COMPASES_BASE[i % len(_COMPASES_BASE)] for i in range(compases))
+
+
+def medir(
+    fn: Callable[[], object], repeticiones: int, antes: Optional[Callable[[], None]] = None
+) -> float:
+    """Median wall time of ``fn`` in seconds; ``antes`` runs untimed before each call.
+
+    The garbage collector is paused during each call, as :mod:`timeit` does,
+    so the figures compare with those of :func:`medir_en_revision`.
+    """
+
+    tiempos: List[float] = []
+    for _ in range(repeticiones):
+        if antes is not None:
+            antes()
+        recolector = gc.isenabled()
+        gc.disable()
+        try:
+            inicio = time.perf_counter()
+            fn()
+            tiempos.append(time.perf_counter() - inicio)
+        finally:
+            if recolector:
+                gc.enable()
+    return statistics.median(tiempos)
+
+
+def pico_kib(fn: Callable[[], object]) -> float:
+    """Peak traced allocation of one call to ``fn`` in KiB."""
+
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+@contextmanager
+def arbol_de_revision(rev: Optional[str]) -> Iterator[Optional[Path]]:
+    """Extract ``backend`` as of git revision ``rev`` into a temporary directory.
+
+    Yields the directory containing the extracted package, or ``None`` when
+    ``rev`` is ``None`` so callers can skip the baseline columns.
+    """
+
+    if rev is None:
+        yield None
+        return
+    archivo = subprocess.run(
+        ["git", "archive", "--format=tar", rev, "backend"],
+        cwd=_RAIZ_REPO,
+        check=True,
+        capture_output=True,
+    ).stdout
+    with TemporaryDirectory() as tmp:
+        with tarfile.open(fileobj=io.BytesIO(archivo)) as tar:
+            tar.extractall(tmp)
+        yield Path(tmp)
+
+
+_SCRIPT_REVISION = """
+import pickle, statistics, sys, timeit
+datos = pickle.load(sys.stdin.buffer)
+sentencia, preparacion, repeticiones = datos.pop("__args__")
+tiempos = timeit.repeat(sentencia, preparacion, number=1, repeat=repeticiones, globals=datos)
+print(statistics.median(tiempos))
+"""
+
+
+def medir_en_revision(
+    arbol: Path, sentencia: str, repeticiones: int, preparacion: str = "pass", **datos: object
+) -> float:
+    """Median time in seconds of ``sentencia`` run against the package in ``arbol``.
+
+    ``preparacion`` runs untimed before each repetition (it usually imports
+    the function under test); ``datos`` are pickled into its globals, so they
+    must be plain data (strings, numbers, lists, dicts).
+    """
+
+    entrada = pickle.dumps({**datos, "__args__": (sentencia, preparacion, repeticiones)})
+    salida = subprocess.run(
+        [sys.executable, "-c", _SCRIPT_REVISION],
+        cwd=arbol,
+        input=entrada,
+        check=True,
+        capture_output=True,
+    ).stdout
+    return float(salida)
+
+
+def main_de(run: Callable[..., None], doc: Optional[str], **opciones: object):
+    """Build a ``main(argv)`` passing ``--<option>`` flags to ``run`` in order.
+
+    List defaults become ``nargs="+"`` integer options; other defaults give
+    their type to the option (``None`` means a string, e.g. ``baseline``).
+    """
+
+    def main(argv: Sequence[str] | None = None) -> None:
+        parser = argparse.ArgumentParser(
+            description=doc, formatter_class=argparse.RawDescriptionHelpFormatter
+        )
+        for nombre, defecto in opciones.items():
+            if isinstance(defecto, (list, tuple)):
+                parser.add_argument(f"--{nombre}", type=int, nargs="+", default=list(defecto))
+            else:
+                tipo = str if defecto is None else type(defecto)
+                parser.add_argument(f"--{nombre}", type=tipo, default=defecto)
+        args = parser.parse_args(argv)
+        run(*(getattr(args, nombre) for nombre in opciones))
+
+    return main
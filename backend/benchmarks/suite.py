@@ -0,0 +1,343 @@
+"""Reproducible benchmark suite for the montuno engines.
+
+Every case runs over synthetic progressions of several lengths and, where the
+engine depends on a template, over every clave/variation found in
+``reference_midi_loops``.  Results are written as JSON with the median and
+p95 latency, the process peak RSS and the peak traced allocation of one extra
+run under :mod:`tracemalloc`.  With ``--compare`` the run is checked against
+a saved baseline and the command exits with status 1 when any case got slower
+than the threshold.
+
+Examples (from the repository root)::
+
+    python -m backend.benchmarks.suite --out baseline.json
+    python -m backend.benchmarks.suite --out new.json --compare baseline.json
+    python -m backend.benchmarks.suite --bars 8 64 --cases generate_montuno
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:  # ``resource`` only exists on POSIX.
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None  # type: ignore[assignment]
+
+from .. import modos, salsa
+from ..montuno_core import CLAVES, generate_montuno
+from ..montuno_core.config import get_clave_tag
+from ..utils import apply_manual_edits, calc_default_inversions
+from .common import REFERENCE_ROOT, progresion_sintetica
+
+BARS_DEFECTO = (8, 64, 512, 4096)
+
+CASOS = (
+    "generate_montuno",
+    "montuno_salsa",
+    "montuno_tradicional",
+    "montuno_extendido",
+    "procesar_progresion_salsa",
+    "calc_default_inversions",
+    "apply_manual_edits",
+)
+
+
+@dataclass
+class Medicion:
+    """One benchmarked case and its statistics."""
+
+    case: str
+    bars: int
+    clave: str
+    variation: str
+    repeat: int
+    median_ms: float
+    p95_ms: float
+    rss_peak_kib: Optional[int]
+    alloc_peak_kib: Optional[float]
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}[bars={self.bars},clave={self.clave},variation={self.variation}]"
+
+
+def variaciones_disponibles(prefijo: str) -> List[str]:
+    """Return the variations with reference loops for ``prefijo`` (sorted)."""
+
+    patron = re.compile(rf"^{re.escape(prefijo)}_(?:[a-z]+_)?([A-Z])\.mid$")
+    encontradas = {
+        m.group(1) for p in REFERENCE_ROOT.glob("*.mid") if (m := patron.match(p.name))
+    }
+    return sorted(encontradas)
+
+
+def _percentil(valores: Sequence[float], q: float) -> float:
+    ordenados = sorted(valores)
+    pos = max(0, math.ceil(q * len(ordenados)) - 1)
+    return ordenados[pos]
+
+
+def _rss_pico_kib() -> Optional[int]:
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return int(pico / 1024) if sys.platform == "darwin" else int(pico)
+
+
+def _repeticiones(bars: int, repeat: int) -> int:
+    # Long charts take seconds per run; keep the total time bounded.
+    return repeat if bars <= 512 else max(3, repeat // 2)
+
+
+def _medir(
+    fn: Callable[[], object], repeticiones: int, asignaciones: bool
+) -> Tuple[List[float], Optional[float]]:
+    fn()  # warm-up: template cache, chord tables
+    tiempos: List[float] = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - inicio)
+    alloc = None
+    if asignaciones:
+        tracemalloc.start()
+        try:
+            fn()
+            alloc = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+    return tiempos, alloc
+
+
+def _funciones(
+    caso: str, bars: int, clave_nombre: str, variacion: str, tmpdir: Path
+) -> Callable[[], object]:
+    """Build the zero-argument callable timed for one matrix entry."""
+
+    clave = CLAVES[clave_nombre]
+    clave_tag = get_clave_tag(clave)
+    patron = clave.patron_grupos
+    texto = progresion_sintetica(bars)
+
+    if caso == "generate_montuno":
+        return lambda: generate_montuno(
+            texto,
+            clave_config=clave,
+            variacion=variacion,
+            inversion="root",
+            reference_root=REFERENCE_ROOT,
+        )
+    if caso == "procesar_progresion_salsa":
+        return lambda: salsa.procesar_progresion_salsa(texto, patron=patron)
+
+    asignaciones, _, aproximaciones = salsa.procesar_progresion_salsa(texto, patron=patron)
+    if caso == "montuno_salsa":
+        midi_ref = REFERENCE_ROOT / f"salsa_{clave_tag}_root_{variacion}.mid"
+        return lambda: salsa.montuno_salsa(
+            "",
+            midi_ref,
+            None,
+            "root",
+            asignaciones_custom=asignaciones,
+            aproximaciones_por_acorde=aproximaciones,
+            return_pm=True,
+            variante=variacion,
+        )
+    if caso in ("montuno_tradicional", "montuno_extendido"):
+        midi_ref = REFERENCE_ROOT / f"tradicional_{clave_tag}_{variacion}.mid"
+        destino = tmpdir / f"{caso}.mid"
+        fn = getattr(modos, caso)
+        return lambda: fn(texto, midi_ref, destino, "Octavas", patron=patron)
+    if caso == "calc_default_inversions":
+        return lambda: calc_default_inversions(
+            asignaciones,
+            lambda: "root",
+            salsa.get_bass_pitch,
+            salsa._ajustar_rango_flexible,
+            salsa.seleccionar_inversion,
+            return_pitches=True,
+        )
+    if caso == "apply_manual_edits":
+        base = generate_montuno(
+            texto,
+            clave_config=clave,
+            variacion=variacion,
+            inversion="root",
+            reference_root=REFERENCE_ROOT,
+        ).midi
+        notas = base.instruments[0].notes
+        # One edit of each kind every few notes, as a heavily edited chart.
+        edits = []
+        for i, n in enumerate(notas[::4]):
+            tipo = ("modify", "delete", "add")[i % 3]
+            edits.append({"type": tipo, "start": n.start, "end": n.end, "pitch": n.pitch + (i % 3 == 2)})
+        originales = [(n.start, n.end, n.pitch, n.velocity) for n in notas]
+
+        def aplicar() -> None:
+            import pretty_midi
+
+            inst = base.instruments[0]
+            inst.notes = [pretty_midi.Note(velocity=v, pitch=p, start=s, end=e) for s, e, p, v in originales]
+            apply_manual_edits(base, edits)
+
+        return aplicar
+    raise ValueError(f"Caso desconocido: {caso}")
+
+
+def _matriz(
+    casos: Sequence[str], bars: Sequence[int], claves: Sequence[str], variaciones: Optional[Sequence[str]]
+) -> Iterator[Tuple[str, int, str, str]]:
+    for caso in casos:
+        for clave_nombre in claves:
+            clave_tag = get_clave_tag(CLAVES[clave_nombre])
+            prefijo = f"tradicional_{clave_tag}" if caso in ("montuno_tradicional", "montuno_extendido") else f"salsa_{clave_tag}"
+            disponibles = variaciones_disponibles(prefijo)
+            if caso in ("procesar_progresion_salsa", "calc_default_inversions", "apply_manual_edits"):
+                # Independent of the template variation.
+                disponibles = disponibles[:1]
+            for variacion in disponibles:
+                if variaciones and variacion not in variaciones:
+                    continue
+                for n in bars:
+                    yield caso, n, clave_nombre, variacion
+
+
+def run(
+    casos: Sequence[str] = CASOS,
+    bars: Sequence[int] = BARS_DEFECTO,
+    claves: Sequence[str] = tuple(CLAVES),
+    variaciones: Optional[Sequence[str]] = None,
+    repeat: int = 5,
+    asignaciones: bool = True,
+    progreso: Optional[Callable[[Medicion], None]] = None,
+) -> List[Medicion]:
+    """Run the benchmark matrix and return one :class:`Medicion` per entry."""
+
+    resultados: List[Medicion] = []
+    with TemporaryDirectory() as tmp:
+        for caso, n, clave_nombre, variacion in _matriz(casos, bars, claves, variaciones):
+            fn = _funciones(caso, n, clave_nombre, variacion, Path(tmp))
+            repeticiones = _repeticiones(n, repeat)
+            tiempos, alloc = _medir(fn, repeticiones, asignaciones)
+            medicion = Medicion(
+                case=caso,
+                bars=n,
+                clave=clave_nombre,
+                variation=variacion,
+                repeat=repeticiones,
+                median_ms=statistics.median(tiempos) * 1e3,
+                p95_ms=_percentil(tiempos, 0.95) * 1e3,
+                rss_peak_kib=_rss_pico_kib(),
+                alloc_peak_kib=alloc,
+            )
+            resultados.append(medicion)
+            if progreso is not None:
+                progreso(medicion)
+    return resultados
+
+
+def a_json(resultados: Sequence[Medicion]) -> Dict[str, object]:
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": {
+            m.key: {
+                "case": m.case,
+                "bars": m.bars,
+                "clave": m.clave,
+                "variation": m.variation,
+                "repeat": m.repeat,
+                "median_ms": round(m.median_ms, 4),
+                "p95_ms": round(m.p95_ms, 4),
+                "rss_peak_kib": m.rss_peak_kib,
+                "alloc_peak_kib": None if m.alloc_peak_kib is None else round(m.alloc_peak_kib, 1),
+            }
+            for m in resultados
+        },
+    }
+
+
+def comparar(
+    actual: Dict[str, object], base: Dict[str, object], umbral: float
+) -> List[Tuple[str, float, float, float]]:
+    """Return ``(key, base_ms, new_ms, ratio)`` for cases slower than ``umbral``.
+
+    Cases missing from either side are ignored.
+    """
+
+    regresiones = []
+    res_base = base.get("results", {})
+    for clave, datos in actual.get("results", {}).items():
+        anterior = res_base.get(clave)
+        if not anterior:
+            continue
+        ratio = datos["median_ms"] / anterior["median_ms"] if anterior["median_ms"] else 1.0
+        if ratio > 1 + umbral:
+            regresiones.append((clave, anterior["median_ms"], datos["median_ms"], ratio))
+    return regresiones
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--cases", nargs="+", choices=CASOS, default=list(CASOS))
+    parser.add_argument("--bars", type=int, nargs="+", default=list(BARS_DEFECTO))
+    parser.add_argument("--claves", nargs="+", choices=list(CLAVES), default=list(CLAVES))
+    parser.add_argument("--variations", nargs="+", default=None)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--out", type=Path, help="write the JSON results here")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10,
+        help="relative slowdown of the median reported as a regression (default 0.10)",
+    )
+    args = parser.parse_args(argv)
+
+    def progreso(m: Medicion) -> None:
+        alloc = "-" if m.alloc_peak_kib is None else f"{m.alloc_peak_kib:,.0f}"
+        print(
+            f"{m.case:<26} {m.bars:>5} {m.clave:<9} {m.variation} "
+            f"median {m.median_ms:>10.2f} ms  p95 {m.p95_ms:>10.2f} ms  alloc {alloc} KiB",
+            flush=True,
+        )
+
+    resultados = run(
+        args.cases, args.bars, args.claves, args.variations, args.repeat,
+        not args.no_alloc, progreso,
+    )
+    datos = a_json(resultados)
+    if args.out:
+        args.out.write_text(json.dumps(datos, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        base = json.loads(args.compare.read_text())
+        regresiones = comparar(datos, base, args.threshold)
+        for clave, antes, despues, ratio in regresiones:
+            print(f"REGRESSION {clave}: {antes:.2f} ms -> {despues:.2f} ms (x{ratio:.2f})")
+        if regresiones:
+            return 1
+        print(f"No regressions above {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
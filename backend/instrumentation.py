@@ -0,0 +1,152 @@
+"""Opt-in per-stage instrumentation for the montuno engines.
+
+Engine code marks its hot stages with :func:`stage`; nothing is measured
+unless a :class:`Tracer` has been activated with :func:`tracing` in the
+current context, in which case each stage records its wall time, call count
+and any counters it reports (notes produced, cache hits…).  When no tracer is
+active :func:`stage` returns a shared no-op object, so the instrumented code
+only pays a context-variable lookup.
+
+The active tracer lives in a :class:`contextvars.ContextVar`, so concurrent
+renders in different threads or tasks never see each other's timings.
+Stages may nest; their times are inclusive.
+
+Example::
+
+    with tracing() as tracer:
+        generate_montuno(...)
+    print(tracer.as_dict())
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, Optional
+import time
+
+__all__ = ["StageStats", "Tracer", "active_tracer", "stage", "tracing"]
+
+StageCallback = Callable[[str, float, Dict[str, float]], None]
+
+
+@dataclass
+class StageStats:
+    """Accumulated measurements of one stage."""
+
+    calls: int = 0
+    seconds: float = 0.0
+    counters: Dict[str, float] = field(default_factory=dict)
+
+
+class Tracer:
+    """Collect :class:`StageStats` per stage name.
+
+    ``callback`` is invoked as ``callback(name, seconds, counters)`` each time
+    a stage finishes.  A tracer activated inside another one also forwards its
+    measurements to the outer tracer.
+    """
+
+    def __init__(self, callback: Optional[StageCallback] = None) -> None:
+        self.callback = callback
+        self.stages: Dict[str, StageStats] = {}
+        self._parent: Optional[Tracer] = None
+
+    def record(self, name: str, seconds: float, counters: Optional[Dict[str, float]] = None) -> None:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        stats.calls += 1
+        stats.seconds += seconds
+        for key, value in (counters or {}).items():
+            stats.counters[key] = stats.counters.get(key, 0) + value
+        if self.callback is not None:
+            self.callback(name, seconds, dict(counters or {}))
+        if self._parent is not None:
+            self._parent.record(name, seconds, counters)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Return ``{stage: {"ms": …, "calls": …, **counters}}`` (JSON friendly)."""
+
+        return {
+            name: {"ms": round(stats.seconds * 1e3, 3), "calls": stats.calls, **stats.counters}
+            for name, stats in self.stages.items()
+        }
+
+
+_ACTIVE: ContextVar[Optional[Tracer]] = ContextVar("montuno_tracer", default=None)
+
+
+def active_tracer() -> Optional[Tracer]:
+    """Return the tracer active in the current context, if any."""
+
+    return _ACTIVE.get()
+
+
+class _Stage:
+    __slots__ = ("_tracer", "_name", "_start", "counters")
+
+    def __init__(self, tracer: Tracer, name: str) -> None:
+        self._tracer = tracer
+        self._name = name
+        self.counters: Dict[str, float] = {}
+
+    def __enter__(self) -> "_Stage":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self._tracer.record(self._name, time.perf_counter() - self._start, self.counters)
+        return False
+
+    def add(self, **counters: float) -> None:
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+    def add(self, **counters: float) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str):
+    """Return a context manager timing stage ``name`` on the active tracer.
+
+    The returned object has an ``add(**counters)`` method to report counts
+    for the stage; both are no-ops when tracing is disabled.
+    """
+
+    tracer = _ACTIVE.get()
+    if tracer is None:
+        return _NULL_STAGE
+    return _Stage(tracer, name)
+
+
+@contextmanager
+def tracing(
+    tracer: Optional[Tracer] = None, *, callback: Optional[StageCallback] = None
+) -> Iterator[Tracer]:
+    """Activate ``tracer`` (or a new one) for the enclosed block."""
+
+    tracer = tracer or Tracer(callback)
+    parent = _ACTIVE.get()
+    if parent is not None and parent is not tracer:
+        tracer._parent = parent
+    token = _ACTIVE.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _ACTIVE.reset(token)
+        tracer._parent = None
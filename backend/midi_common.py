@@ -2,15 +2,24 @@
 
 from __future__ import annotations
 
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from itertools import accumulate, chain, cycle
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional, Tuple, Union
 import logging
 import random
 
+import numpy as np
 import pretty_midi
 
 __all__ = [
     "NOTAS_BASE",
+    "PatronGrupos",
+    "PATRON_GRUPOS_DEFECTO",
+    "PlantillaPosiciones",
+    "Posiciones",
+    "agrupar_posiciones",
     "leer_midi_referencia",
     "obtener_posiciones_referencia",
     "construir_posiciones_secuenciales",
@@ -23,6 +32,66 @@ NOTAS_BASE = [55, 57, 60, 64]  # G3, A3, C4, E4
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class PatronGrupos:
+    """Esquema de agrupación de corcheas de una clave.
+
+    ``primer_bloque`` se usa una única vez al comienzo y a partir de ahí se
+    repite ``patron_repetido`` indefinidamente.  Se pasa explícitamente a los
+    procesadores de progresiones para que cada render use su propia clave.
+    Las sumas acumuladas de ambos bloques se precalculan, de modo que las
+    conversiones entre corcheas e índices de grupo no recorren el patrón.
+    """
+
+    primer_bloque: Tuple[int, ...]
+    patron_repetido: Tuple[int, ...]
+    _acum_primero: Tuple[int, ...] = field(init=False, repr=False, compare=False)
+    _acum_repetido: Tuple[int, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not self.patron_repetido or any(g <= 0 for g in self.primer_bloque + self.patron_repetido):
+            raise ValueError("El patrón de grupos debe contener longitudes positivas")
+        object.__setattr__(self, "_acum_primero", tuple(accumulate(self.primer_bloque)))
+        object.__setattr__(self, "_acum_repetido", tuple(accumulate(self.patron_repetido)))
+
+    def grupo(self, indice: int) -> int:
+        """Devuelve la longitud del grupo de corcheas número ``indice``."""
+
+        if indice < len(self.primer_bloque):
+            return self.primer_bloque[indice]
+        indice -= len(self.primer_bloque)
+        return self.patron_repetido[indice % len(self.patron_repetido)]
+
+    def grupos_desde(self, indice: int) -> Iterator[int]:
+        """Itera sin fin las longitudes de grupo a partir del número ``indice``."""
+
+        if indice < len(self.primer_bloque):
+            return chain(self.primer_bloque[indice:], cycle(self.patron_repetido))
+        desfase = (indice - len(self.primer_bloque)) % len(self.patron_repetido)
+        return cycle(self.patron_repetido[desfase:] + self.patron_repetido[:desfase])
+
+    def indice_para_corchea(self, cor: int) -> int:
+        """Return the pattern index corresponding to ``cor`` eighth-notes.
+
+        This is the first group index whose start is at or after ``cor``.
+        """
+
+        if cor <= 0:
+            return 0
+        total_primero = self._acum_primero[-1] if self._acum_primero else 0
+        if cor <= total_primero:
+            return bisect_left(self._acum_primero, cor) + 1
+        ciclos, resto = divmod(cor - total_primero, self._acum_repetido[-1])
+        indice = len(self.primer_bloque) + ciclos * len(self.patron_repetido)
+        if resto:
+            indice += bisect_left(self._acum_repetido, resto) + 1
+        return indice
+
+
+# Clave 2-3, el patrón usado cuando no se indica otro.
+PATRON_GRUPOS_DEFECTO = PatronGrupos((3, 4, 4, 3), (5, 4, 4, 3))
+
+
 def leer_midi_referencia(midi_path: Path):
     """Load reference MIDI and return its notes and the PrettyMIDI object."""
     pm = pretty_midi.PrettyMIDI(str(midi_path))
@@ -58,48 +127,149 @@ def obtener_posiciones_referencia(notes) -> List[dict]:
     return posiciones
 
 
+@dataclass(frozen=True, eq=False)
+class PlantillaPosiciones:
+    """Baseline notes of a reference loop grouped per eighth in columns.
+
+    The notes of eighth ``c`` occupy ``limites[c]:limites[c + 1]``, already
+    ordered by ``(start, pitch)``, and their times are relative to the start
+    of the eighth.  Instances are shared through the template cache, so the
+    arrays are read-only.
+    """
+
+    limites: np.ndarray
+    alturas: np.ndarray
+    desde: np.ndarray
+    hasta: np.ndarray
+    velocidades: np.ndarray
+    total_cor: int
+    grid: float
+
+    def expandir(self, refs: np.ndarray) -> "Posiciones":
+        """Emit the notes of template eighth ``refs[d]`` at destination eighth ``d``.
+
+        Each eighth contributes one block that is already in order and the
+        blocks never overlap in time, so the result needs no final sort.
+        """
+
+        desde_ref = self.limites[refs]
+        cuantas = self.limites[refs + 1] - desde_ref
+        inicio_bloque = np.cumsum(cuantas) - cuantas
+        indices = np.arange(int(cuantas.sum())) + np.repeat(desde_ref - inicio_bloque, cuantas)
+        corchea = np.repeat(np.arange(len(refs)), cuantas)
+        base = corchea * self.grid
+        return Posiciones(
+            corchea=corchea,
+            pitch=self.alturas[indices],
+            start=np.round(base + self.desde[indices], 6),
+            end=np.round(base + self.hasta[indices], 6),
+            velocity=self.velocidades[indices],
+        )
+
+
+@dataclass(frozen=True, eq=False)
+class Posiciones:
+    """Template notes laid over the destination, as parallel columns.
+
+    ``corchea`` is the destination eighth each note belongs to; the notes are
+    ordered by ``(start, pitch)``.
+    """
+
+    corchea: np.ndarray
+    pitch: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    velocity: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.pitch)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Posiciones):
+            return NotImplemented
+        return all(
+            np.array_equal(getattr(self, columna), getattr(other, columna))
+            for columna in ("corchea", "pitch", "start", "end", "velocity")
+        )
+
+    def como_dicts(self) -> List[dict]:
+        """Return the positions as ``pitch``/``start``/``end``/``velocity`` dicts."""
+
+        return [
+            {"pitch": pitch, "start": start, "end": end, "velocity": velocity}
+            for pitch, start, end, velocity in zip(
+                self.pitch.tolist(),
+                self.start.tolist(),
+                self.end.tolist(),
+                self.velocity.tolist(),
+            )
+        ]
+
+
+def agrupar_posiciones(
+    posiciones_base: List[dict], total_cor_ref: int, grid_seg: float
+) -> PlantillaPosiciones:
+    """Group ``posiciones_base`` per eighth of the reference.
+
+    Positions outside the ``total_cor_ref`` eighths are dropped; inside each
+    eighth they are sorted by ``(start, pitch)`` keeping the input order on
+    ties, which is the order the destination positions are emitted in.
+    """
+
+    starts = np.array([pos["start"] for pos in posiciones_base], dtype=np.float64)
+    ends = np.array([pos["end"] for pos in posiciones_base], dtype=np.float64)
+    alturas = np.array([pos["pitch"] for pos in posiciones_base], dtype=np.int16)
+    velocidades = np.array([pos["velocity"] for pos in posiciones_base], dtype=np.int16)
+    corcheas = np.array(
+        [int(round(start / grid_seg)) for start in starts.tolist()], dtype=np.int64
+    )
+    desde = starts - corcheas * grid_seg
+    hasta = ends - corcheas * grid_seg
+    dentro = np.flatnonzero((corcheas >= 0) & (corcheas < total_cor_ref))
+    orden = dentro[np.lexsort((alturas[dentro], desde[dentro], corcheas[dentro]))]
+    plantilla = PlantillaPosiciones(
+        limites=np.searchsorted(corcheas[orden], np.arange(total_cor_ref + 1)),
+        alturas=alturas[orden],
+        desde=desde[orden],
+        hasta=hasta[orden],
+        velocidades=velocidades[orden],
+        total_cor=total_cor_ref,
+        grid=grid_seg,
+    )
+    for columna in ("limites", "alturas", "desde", "hasta", "velocidades"):
+        getattr(plantilla, columna).setflags(write=False)
+    return plantilla
+
+
+def _plantilla(
+    posiciones_base, total_cor_ref: int, grid_seg: float
+) -> PlantillaPosiciones:
+    if isinstance(posiciones_base, PlantillaPosiciones):
+        return posiciones_base
+    return agrupar_posiciones(posiciones_base, total_cor_ref, grid_seg)
+
+
 def construir_posiciones_secuenciales(
-    posiciones_base: List[dict],
+    posiciones_base: Union[List[dict], PlantillaPosiciones],
     total_cor_dest: int,
     total_cor_ref: int,
     grid_seg: float,
     *,
     inicio_cor: int = 0,
-) -> List[dict]:
-    """Build note positions repeating the reference sequentially."""
-
-    grupos_ref: List[List[dict]] = [[] for _ in range(total_cor_ref)]
-    for pos in posiciones_base:
-        idx = int(round(pos["start"] / grid_seg))
-        if 0 <= idx < total_cor_ref:
-            grupos_ref[idx].append(
-                {
-                    "pitch": pos["pitch"],
-                    "start": pos["start"] - idx * grid_seg,
-                    "end": pos["end"] - idx * grid_seg,
-                    "velocity": pos["velocity"],
-                }
-            )
+) -> Posiciones:
+    """Build note positions repeating the reference sequentially.
 
-    posiciones: List[dict] = []
-    for dest_idx in range(total_cor_dest):
-        ref_idx = (inicio_cor + dest_idx) % total_cor_ref
-        for nota in grupos_ref[ref_idx]:
-            posiciones.append(
-                {
-                    "pitch": nota["pitch"],
-                    "start": round(dest_idx * grid_seg + nota["start"], 6),
-                    "end": round(dest_idx * grid_seg + nota["end"], 6),
-                    "velocity": nota["velocity"],
-                }
-            )
+    ``posiciones_base`` may be the raw reference positions or, to skip the
+    grouping, a cached :class:`PlantillaPosiciones`.
+    """
 
-    posiciones.sort(key=lambda x: (x["start"], x["pitch"]))
-    return posiciones
+    plantilla = _plantilla(posiciones_base, total_cor_ref, grid_seg)
+    refs = (inicio_cor + np.arange(total_cor_dest)) % total_cor_ref
+    return plantilla.expandir(refs)
 
 
 def construir_posiciones_por_ventanas(
-    posiciones_base: List[dict],
+    posiciones_base: Union[List[dict], PlantillaPosiciones],
     total_cor_dest: int,
     total_cor_ref: int,
     grid_seg: float,
@@ -107,58 +277,41 @@ def construir_posiciones_por_ventanas(
     inicio_cor: int = 0,
     compases_ventana: int = 4,
     aleatorio: bool = True,
-) -> List[dict]:
-    """Build note positions choosing fixed-size windows from the reference."""
+    rng: Optional[random.Random] = None,
+) -> Posiciones:
+    """Build note positions choosing fixed-size windows from the reference.
+
+    ``rng`` draws the random windows; pass a seeded ``random.Random`` for
+    reproducible output.  The global :mod:`random` state is never touched.
+    ``posiciones_base`` is handled as in :func:`construir_posiciones_secuenciales`.
+    """
 
     inicio_cor = inicio_cor % total_cor_ref
 
     ventana_cor = compases_ventana * 8
     num_ventanas = max(1, total_cor_ref // ventana_cor)
 
-    grupos_ref: List[List[dict]] = [[] for _ in range(total_cor_ref)]
-    for pos in posiciones_base:
-        idx = int(round(pos["start"] / grid_seg))
-        if 0 <= idx < total_cor_ref:
-            grupos_ref[idx].append(
-                {
-                    "pitch": pos["pitch"],
-                    "start": pos["start"] - idx * grid_seg,
-                    "end": pos["end"] - idx * grid_seg,
-                    "velocity": pos["velocity"],
-                }
-            )
+    plantilla = _plantilla(posiciones_base, total_cor_ref, grid_seg)
 
-    posiciones: List[dict] = []
     start_block = inicio_cor // ventana_cor
     end_block = (inicio_cor + total_cor_dest - 1) // ventana_cor
     num_blocks = end_block - start_block + 1
 
     if aleatorio:
+        generador = rng if rng is not None else random.Random()
         orden_inicial = list(range(num_ventanas))
-        random.shuffle(orden_inicial)
+        generador.shuffle(orden_inicial)
         ventanas_por_bloque = orden_inicial[:num_blocks]
         while len(ventanas_por_bloque) < num_blocks:
-            ventanas_por_bloque.append(random.randint(0, num_ventanas - 1))
+            ventanas_por_bloque.append(generador.randint(0, num_ventanas - 1))
     else:
         ventanas_por_bloque = [
             (start_block + i) % num_ventanas for i in range(num_blocks)
         ]
 
-    for dest_idx in range(total_cor_dest):
-        cor_global = inicio_cor + dest_idx + 1
-        pos_relativa = (cor_global - 1) % ventana_cor
-        bloque = (cor_global - 1) // ventana_cor - start_block
-        ventana = ventanas_por_bloque[bloque]
-        ref_idx = (ventana * ventana_cor + pos_relativa) % total_cor_ref
-        for nota in grupos_ref[ref_idx]:
-            posiciones.append(
-                {
-                    "pitch": nota["pitch"],
-                    "start": round(dest_idx * grid_seg + nota["start"], 6),
-                    "end": round(dest_idx * grid_seg + nota["end"], 6),
-                    "velocity": nota["velocity"],
-                }
-            )
-
-    posiciones.sort(key=lambda x: (x["start"], x["pitch"]))
-    return posiciones
+    cor_global = inicio_cor + np.arange(total_cor_dest)
+    pos_relativa = cor_global % ventana_cor
+    bloque = cor_global // ventana_cor - start_block
+    ventana = np.array(ventanas_por_bloque, dtype=np.int64)[bloque]
+    refs = (ventana * ventana_cor + pos_relativa) % total_cor_ref
+    return plantilla.expandir(refs)
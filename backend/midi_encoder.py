@@ -0,0 +1,192 @@
+"""Encode rendered montunos as Standard MIDI File bytes without touching disk.
+
+``pretty_midi.PrettyMIDI.write`` builds a :mod:`mido` message per event,
+sorts them with a Python comparator and needs a file to write to; the GUI and
+the web worker used a temporary file just to get the bytes back.  The
+:func:`encode_midi` fast path converts the notes to ticks with a single
+precomputed tick scale, sorts plain tuples and writes the track chunk
+directly, producing the same bytes as ``pretty_midi`` for the objects our
+engines build (one tempo, no time/key signatures, lyrics, pitch bends or
+control changes).  Anything else falls back to ``pretty_midi`` itself.
+
+:func:`timed_messages` returns the same events as ``(seconds, bytes)`` pairs
+for real-time playback, and :func:`tick_notes` the notes a reader of the file
+would find, as tick columns.
+"""
+from __future__ import annotations
+
+import io
+import struct
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .note_buffer import NoteBuffer
+
+__all__ = ["encode_midi", "tick_notes", "timed_messages"]
+
+_DEFAULT_TEMPO = 500000  # microseconds per quarter note (120 BPM)
+
+# Channels ``pretty_midi`` assigns to melodic instruments, in order.
+_CHANNELS = [c for c in range(16) if c != 9]
+
+_TrackEvents = Tuple[int, int, str, List[Tuple[int, int, int]]]
+
+
+def _varlen(value: int) -> bytes:
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(reversed(out))
+
+
+def _chunk(tag: bytes, data: bytes) -> bytes:
+    return tag + struct.pack(">I", len(data)) + data
+
+
+def _tempo_and_scale(pm) -> Optional[Tuple[int, float]]:
+    """Return ``(tempo, seconds_per_tick)`` or ``None`` if the fast path can't be used."""
+
+    resolution = pm.resolution
+    tick_scales = getattr(pm, "_tick_scales", None)
+    if tick_scales is not None:
+        # ``pretty_midi``: a single tempo starting at tick 0.
+        if len(tick_scales) != 1 or tick_scales[0][0] != 0:
+            return None
+        scale = tick_scales[0][1]
+        tempo = int(6e7 / (60.0 / (scale * resolution)))
+    else:
+        # Pyodide stub: fixed tempo in microseconds per beat.
+        tempo = int(getattr(pm, "_tempo", _DEFAULT_TEMPO))
+        scale = tempo / 1e6 / resolution
+    for attr in ("time_signature_changes", "key_signature_changes", "lyrics", "text_events"):
+        if getattr(pm, attr, None):
+            return None
+    for inst in pm.instruments:
+        if getattr(inst, "pitch_bends", None) or getattr(inst, "control_changes", None):
+            return None
+    return tempo, scale
+
+
+def _track_events(pm, scale: float) -> List[_TrackEvents]:
+    """Return ``(channel, program, name, events)`` per instrument.
+
+    ``events`` are ``(tick, pitch, velocity)`` note-on tuples (velocity 0 for
+    note-offs) in the order ``pretty_midi`` writes them: by tick, then pitch,
+    then velocity, so a note-off precedes a note-on of the same pitch.
+    """
+
+    tracks: List[_TrackEvents] = []
+    for n, inst in enumerate(pm.instruments):
+        channel = 9 if inst.is_drum else _CHANNELS[n % len(_CHANNELS)]
+        events: List[Tuple[int, int, int]] = []
+        append = events.append
+        for note in inst.notes:
+            pitch = int(note.pitch)
+            velocity = int(note.velocity)
+            if not (0 <= pitch < 128 and 0 <= velocity < 128):
+                raise ValueError(f"Nota fuera de rango MIDI: {note}")
+            # ``PrettyMIDI.time_to_tick`` for a single tempo; times <= 0 map to 0.
+            start = note.start
+            end = note.end
+            append((int(round(start / scale)) if start > 0 else 0, pitch, velocity))
+            append((int(round(end / scale)) if end > 0 else 0, pitch, 0))
+        events.sort()
+        tracks.append((channel, int(inst.program), inst.name, events))
+    return tracks
+
+
+def _tempo_track(tempo: int) -> bytes:
+    data = (
+        b"\x00\xff\x51\x03" + tempo.to_bytes(3, "big")
+        # 4/4, 24 clocks per click, 8 32nd notes per beat (``pretty_midi`` default)
+        + b"\x00\xff\x58\x04\x04\x02\x18\x08"
+        + b"\x01\xff\x2f\x00"
+    )
+    return _chunk(b"MTrk", data)
+
+
+def _instrument_track(channel: int, program: int, name: str, events: Sequence[Tuple[int, int, int]]) -> bytes:
+    data = bytearray()
+    if name:
+        encoded = name.encode("latin1")
+        data += b"\x00\xff\x03" + _varlen(len(encoded)) + encoded
+    data += bytes((0x00, 0xC0 | channel, program))
+    last = 0
+    status = bytes((0x90 | channel,))
+    first = True
+    for tick, pitch, velocity in events:
+        delta = tick - last
+        last = tick
+        if delta < 0x80:
+            data.append(delta)
+        else:
+            data += _varlen(delta)
+        if first:
+            # Running status: only the first note-on carries its status byte.
+            data += status
+            first = False
+        data.append(pitch)
+        data.append(velocity)
+    data += b"\x01\xff\x2f\x00"
+    return _chunk(b"MTrk", bytes(data))
+
+
+def encode_midi(pm) -> bytes:
+    """Return the Standard MIDI File bytes ``pm.write`` would produce."""
+
+    fast = _tempo_and_scale(pm)
+    if fast is None:
+        buffer = io.BytesIO()
+        pm.write(buffer)
+        return buffer.getvalue()
+    tempo, scale = fast
+    tracks = _track_events(pm, scale)
+    header = _chunk(b"MThd", struct.pack(">hhh", 1, len(tracks) + 1, pm.resolution))
+    parts = [header, _tempo_track(tempo)]
+    parts.extend(_instrument_track(*track) for track in tracks)
+    return b"".join(parts)
+
+
+def timed_messages(pm) -> List[Tuple[float, bytes]]:
+    """Return ``(seconds, message)`` for every channel message, in playback order.
+
+    The times are those of the encoded file (ticks converted back with the
+    file's tempo), so playback matches what :func:`encode_midi` writes.
+    """
+
+    fast = _tempo_and_scale(pm)
+    if fast is None:
+        raise ValueError("timed_messages sólo admite un tempo fijo sin metaeventos")
+    _, scale = fast
+    messages: List[Tuple[float, bytes]] = []
+    for channel, program, _, events in _track_events(pm, scale):
+        messages.append((0.0, bytes((0xC0 | channel, program))))
+        status = 0x90 | channel
+        messages.extend((tick * scale, bytes((status, pitch, velocity))) for tick, pitch, velocity in events)
+    if len(pm.instruments) > 1:
+        messages.sort(key=lambda item: item[0])
+    return messages
+
+
+def tick_notes(pm) -> NoteBuffer:
+    """Return the notes of every instrument as :func:`encode_midi` writes them.
+
+    The buffer is in ticks of the file, ordered by start tick and pitch.
+    Notes that collapse to zero ticks or have velocity 0 are left out, since
+    a reader never sees them as notes.  The web worker sends these columns to
+    the UI instead of having it parse the encoded file again.
+    """
+
+    fast = _tempo_and_scale(pm)
+    if fast is None:
+        raise ValueError("tick_notes sólo admite un tempo fijo sin metaeventos")
+    _, scale = fast
+    notas = NoteBuffer.from_notes(n for inst in pm.instruments for n in inst.notes)
+    notas = notas.take(notas.velocity > 0)
+    # ``PrettyMIDI.time_to_tick`` for a single tempo; times <= 0 map to 0.
+    np.maximum(notas.start, 0.0, out=notas.start)
+    np.maximum(notas.end, 0.0, out=notas.end)
+    return notas.quantise(scale, sort=False).sort_by_start()
@@ -0,0 +1,966 @@
+# -*- coding: utf-8 -*-
+"""Rendering core shared by the traditional and extended montuno modes.
+
+:mod:`backend.midi_utils` (extended) and :mod:`backend.midi_utils_tradicional`
+used to carry two copies of the same harmonisation loops and export code.
+Everything now lives here once; what differs between the modes is captured
+by an :class:`EstiloRender`:
+
+* ``analizar_acorde`` – the chord parser whose interval tables the mode uses.
+* ``objetivo_septima`` – the interval paired with the seventh of a chord in
+  décimas and treceavas.
+
+Both mode modules build their ``ESTILO`` and expose thin wrappers around the
+functions below, so caches, vectorisation and instrumentation added here
+reach every mode at once.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+import random
+
+import numpy as np
+import pretty_midi
+from .instrumentation import stage
+from .note_buffer import NoteBuffer
+from .template_cache import TEMPLATE_CACHE
+from .voicings import AcordeParseado
+from .midi_common import (
+    NOTAS_BASE,
+    PATRON_GRUPOS_DEFECTO,
+    PatronGrupos,
+    PlantillaPosiciones,
+    Posiciones,
+    agrupar_posiciones,
+    leer_midi_referencia,
+    obtener_posiciones_referencia,
+    construir_posiciones_secuenciales,
+    construir_posiciones_por_ventanas,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# Sufijos cuya séptima se empareja con la novena bemol en ambos modos.
+SUFIJOS_NOVENA_BEMOL = frozenset({"7(b9)", "+7(b9)", "7(b5)b9", "7sus4(b9)"})
+
+
+def objetivo_septima_basico(sufijo: str, intervalos: Sequence[int]) -> int:
+    """Pair the seventh with the flat nine on b9 chords and the ninth otherwise."""
+
+    return intervalos[4] if sufijo in SUFIJOS_NOVENA_BEMOL else 2
+
+
+@dataclass(frozen=True)
+class EstiloRender:
+    """Strategy plugging a montuno mode into the shared rendering core."""
+
+    analizar_acorde: Callable[[str], AcordeParseado]
+    objetivo_septima: Callable[[str, Sequence[int]], int] = objetivo_septima_basico
+
+
+# ==========================================================================
+# MIDI export utilities
+# ==========================================================================
+
+
+def aplicar_voicings_a_referencia(
+    posiciones: List[dict],
+    voicings: List[List[int]],
+    asignaciones: List[Tuple[str, List[int]]],
+    grid_seg: float,
+    *,
+    debug: bool = False,
+) -> Tuple[List[pretty_midi.Note], int]:
+    """Reemplaza las notas de referencia por los voicings generados.
+
+    Devuelve la lista de nuevas notas y el último índice de corchea utilizado.
+    """
+
+    # Mapeo corchea → índice de voicing
+    mapa: Dict[int, int] = {}
+    max_idx = -1
+    for i, data in enumerate(asignaciones):
+        idxs = data[1]
+        for ix in idxs:
+            mapa[ix] = i
+            if ix > max_idx:
+                max_idx = ix
+
+    nuevas_notas: List[pretty_midi.Note] = []
+
+    for pos in posiciones:
+        corchea = int(round(pos["start"] / grid_seg))
+        if corchea not in mapa:
+            if debug:
+                logger.debug("Corchea %s: silencio", corchea)
+            continue  # silencio
+        voicing = sorted(voicings[mapa[corchea]])
+        orden = NOTAS_BASE.index(pos["pitch"])  # posición dentro del voicing
+        # Preserve the velocity of the reference note so dynamics match
+        nueva_nota = pretty_midi.Note(
+            velocity=pos["velocity"],
+            pitch=voicing[orden],
+            start=pos["start"],
+            end=pos["end"],
+        )
+        if debug:
+            logger.debug("Corchea %s: nota base %s -> %s", corchea, pos['pitch'], nueva_nota.pitch)
+        nuevas_notas.append(nueva_nota)
+
+    return nuevas_notas, max_idx
+
+
+def _arm_octavas(notas: List[pretty_midi.Note]) -> List[pretty_midi.Note]:
+    """Duplicate each note one octave above."""
+
+    resultado: List[pretty_midi.Note] = []
+    for n in notas:
+        resultado.append(n)
+        if n.pitch > 0:
+            resultado.append(
+                pretty_midi.Note(
+                    velocity=n.velocity,
+                    pitch=n.pitch + 12,
+                    start=n.start,
+                    end=n.end,
+                )
+            )
+    return resultado
+
+
+def _arm_doble_octava(notas: List[pretty_midi.Note]) -> List[pretty_midi.Note]:
+    """Create notes an octave below and above, without keeping the original."""
+
+    resultado: List[pretty_midi.Note] = []
+    for n in notas:
+        if n.pitch > 0:
+            # Copy the velocity from the original note
+            resultado.append(
+                pretty_midi.Note(
+                    velocity=n.velocity,
+                    pitch=n.pitch - 12,
+                    start=n.start,
+                    end=n.end,
+                )
+            )
+            resultado.append(
+                pretty_midi.Note(
+                    velocity=n.velocity,
+                    pitch=n.pitch + 12,
+                    start=n.start,
+                    end=n.end,
+                )
+            )
+    return resultado
+
+
+def _arm_por_parejas(
+    posiciones: List[dict],
+    voicings: List[List[int]],
+    asignaciones: List[Tuple[str, List[int]]],
+    grid_seg: float,
+    salto: int,
+    *,
+    debug: bool = False,
+) -> List[pretty_midi.Note]:
+    """Generate notes in parallel motion (décimas or sixths).
+
+    Each chord ``voicing`` is walked sequentially using the eighth-note
+    positions assigned to it.  ``salto`` determines the pairing pattern:
+    ``1`` produces décimas (third + octave) and ``2`` produces sixths.
+    The rhythmic information (start, end and velocity) is taken from the
+    reference ``posiciones`` list.
+    """
+
+    # Map each eighth index to the corresponding voicing/chord
+    mapa: Dict[int, int] = {}
+    for i, data in enumerate(asignaciones):
+        idxs = data[1]
+        for ix in idxs:
+            mapa[ix] = i
+
+    # Counter so each chord advances through its voicing in parallel
+    contadores: Dict[int, int] = {}
+
+    resultado: List[pretty_midi.Note] = []
+    for pos in posiciones:
+        corchea = int(round(pos["start"] / grid_seg))
+        if corchea not in mapa:
+            if debug:
+                logger.debug("Corchea %s: silencio", corchea)
+            continue
+
+        idx_voicing = mapa[corchea]
+        paso = contadores.get(idx_voicing, 0)
+        contadores[idx_voicing] = paso + 1
+
+        voicing = sorted(voicings[idx_voicing])
+
+        if salto == 1:  # décimas
+            principal = voicing[paso % 4]
+            agregada = voicing[(paso + 1) % 4] + 12
+        else:  # antiguas sextas
+            principal = voicing[(paso + 1) % 4]
+            agregada = voicing[paso % 4] + 12
+
+        # Ensure the upper note never sits in the same octave as the
+        # principal voice.  This avoids "collapsed" intervals when the
+        # voicing spans less than an octave.
+        while agregada <= principal:
+            agregada += 12
+
+        for pitch in (principal, agregada):
+            resultado.append(
+                pretty_midi.Note(
+                    velocity=pos["velocity"],
+                    pitch=pitch,
+                    start=pos["start"],
+                    end=pos["end"],
+                )
+            )
+
+        if debug:
+            logger.debug("Corchea %s: paso %s -> %s / %s", corchea, paso, principal, agregada)
+
+    return resultado
+
+
+def _mapa_corcheas(asignaciones: Sequence[Tuple]) -> Dict[int, int]:
+    """Map each eighth index to the position of its chord in ``asignaciones``."""
+
+    mapa: Dict[int, int] = {}
+    for i, data in enumerate(asignaciones):
+        for ix in data[1]:
+            mapa[ix] = i
+    return mapa
+
+
+def _info_acorde(nombre: str, estilo: EstiloRender) -> Dict:
+    """Analyse chord ``nombre`` so each pitch can be classified by function.
+
+    The entry stores the root pitch class, the intervals of the chord, its
+    suffix and flags telling whether it is a sixth chord or a diminished
+    seventh.
+    """
+
+    acorde = estilo.analizar_acorde(nombre)
+    suf = acorde.sufijo
+    return {
+        "root_pc": acorde.raiz,
+        "intervals": acorde.intervalos,
+        "is_sixth": suf.endswith("6") and "7" not in suf,
+        "is_dim7": suf == "º7",
+        "suf": suf,
+    }
+
+
+def _info_acordes(asignaciones: Sequence[Tuple], estilo: EstiloRender) -> List[Dict]:
+    """Run :func:`_info_acorde` once for every chord of ``asignaciones``."""
+
+    return [_info_acorde(data[0], estilo) for data in asignaciones]
+
+
+def _nota_agregada(
+    base: int, datos: Dict, estilo: EstiloRender
+) -> Tuple[Optional[str], int]:
+    """Return the function of ``base`` in its chord and the added tenth.
+
+    The pitch class of ``base`` is compared against the chord intervals and
+    the added note is placed with the interval mandated by the
+    specification:
+
+    * F → 3 (+12)
+    * 3 → 5 (+12)
+    * 5 → 7 (+12) or M7 (+12) on sixth chords
+    * 6 or diminished 7 → F (+24)
+    * 7 → ``estilo.objetivo_septima`` (+24)
+
+    Pitches outside the chord get ``None`` as function and an octave above.
+    """
+
+    root_pc = datos["root_pc"]
+    ints = datos["intervals"]
+    pc = base % 12
+    func = None
+    if pc == (root_pc + ints[0]) % 12:
+        func = "F"
+        base_int = ints[0]
+        target_int = ints[1]
+    elif pc == (root_pc + ints[1]) % 12:
+        func = "3"
+        base_int = ints[1]
+        target_int = ints[2]
+    elif pc == (root_pc + ints[2]) % 12:
+        func = "5"
+        base_int = ints[2]
+        target_int = 11 if datos["is_sixth"] else ints[3]
+    elif pc == (root_pc + ints[3]) % 12:
+        base_int = ints[3]
+        if datos["is_sixth"] or datos["is_dim7"]:
+            func = "6"
+            target_int = ints[0]
+        else:
+            func = "7"
+            target_int = estilo.objetivo_septima(datos["suf"], ints)
+    else:
+        base_int = pc
+        target_int = pc
+
+    diff = (target_int - base_int) + (24 if func in ("6", "7") else 12)
+    # If the added note is the flat nine, force a minor tenth (15 semitones)
+    # above the principal voice even if it exceeds the usual range.
+    if func == "7" and target_int == 13:
+        diff = (target_int - base_int) + 12
+    return func, base + diff
+
+
+def _arm_decimas_intervalos(
+    posiciones: List[dict],
+    voicings: List[List[int]],
+    asignaciones: List[Tuple[str, List[int]]],
+    grid_seg: float,
+    estilo: EstiloRender,
+    *,
+    debug: bool = False,
+) -> List[pretty_midi.Note]:
+    """Harmonize in parallel tenths following fixed functional pairs.
+
+    Every voicing note is labelled as fundamental, third, fifth, sixth or
+    seventh of its chord and the added voice is computed by
+    :func:`_nota_agregada`.  Velocity and timing from the reference are
+    preserved verbatim.
+    """
+
+    mapa = _mapa_corcheas(asignaciones)
+    info = _info_acordes(asignaciones, estilo)
+    contadores: Dict[int, int] = {}
+    resultado: List[pretty_midi.Note] = []
+
+    for pos in posiciones:
+        corchea = int(round(pos["start"] / grid_seg))
+        if corchea not in mapa:
+            if debug:
+                logger.debug("Corchea %s: silencio", corchea)
+            continue
+
+        idx = mapa[corchea]
+        paso = contadores.get(idx, 0)
+        contadores[idx] = paso + 1
+
+        base = sorted(voicings[idx])[paso % 4]
+        func, agregada = _nota_agregada(base, info[idx], estilo)
+
+        if debug:
+            logger.debug(
+                "Corchea %s: paso %s %s %s (%s) -> %s",
+                corchea,
+                paso,
+                asignaciones[idx][0],
+                pretty_midi.note_number_to_name(base),
+                func,
+                pretty_midi.note_number_to_name(agregada),
+            )
+
+        for pitch in (base, agregada):
+            resultado.append(
+                pretty_midi.Note(
+                    velocity=pos["velocity"],
+                    pitch=pitch,
+                    start=pos["start"],
+                    end=pos["end"],
+                )
+            )
+
+    return resultado
+
+
+def _arm_treceavas_intervalos(
+    posiciones: List[dict],
+    voicings: List[List[int]],
+    asignaciones: List[Tuple[str, List[int]]],
+    grid_seg: float,
+    estilo: EstiloRender,
+    *,
+    debug: bool = False,
+) -> List[pretty_midi.Note]:
+    """Generate inverted tenths resulting in thirteenths below.
+
+    This uses the same functional logic as :func:`_arm_decimas_intervalos` but
+    the pair of voices is inverted: the principal note is raised an octave and
+    the added voice is placed a thirteenth (20 or 21 semitones) below it.
+    """
+
+    mapa = _mapa_corcheas(asignaciones)
+    info = _info_acordes(asignaciones, estilo)
+    contadores: Dict[int, int] = {}
+    resultado: List[pretty_midi.Note] = []
+
+    for pos in posiciones:
+        corchea = int(round(pos["start"] / grid_seg))
+        if corchea not in mapa:
+            if debug:
+                logger.debug("Corchea %s: silencio", corchea)
+            continue
+
+        idx = mapa[corchea]
+        paso = contadores.get(idx, 0)
+        contadores[idx] = paso + 1
+
+        base = sorted(voicings[idx])[paso % 4]
+        _, agregada = _nota_agregada(base, info[idx], estilo)
+        principal = base + 12
+        inferior = agregada - 24
+
+        if debug:
+            logger.debug(
+                "Corchea %s: paso %s -> %s / %s",
+                corchea,
+                paso,
+                pretty_midi.note_number_to_name(principal),
+                pretty_midi.note_number_to_name(inferior),
+            )
+
+        for pitch in (principal, inferior):
+            resultado.append(
+                pretty_midi.Note(
+                    velocity=pos["velocity"],
+                    pitch=pitch,
+                    start=pos["start"],
+                    end=pos["end"],
+                )
+            )
+
+    return resultado
+
+
+def _arm_noop(notas: List[pretty_midi.Note]) -> List[pretty_midi.Note]:
+    """Placeholder for future harmonization types."""
+
+    return notas
+
+
+# Armonizaciones simples que no dependen del contexto del voicing
+_ARMONIZADORES = {
+    "octavas": _arm_octavas,
+    "doble octava": _arm_doble_octava,
+}
+
+
+def _offset_octavacion(label: str) -> int:
+    """Return the octave shift in semitones indicated by ``label``."""
+
+    etiqueta = label.lower().strip()
+    if etiqueta == "octava arriba":
+        return 12
+    if etiqueta == "octava abajo":
+        return -12
+    return 0
+
+
+# Posición de cada nota de la plantilla dentro del voicing ordenado.
+_ORDEN_BASE: Dict[int, int] = {pitch: orden for orden, pitch in enumerate(NOTAS_BASE)}
+
+# Armonizaciones que recorren el voicing paso a paso en lugar de seguir la
+# nota de la plantilla.
+_ARMONIAS_POR_PASO = ("décimas", "treceavas")
+
+
+def _tabla_armonizacion(
+    voicing: Sequence[int],
+    arm: str,
+    datos: Dict,
+    estilo: EstiloRender,
+    offset: int = 0,
+) -> Tuple[Tuple[int, ...], ...]:
+    """Return the output pitches for each of the four slots of a voicing.
+
+    The slot is the step of the chord through its voicing for décimas and
+    treceavas and the position of the template note in ``NOTAS_BASE`` for
+    the other harmonisations.  ``offset`` (the octave shift of the chord) is
+    already applied, so rendering a position is a single lookup.
+    """
+
+    filas = []
+    for base in sorted(voicing)[:4]:
+        if arm in _ARMONIAS_POR_PASO:
+            _, agregada = _nota_agregada(base, datos, estilo)
+            if arm == "décimas":
+                notas: Tuple[int, ...] = (base, agregada)
+            else:  # treceavas
+                notas = (base + 12, agregada - 24)
+        elif arm == "octavas":
+            notas = (base, base + 12)
+        elif arm == "doble octava":
+            notas = (base - 12, base + 12) if base > 0 else ()
+        else:
+            notas = (base,)
+        filas.append(tuple(p + offset for p in notas))
+    return tuple(filas)
+
+
+def generar_notas_mixtas(
+    posiciones: Posiciones,
+    voicings: List[List[int]],
+    asignaciones: List[Tuple[str, List[int], str]],
+    estilo: EstiloRender,
+    *,
+    octavaciones: Optional[List[str]] = None,
+    debug: bool = False,
+) -> List[pretty_midi.Note]:
+    """Generate notes applying per-chord harmonisation.
+
+    ``asignaciones`` debe contener tuplas ``(acorde, indices, armonizacion)``.
+    Each position carries its destination eighth, so no grid is needed to
+    locate its chord.  The pitches of every chord are precomputed by
+    :func:`_tabla_armonizacion` (once per distinct chord, voicing,
+    harmonisation and octave shift) so each template position only indexes
+    its chord's table.
+    """
+
+    mapa = _mapa_corcheas(asignaciones)
+    # Real charts repeat the same chords with the same voicing over and over,
+    # so the tables are shared between identical chords of the progression.
+    compartidas: Dict[Tuple, Tuple[Tuple[int, ...], ...]] = {}
+    tablas: List[Tuple[Tuple[int, ...], ...]] = []
+    por_paso: List[bool] = []
+    for i, data in enumerate(asignaciones):
+        arm = (data[2] or "").lower()
+        offset = 0
+        if octavaciones and i < len(octavaciones):
+            offset = _offset_octavacion(octavaciones[i] or "")
+        clave = (data[0], tuple(voicings[i]), arm, offset)
+        tabla = compartidas.get(clave)
+        if tabla is None:
+            tabla = _tabla_armonizacion(
+                voicings[i], arm, _info_acorde(data[0], estilo), estilo, offset
+            )
+            compartidas[clave] = tabla
+        tablas.append(tabla)
+        por_paso.append(arm in _ARMONIAS_POR_PASO)
+
+    contadores: Dict[int, int] = {}
+    resultado: List[pretty_midi.Note] = []
+    nota = pretty_midi.Note
+
+    for corchea, altura, start, end, velocity in zip(
+        posiciones.corchea.tolist(),
+        posiciones.pitch.tolist(),
+        posiciones.start.tolist(),
+        posiciones.end.tolist(),
+        posiciones.velocity.tolist(),
+    ):
+        idx = mapa.get(corchea)
+        if idx is None:
+            if debug:
+                logger.debug("Corchea %s: silencio", corchea)
+            continue
+
+        paso = contadores.get(idx, 0)
+        contadores[idx] = paso + 1
+        notas = tablas[idx][paso % 4 if por_paso[idx] else _ORDEN_BASE[altura]]
+
+        if debug and paso == 0:
+            logger.debug("Corchea %s: paso %s -> %s", corchea, paso, list(notas))
+
+        # Positional arguments: keyword construction doubles the cost of
+        # this call, which dominates the loop once the pitches are tabulated.
+        for pitch in notas:
+            resultado.append(nota(velocity, pitch, start, end))
+
+    return resultado
+
+
+def aplicar_armonizacion(
+    notas: List[pretty_midi.Note], opcion: str
+) -> List[pretty_midi.Note]:
+    """Apply the selected harmonization option using ``_ARMONIZADORES``."""
+
+    funcion = _ARMONIZADORES.get(opcion.lower())
+    if funcion is None:
+        return notas
+    return funcion(notas)
+
+
+def _grid_and_bpm(pm: pretty_midi.PrettyMIDI) -> Tuple[int, float, float]:
+    """Return the reference length, eighth duration and BPM.
+
+    The project assumes all reference templates span exactly 32 bars
+    (``256`` eighth-notes).  Tempo data in the files is ignored and a
+    constant tempo of ``120`` BPM is used for every template so the
+    resulting grid is always identical.
+    """
+
+    bpm = 120.0
+    grid = 60.0 / bpm / 2  # seconds per eighth note
+    cor = 256
+    return cor, grid, bpm
+
+
+def _recortar_notas_a_limite(
+    notas: List[pretty_midi.Note], limite: float
+) -> List[pretty_midi.Note]:
+    """Recorta las notas para que no se extiendan más allá de ``limite``.
+
+    Cualquier nota que termine después del instante indicado se acorta para
+    que su atributo ``end`` coincida exactamente con ``limite``.  Las notas
+    cuyo ``start`` es posterior al límite se descartan.
+    """
+
+    if not notas:
+        return []
+    buffer = NoteBuffer.from_notes(notas)
+    dentro = buffer.start < limite
+    for i in np.flatnonzero(dentro & (buffer.end > limite)).tolist():
+        notas[i].end = limite
+    return [notas[i] for i in np.flatnonzero(dentro).tolist()]
+
+
+def _cortar_notas_superpuestas(notas: List[pretty_midi.Note]) -> List[pretty_midi.Note]:
+    """Shorten notes to avoid overlaps at the same pitch.
+
+    If two consecutive notes share the same ``pitch`` and the first note
+    extends beyond the start of the second, the first note is truncated so
+    that it ends exactly when the following one begins.  This prevents MIDI
+    artefacts caused by overlapping identical pitches.  The notes are
+    returned ordered by ``(start, pitch)``.
+    """
+
+    return _limpiar_notas(notas)
+
+
+def _limpiar_notas(
+    notas: List[pretty_midi.Note], limite: Optional[float] = None
+) -> List[pretty_midi.Note]:
+    """Apply :func:`_cortar_notas_superpuestas` and then, with ``limite``,
+    :func:`_recortar_notas_a_limite` in a single pass over NumPy columns.
+
+    The notes are copied into a :class:`NoteBuffer` once; the overlaps are
+    found with a lexsort by ``(pitch, start)`` and a shifted comparison, the
+    limit is a mask, and only the ``end`` of the notes that actually change
+    is written back to the ``pretty_midi.Note`` objects.
+    """
+
+    if not notas:
+        return []
+    buffer = NoteBuffer.from_notes(notas)
+    fin_original = buffer.end.copy()
+    buffer.cut_overlaps()
+    orden = np.lexsort((buffer.pitch, buffer.start))
+    if limite is not None:
+        dentro = buffer.start < limite
+        buffer.end[dentro & (buffer.end > limite)] = limite
+        orden = orden[dentro[orden]]
+    cambiadas = np.flatnonzero(buffer.end != fin_original)
+    for i, fin in zip(cambiadas.tolist(), buffer.end[cambiadas].tolist()):
+        notas[i].end = fin
+    return [notas[i] for i in orden.tolist()]
+
+
+@dataclass(frozen=True, eq=False)
+class PlantillaMontuno:
+    """Reference loop of the traditional and extended modes, ready to expand.
+
+    Instances are shared through :data:`TEMPLATE_CACHE` and must be treated
+    as read-only.
+    """
+
+    posiciones: PlantillaPosiciones
+    program: int
+    is_drum: bool
+    instrument_name: str
+
+
+def _leer_plantilla(path: Path) -> PlantillaMontuno:
+    notes, pm = leer_midi_referencia(path)
+    total_cor_ref, grid, _ = _grid_and_bpm(pm)
+    instrumento = pm.instruments[0]
+    return PlantillaMontuno(
+        posiciones=agrupar_posiciones(obtener_posiciones_referencia(notes), total_cor_ref, grid),
+        program=instrumento.program,
+        is_drum=instrumento.is_drum,
+        instrument_name=instrumento.name,
+    )
+
+
+def cargar_plantilla(path: Path) -> PlantillaMontuno:
+    """Return the reference loop ``path`` grouped per eighth, using the shared cache."""
+
+    return TEMPLATE_CACHE.get(path, _leer_plantilla, kind="montuno")
+
+
+def exportar_montuno(
+    midi_referencia_path: Path,
+    voicings: List[List[int]],
+    asignaciones: List[Tuple[str, List[int], str]],
+    num_compases: int,
+    output_path: Path,
+    armonizacion: Optional[str] = None,
+    *,
+    estilo: EstiloRender,
+    inicio_cor: int = 0,
+    debug: bool = False,
+    return_pm: bool = False,
+    aleatorio: bool = False,
+    octavaciones: Optional[List[str]] = None,
+    rng: Optional[random.Random] = None,
+) -> Optional[pretty_midi.PrettyMIDI]:
+    """Generate a new MIDI file with the given voicings.
+
+    The resulting notes are trimmed so the output stops after the last
+    eighth-note of the progression. ``inicio_cor`` is the global eighth-note
+    index where this segment begins and is used to align the reference
+    template so all segments stay perfectly in sync. ``armonizacion``
+    specifies how notes should be duplicated (for example, in octaves).
+    ``rng`` picks the reference windows when ``aleatorio`` is set and
+    ``estilo`` selects the chord analysis of the mode.  The written
+    ``PrettyMIDI`` is returned when ``return_pm`` is set.
+    """
+    with stage("templates"):
+        plantilla = cargar_plantilla(midi_referencia_path)
+    total_cor_ref = plantilla.posiciones.total_cor
+    grid = plantilla.posiciones.grid
+
+    if debug:
+        logger.debug("Asignacion de acordes a corcheas:")
+        for acorde, idxs, arm, *_ in asignaciones:
+            logger.debug("  %s (%s): %s", acorde, arm, idxs)
+
+    if asignaciones:
+        total_dest_cor = max(i for _, idxs, *_ in asignaciones for i in idxs) + 1
+    else:
+        total_dest_cor = num_compases * 8
+    limite_cor = total_dest_cor
+    # --------------------------------------------------------------
+    # The reference must align with the absolute eighth-note position of
+    # the progression so changes of mode or template never break the
+    # continuity. ``inicio_cor`` indicates the global index where this
+    # segment starts; use it modulo the reference length to pick the
+    # correct starting point.
+    # --------------------------------------------------------------
+    inicio_ref = inicio_cor % total_cor_ref
+    if aleatorio:
+        posiciones = construir_posiciones_por_ventanas(
+            plantilla.posiciones,
+            limite_cor,
+            total_cor_ref,
+            grid,
+            inicio_cor=inicio_ref,
+            compases_ventana=2,
+            aleatorio=True,
+            rng=rng,
+        )
+    else:
+        posiciones = construir_posiciones_secuenciales(
+            plantilla.posiciones,
+            limite_cor,
+            total_cor_ref,
+            grid,
+            inicio_cor=inicio_ref,
+        )
+
+    limite = limite_cor * grid
+
+    with stage("translate") as etapa:
+        nuevas_notas = generar_notas_mixtas(
+            posiciones,
+            voicings,
+            asignaciones,
+            estilo,
+            octavaciones=octavaciones,
+            debug=debug,
+        )
+        etapa.add(chords=len(asignaciones), notes=len(nuevas_notas))
+
+    # Avoid overlapping notes at the same pitch which can cause MIDI
+    # artefacts by trimming preceding notes when necessary.
+    # ------------------------------------------------------------------
+    # Ajuste final de duracion: todas las notas se recortan para que
+    # terminen, como maximo, en la ultima corchea programada.  Ambos
+    # recortes se hacen de una vez con :func:`_limpiar_notas`.
+    # ------------------------------------------------------------------
+    with stage("trim"):
+        nuevas_notas = _limpiar_notas(nuevas_notas, limite)
+
+    if limite > 0:
+        has_start = any(n.start <= 0 < n.end and n.pitch > 0 for n in nuevas_notas)
+        has_end = any(
+            n.pitch > 0
+            and n.start < limite
+            and n.end > limite - grid
+            for n in nuevas_notas
+        )
+        if not has_start:
+            nuevas_notas.append(
+                pretty_midi.Note(
+                    velocity=1,
+                    pitch=21,
+                    start=0.0,
+                    end=min(grid, limite),
+                )
+            )
+        if not has_end:
+            nuevas_notas.append(
+                pretty_midi.Note(
+                    velocity=1,
+                    pitch=21,
+                    start=max(0.0, limite - grid),
+                    end=limite,
+                )
+            )
+
+    pm_out = pretty_midi.PrettyMIDI()
+    inst_out = pretty_midi.Instrument(
+        program=plantilla.program,
+        is_drum=plantilla.is_drum,
+        name=plantilla.instrument_name,
+    )
+    inst_out.notes = nuevas_notas
+    pm_out.instruments.append(inst_out)
+    pm_out.write(str(output_path))
+    return pm_out if return_pm else None
+
+
+# ==========================================================================
+# Traditional rhythmic grouping
+# ==========================================================================
+
+# ---------------------------------------------------------------------------
+# Rhythmic pattern configuration
+# ---------------------------------------------------------------------------
+# ``PRIMER_BLOQUE`` y ``PATRON_REPETIDO`` describen el esquema de agrupación
+# de corcheas por defecto (clave 2-3): el primer bloque se utiliza tal cual
+# una única vez y a partir de entonces se repite ``PATRON_REPETIDO`` de forma
+# indefinida.  Son sólo de referencia: para otra clave se pasa un
+# :class:`PatronGrupos` a ``procesar_progresion_en_grupos`` en lugar de
+# modificar estas listas.
+PRIMER_BLOQUE: List[int] = list(PATRON_GRUPOS_DEFECTO.primer_bloque)
+PATRON_REPETIDO: List[int] = list(PATRON_GRUPOS_DEFECTO.patron_repetido)
+
+# ``PATRON_GRUPOS`` se mantiene solo como referencia para visualizar los
+# primeros valores del patrón por defecto.
+PATRON_GRUPOS: List[int] = PRIMER_BLOQUE + PATRON_REPETIDO * 3
+
+
+def _siguiente_grupo(indice: int, patron: PatronGrupos = PATRON_GRUPOS_DEFECTO) -> int:
+    """Devuelve la longitud del grupo de corcheas según ``indice``.
+
+    Los primeros valores provienen de ``patron.primer_bloque`` y, a partir de
+    ahí, se repite ``patron.patron_repetido`` tantas veces como sea necesario.
+    """
+    return patron.grupo(indice)
+
+
+def _indice_para_corchea(cor: int, patron: PatronGrupos = PATRON_GRUPOS_DEFECTO) -> int:
+    """Return the pattern index corresponding to ``cor`` eighth-notes."""
+
+    return patron.indice_para_corchea(cor)
+
+
+def procesar_progresion_en_grupos(
+    texto: str,
+    armonizacion_default: Optional[str] = None,
+    *,
+    inicio_cor: int = 0,
+    patron: PatronGrupos = PATRON_GRUPOS_DEFECTO,
+) -> Tuple[List[Tuple[str, List[int], str]], int]:
+    """Asignar corcheas por compases según las barras ``|``.
+
+    Un segmento con un solo acorde ocupa dos grupos consecutivos de corcheas.
+    Si contiene dos acordes cada uno recibe un grupo. Cualquier segmento con
+    más de dos acordes genera un ``ValueError``.
+
+
+    ``patron`` indica la agrupación de corcheas de la clave a utilizar.
+    """
+
+    import re
+
+    segmentos_raw = [s.strip() for s in texto.split("|") if s.strip()]
+
+    segmentos: List[str] = []
+    for seg in segmentos_raw:
+        if seg == "%":
+            if not segmentos:
+                raise ValueError("% no puede ir en el primer compás")
+            segmentos.append(segmentos[-1])
+        else:
+            segmentos.append(seg)
+
+    resultado: List[Tuple[str, List[int], str]] = []
+    indice_patron = _indice_para_corchea(inicio_cor, patron)
+    posicion = 0
+
+    arm_actual = (armonizacion_default or "").capitalize()
+
+    def procesar_token(token: str) -> Tuple[Optional[str], Optional[str]]:
+        nonlocal arm_actual
+
+        m = re.match(r"^\[[A-Z]+\](.*)$", token)
+        if m:
+            token = m.group(1)
+            if not token:
+                return None, None
+
+        m = re.match(r"^\((8|10|13|15)\)(.*)$", token)
+        if m:
+            codigo, token = m.groups()
+            arm_map = {
+                "8": "Octavas",
+                "15": "Doble octava",
+                "10": "Décimas",
+                "13": "Treceavas",
+            }
+            arm_actual = arm_map[codigo]
+            if not token:
+                return None, None
+
+        if not token:
+            return None, None
+
+        return token, arm_actual
+
+    for seg in segmentos:
+        tokens = [t for t in seg.split() if t]
+        acordes: List[tuple[str, str]] = []
+        for tok in tokens:
+            nombre, arm = procesar_token(tok)
+            if nombre is None:
+                continue
+            acordes.append((nombre, arm or ""))
+        if len(acordes) == 1:
+            g1 = _siguiente_grupo(indice_patron, patron)
+            g2 = _siguiente_grupo(indice_patron + 1, patron)
+            dur = g1 + g2
+            indices = list(range(posicion, posicion + dur))
+            nombre, arm = acordes[0]
+            resultado.append((nombre, indices, arm))
+            posicion += dur
+            indice_patron += 2
+        elif len(acordes) == 2:
+            g1 = _siguiente_grupo(indice_patron, patron)
+            indices1 = list(range(posicion, posicion + g1))
+            posicion += g1
+            indice_patron += 1
+
+            g2 = _siguiente_grupo(indice_patron, patron)
+            indices2 = list(range(posicion, posicion + g2))
+            posicion += g2
+            indice_patron += 1
+
+            (n1, a1), (n2, a2) = acordes
+            resultado.append((n1, indices1, a1))
+            resultado.append((n2, indices2, a2))
+        elif len(acordes) == 0:
+            continue
+        else:
+            raise ValueError(f"Cada segmento debe contener uno o dos acordes: {seg}")
+
+    for acorde, idxs, arm in resultado:
+        logger.debug("%s (%s): %s", acorde, arm, idxs)
+
+    num_compases = len(segmentos)
+    return resultado, num_compases
@@ -2,6 +2,7 @@
 """Definition of the available montuno generation modes."""
 
 from pathlib import Path
+import random
 
 import pretty_midi
 from typing import List, Optional, Tuple
@@ -12,6 +13,7 @@ from .voicings_tradicional import (
     generar_voicings_enlazados_tradicional,
 )
 from . import midi_utils, midi_utils_tradicional
+from .midi_common import PATRON_GRUPOS_DEFECTO, PatronGrupos
 from .salsa import montuno_salsa
 
 
@@ -32,8 +34,14 @@ def _exportar_montuno_extendido(
     aleatorio: bool = False,
     debug: bool = False,
     octavaciones: Optional[List[str]] = None,
+    rng: Optional[random.Random] = None,
 ) -> Optional[pretty_midi.PrettyMIDI]:
-    """Wrap :func:`midi_utils.exportar_montuno` adding ``return_pm`` support."""
+    """Wrap :func:`midi_utils.exportar_montuno` adding ``return_pm`` support.
+
+    The file is read back so the notes match what was written; their times
+    are converted from the numpy scalars ``pretty_midi`` parses to floats,
+    like those of the traditional mode.
+    """
 
     midi_utils.exportar_montuno(
         midi_ref,
@@ -46,8 +54,16 @@ def _exportar_montuno_extendido(
         aleatorio=aleatorio,
         octavaciones=octavaciones,
         debug=debug,
+        rng=rng,
     )
-    return pretty_midi.PrettyMIDI(str(output)) if return_pm else None
+    if not return_pm:
+        return None
+    pm = pretty_midi.PrettyMIDI(str(output))
+    for inst in pm.instruments:
+        for nota in inst.notes:
+            nota.start = float(nota.start)
+            nota.end = float(nota.end)
+    return pm
 
 
 def _montuno_generico(
@@ -68,10 +84,12 @@ def _montuno_generico(
     octavaciones_custom: Optional[List[str]] = None,
     bajos_objetivo: Optional[List[int]] = None,
     register_offsets: Optional[List[int]] = None,
+    patron: PatronGrupos = PATRON_GRUPOS_DEFECTO,
+    rng: Optional[random.Random] = None,
 ) -> Optional[pretty_midi.PrettyMIDI]:
     if asignaciones_custom is None:
         asignaciones, compases = procesar_progresion_en_grupos(
-            progresion_texto, armonizacion, inicio_cor=inicio_cor
+            progresion_texto, armonizacion, inicio_cor=inicio_cor, patron=patron
         )
     else:
         asignaciones = asignaciones_custom
@@ -121,6 +139,7 @@ def _montuno_generico(
         return_pm=return_pm,
         aleatorio=aleatorio,
         octavaciones=octavaciones,
+        rng=rng,
     )
 
 
@@ -143,6 +162,8 @@ def montuno_tradicional(
     octavaciones_custom: Optional[List[str]] = None,
     bajos_objetivo: Optional[List[int]] = None,
     register_offsets: Optional[List[int]] = None,
+    patron: PatronGrupos = PATRON_GRUPOS_DEFECTO,
+    rng: Optional[random.Random] = None,
 ) -> Optional[pretty_midi.PrettyMIDI]:
     """Generate a montuno in the traditional style."""
 
@@ -163,6 +184,8 @@ def montuno_tradicional(
         octavaciones_custom=octavaciones_custom,
         bajos_objetivo=bajos_objetivo,
         register_offsets=register_offsets,
+        patron=patron,
+        rng=rng,
     )
 
 
@@ -181,6 +204,8 @@ def montuno_extendido(
     octavaciones_custom: Optional[List[str]] = None,
     bajos_objetivo: Optional[List[int]] = None,
     register_offsets: Optional[List[int]] = None,
+    patron: PatronGrupos = PATRON_GRUPOS_DEFECTO,
+    rng: Optional[random.Random] = None,
 ) -> Optional[pretty_midi.PrettyMIDI]:
     """Generate a montuno emphasising extended chord tones."""
 
@@ -201,6 +226,8 @@ def montuno_extendido(
         octavaciones_custom=octavaciones_custom,
         bajos_objetivo=bajos_objetivo,
         register_offsets=register_offsets,
+        patron=patron,
+        rng=rng,
     )
 
 
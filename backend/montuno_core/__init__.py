@@ -1,11 +1,27 @@
 """Core helpers to drive montuno generation without a GUI."""
 from .config import CLAVES, ClaveConfig, get_clave_tag
-from .generation import MontunoGenerateResult, generate_montuno
+from .generation import (
+    MontunoChunk,
+    MontunoGenerateResult,
+    generate_montuno,
+    iter_montuno,
+    reference_loop_names,
+)
+from .session import MontunoSession
+from .batch import MontunoJob, MontunoJobOutcome, generate_many, iter_generate_many
 
 __all__ = [
     "CLAVES",
     "ClaveConfig",
+    "MontunoChunk",
     "MontunoGenerateResult",
+    "MontunoJob",
+    "MontunoJobOutcome",
+    "MontunoSession",
+    "generate_many",
     "generate_montuno",
     "get_clave_tag",
+    "iter_generate_many",
+    "iter_montuno",
+    "reference_loop_names",
 ]
@@ -0,0 +1,141 @@
+"""Render many montunos at once on a pool of worker processes.
+
+Rendering is CPU bound, so threads would only contend for the GIL.  Worker
+processes render one job at a time each and keep their own warm
+:data:`TEMPLATE_CACHE`, preloaded with the reference loops the batch needs
+when the pool starts.
+"""
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+from .. import salsa
+from .config import ClaveConfig, get_clave_tag
+from .generation import MontunoGenerateResult, generate_montuno
+
+
+@dataclass
+class MontunoJob:
+    """One call to :func:`generate_montuno`.
+
+    ``options`` holds the remaining keyword arguments (``variacion``,
+    ``inversion``, ``seed``…) exactly as :func:`generate_montuno` takes them.
+    """
+
+    progression_text: str
+    clave_config: ClaveConfig
+    reference_root: Path
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class MontunoJobOutcome:
+    """Result of a :class:`MontunoJob`; exactly one of ``result``/``error`` is set."""
+
+    index: int
+    job: MontunoJob
+    result: Optional[MontunoGenerateResult] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# Jobs kept submitted per worker while the caller consumes the outcomes.
+_EN_VUELO = 2
+
+
+def _run_job(job: MontunoJob) -> MontunoGenerateResult:
+    return generate_montuno(
+        job.progression_text,
+        clave_config=job.clave_config,
+        reference_root=job.reference_root,
+        **job.options,
+    )
+
+
+def _reference_files(jobs: Sequence[MontunoJob]) -> List[Path]:
+    """Return the reference loops the jobs will load, for pool warm-up."""
+
+    files: Set[Path] = set()
+    for job in jobs:
+        clave_tag = get_clave_tag(job.clave_config)
+        variacion = job.options.get("variacion", "A")
+        for inv in salsa.INVERSIONS:
+            path = Path(job.reference_root) / f"salsa_{clave_tag}_{inv}_{variacion}.mid"
+            if path.exists():
+                files.add(path)
+    return sorted(files)
+
+
+def _warm_worker(paths: Sequence[Path]) -> None:
+    for path in paths:
+        try:
+            salsa.cargar_plantilla_salsa(path)
+        except Exception:
+            # A broken template surfaces as the error of the jobs that use it.
+            pass
+
+
+def iter_generate_many(
+    jobs: Iterable[MontunoJob], workers: Optional[int] = None
+) -> Iterator[MontunoJobOutcome]:
+    """Render ``jobs`` and yield one outcome per job in submission order.
+
+    ``workers`` defaults to ``os.cpu_count()``; ``workers <= 1`` renders in
+    the calling process.  A failing job yields an outcome carrying its
+    exception instead of interrupting the batch.  Closing the generator early
+    cancels the jobs that have not started yet.
+    """
+
+    lista = list(jobs)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(lista))
+
+    if workers <= 1:
+        for idx, job in enumerate(lista):
+            try:
+                yield MontunoJobOutcome(idx, job, result=_run_job(job))
+            except Exception as exc:
+                yield MontunoJobOutcome(idx, job, error=exc)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_warm_worker,
+        initargs=(_reference_files(lista),),
+    ) as pool:
+        try:
+            # Only a few jobs per worker are queued at a time, so closing the
+            # generator early waits for those instead of the whole batch.
+            restantes = iter(lista)
+            pendientes: Deque[Future] = deque(
+                pool.submit(_run_job, job) for job in islice(restantes, _EN_VUELO * workers)
+            )
+            for idx, job in enumerate(lista):
+                future = pendientes.popleft()
+                siguiente = next(restantes, None)
+                if siguiente is not None:
+                    pendientes.append(pool.submit(_run_job, siguiente))
+                try:
+                    yield MontunoJobOutcome(idx, job, result=future.result())
+                except Exception as exc:
+                    yield MontunoJobOutcome(idx, job, error=exc)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def generate_many(
+    jobs: Iterable[MontunoJob], workers: Optional[int] = None
+) -> List[MontunoJobOutcome]:
+    """Render every job (see :func:`iter_generate_many`) and return the outcomes."""
+
+    return list(iter_generate_many(jobs, workers))
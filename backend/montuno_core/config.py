@@ -2,7 +2,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from ..midi_common import PatronGrupos
 
 
 @dataclass(frozen=True)
@@ -13,6 +16,18 @@ class ClaveConfig:
     primer_bloque: List[int]
     patron_repetido: List[int]
 
+    @property
+    def patron_grupos(self) -> PatronGrupos:
+        """Eighth-note grouping pattern passed to the progression parsers."""
+
+        return _patron_grupos(tuple(self.primer_bloque), tuple(self.patron_repetido))
+
+
+@lru_cache(maxsize=None)
+def _patron_grupos(primer_bloque: Tuple[int, ...], patron_repetido: Tuple[int, ...]) -> PatronGrupos:
+    # Shared per pattern so its prefix sums are computed only once.
+    return PatronGrupos(primer_bloque, patron_repetido)
+
 
 CLAVES: Dict[str, ClaveConfig] = {
     "Clave 2-3": ClaveConfig(
@@ -1,18 +1,26 @@
 """Utilities to render montunos without relying on the Tk GUI."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pretty_midi
 
-from .. import midi_utils, salsa
+from .. import salsa
+from ..instrumentation import active_tracer, stage, tracing
+from ..note_buffer import NoteBuffer
 from ..utils import apply_manual_edits, limpiar_inversion, calc_default_inversions
 
 from .config import ClaveConfig, get_clave_tag
 
+# Tempo ``pretty_midi`` assumes when encoding a freshly created ``PrettyMIDI``.
+_DEFAULT_WRITE_BPM = 120.0
+
+# Accepted values for the ``voice_leading`` option of :func:`generate_montuno`.
+VOICE_LEADING_MODES = ("greedy", "optimal")
+
 
 @dataclass
 class MontunoGenerateResult:
@@ -23,6 +31,9 @@ class MontunoGenerateResult:
     clave_tag: str
     max_eighths: int
     reference_files: List[Path]
+    unmatched_edits: List[Dict] = field(default_factory=list)
+    # Per-stage measurements (see :mod:`backend.instrumentation`) when tracing.
+    timings: Optional[Dict[str, Dict[str, float]]] = None
 
 
 def _normalise_sequence(
@@ -72,6 +83,17 @@ def _normalise_nested_notes(
     return result
 
 
+def _clean_progression(progression_text: str, voice_leading: str) -> str:
+    """Collapse whitespace and validate the options shared by all entry points."""
+
+    progression_text = " ".join((progression_text or "").split())
+    if not progression_text:
+        raise ValueError("Ingresa una progresión de acordes")
+    if voice_leading not in VOICE_LEADING_MODES:
+        raise ValueError(f"voice_leading desconocido: {voice_leading}")
+    return progression_text
+
+
 def generate_montuno(
     progression_text: str,
     *,
@@ -88,173 +110,389 @@ def generate_montuno(
     seed: Optional[int] = None,
     bpm: float = 120.0,
     return_pm: bool = False,
+    voice_leading: str = "greedy",
+    trace: bool = False,
 ) -> MontunoGenerateResult:
-    """Render a montuno using the existing MIDI engines."""
+    """Render a montuno using the existing MIDI engines.
+
+    ``voice_leading`` selects how default inversions are chosen: ``"greedy"``
+    links each chord to the previous bass note, ``"optimal"`` minimises the
+    total bass motion over the whole progression (see
+    :func:`salsa.optimizar_inversiones`).
+
+    The salsa engine is deterministic, so ``seed`` does not affect the result;
+    it is kept for API compatibility.  No global state (clave pattern or
+    :mod:`random`) is touched, which makes concurrent calls safe.
+
+    With ``trace=True``, or inside an active :func:`instrumentation.tracing`
+    block, per-stage timings are collected and returned in
+    :attr:`MontunoGenerateResult.timings`.
+    """
+
+    progression_text = _clean_progression(progression_text, voice_leading)
+
+    options = dict(
+        clave_config=clave_config,
+        octavas_por_indice=octavas_por_indice,
+        octavacion_default=octavacion_default,
+        variacion=variacion,
+        inversion=inversion,
+        reference_root=reference_root,
+        inversiones_por_indice=inversiones_por_indice,
+        register_offsets=register_offsets,
+        aproximaciones_por_indice=aproximaciones_por_indice,
+        manual_edits=manual_edits,
+        bpm=bpm,
+        return_pm=return_pm,
+        voice_leading=voice_leading,
+    )
+    if not trace and active_tracer() is None:
+        return _render(progression_text, **options)
+
+    with tracing() as tracer:
+        result = _render(progression_text, **options)
+    result.timings = tracer.as_dict()
+    return result
 
-    progression_text = " ".join((progression_text or "").split())
-    if not progression_text:
-        raise ValueError("Ingresa una progresión de acordes")
 
-    import random
+@dataclass
+class MontunoChunk:
+    """Notes of one chord, as yielded by :func:`iter_montuno`.
 
-    old_state = None
-    if seed is not None:
-        old_state = random.getstate()
-        random.seed(seed)
+    ``start_eighth``/``end_eighth`` delimit the chord in eighth notes from the
+    start of the progression; ``notes`` are quantised like the notes of
+    :func:`generate_montuno` and sorted by start time.
+    """
 
-    try:
-        asignaciones_all, _, aproximaciones_auto = salsa.procesar_progresion_salsa(
-            progression_text
-        )
+    index: int
+    chord: str
+    start_eighth: int
+    end_eighth: int
+    notes: List[pretty_midi.Note]
 
-        if not asignaciones_all:
-            raise ValueError("Progresión vacía")
 
-        num_chords = len(asignaciones_all)
-        octavaciones = _normalise_sequence(
-            octavas_por_indice, octavacion_default, num_chords
-        )
-        register_offsets_norm = _normalise_int_sequence(register_offsets, 0, num_chords)
-        inversiones = _normalise_optional_sequence(inversiones_por_indice, num_chords)
-        aproximaciones = (
-            _normalise_nested_notes(aproximaciones_por_indice, num_chords)
-            if aproximaciones_por_indice is not None
-            else aproximaciones_auto
+def iter_montuno(
+    progression_text: str,
+    *,
+    clave_config: ClaveConfig,
+    octavas_por_indice: Optional[Sequence[str]] = None,
+    octavacion_default: str = "Original",
+    variacion: str,
+    inversion: str,
+    reference_root: Path,
+    inversiones_por_indice: Optional[Sequence[Optional[str]]] = None,
+    register_offsets: Optional[Sequence[Optional[int]]] = None,
+    aproximaciones_por_indice: Optional[Sequence[Optional[Sequence[str]]]] = None,
+    voice_leading: str = "greedy",
+) -> Iterator[MontunoChunk]:
+    """Render a montuno chord by chord.
+
+    The progression is parsed, the inversions chosen and the templates loaded
+    before this function returns, so invalid input raises immediately; the
+    notes are then produced as the iterator is consumed, a batch of
+    :data:`salsa.ACORDES_POR_LOTE` chords at a time (see
+    :func:`salsa._lotes_salsa`), so memory does not grow with the chart.
+    Concatenating the chunks gives the notes of :func:`generate_montuno` with
+    the same arguments.  Manual edits are not applied: they refer to the full
+    render.
+    """
+
+    progression_text = _clean_progression(progression_text, voice_leading)
+
+    plan = _prepare(
+        progression_text,
+        clave_config=clave_config,
+        octavas_por_indice=octavas_por_indice,
+        octavacion_default=octavacion_default,
+        variacion=variacion,
+        inversion=inversion,
+        reference_root=reference_root,
+        inversiones_por_indice=inversiones_por_indice,
+        register_offsets=register_offsets,
+        aproximaciones_por_indice=aproximaciones_por_indice,
+        voice_leading=voice_leading,
+    )
+    plan_salsa = salsa._planificar_montuno_salsa(
+        "", plan.midi_ref, plan.inversion, inicio_cor=0, **plan.kwargs
+    )
+    return _iter_chunks(plan, salsa._lotes_salsa(plan_salsa, salsa.ACORDES_POR_LOTE))
+
+
+def _iter_chunks(
+    plan: _SalsaRender, lotes: Iterator[Tuple[range, NoteBuffer]]
+) -> Iterator[MontunoChunk]:
+    tick_scale = _write_tick_scale(pretty_midi.PrettyMIDI().resolution)
+    for acordes, notas in lotes:
+        quantised = _audible(notas.quantise(tick_scale, sort=False))
+        # Onset order per chord; ties keep the note-off order of a MIDI read-back.
+        quantised = quantised.take(
+            np.lexsort(
+                (
+                    quantised.velocity,
+                    quantised.end,
+                    quantised.pitch,
+                    quantised.start,
+                    quantised.chord,
+                )
+            )
         )
+        for idx, bloque in zip(acordes, quantised.split_chords(acordes)):
+            chord, idxs, _, _ = plan.asignaciones[idx]
+            yield MontunoChunk(
+                index=idx,
+                chord=chord,
+                start_eighth=idxs[0],
+                end_eighth=idxs[-1] + 1,
+                notes=bloque.to_notes(),
+            )
 
-        inversion_limpia = limpiar_inversion(inversion)
-
-        default_inversions, _ = calc_default_inversions(
-            asignaciones_all,
-            lambda: inversion_limpia,
-            salsa.get_bass_pitch,
-            salsa._ajustar_rango_flexible,
-            salsa.seleccionar_inversion,
-            inversiones_por_indice,
-            offset_getter=lambda idx: salsa._offset_octavacion(octavaciones[idx])
-            + register_offsets_norm[idx] * 12,
-            return_pitches=True,
-        )
 
-        inversiones = [inv or default_inv for inv, default_inv in zip(inversiones, default_inversions)]
-        modo_tag = "salsa"
-        clave_tag = get_clave_tag(clave_config)
-
-        midi_utils.PRIMER_BLOQUE = list(clave_config.primer_bloque)
-        midi_utils.PATRON_REPETIDO = list(clave_config.patron_repetido)
-        midi_utils.PATRON_GRUPOS = midi_utils.PRIMER_BLOQUE + midi_utils.PATRON_REPETIDO * 3
-
-        notas_finales: List[pretty_midi.Note] = []
-        max_cor = 0
-        inst_params: Optional[Tuple[int, bool, str]] = None
-        reference_files: List[Path] = []
-        asignaciones_segmento = _build_segment_assignments(asignaciones_all)
-
-        with TemporaryDirectory() as tmpdir:
-            midi_ref_seg = reference_root / f"salsa_{clave_tag}_{inversion_limpia}_{variacion}.mid"
-
-            if not midi_ref_seg.exists():
-                raise FileNotFoundError(f"No se encontró {midi_ref_seg}")
-
-            reference_files.append(midi_ref_seg)
-            tmp_path = Path(tmpdir) / "segment_0.mid"
-
-            kwargs: Dict[str, object] = {
-                "asignaciones_custom": asignaciones_segmento,
-                "octavacion_default": octavacion_default,
-                "octavaciones_custom": octavaciones,
-                "register_offsets": register_offsets_norm,
-                "variante": variacion,
-            }
-
-            if any(aproximaciones):
-                kwargs["aproximaciones_por_acorde"] = aproximaciones
-            if any(inversiones):
-                kwargs["inversiones_manual"] = inversiones
-
-            salsa.montuno_salsa(
-                "",
-                midi_ref_seg,
-                tmp_path,
-                inversion_limpia,
-                inicio_cor=0,
-                return_pm=False,
-                **kwargs,
-            )
+@dataclass
+class _SalsaRender:
+    """Arguments of the salsa engine call shared by the render entry points."""
 
-            pm_segment = pretty_midi.PrettyMIDI(str(tmp_path))
-            if not pm_segment.instruments:
-                return MontunoGenerateResult(
-                    midi=pretty_midi.PrettyMIDI(),
-                    modo_tag=modo_tag,
-                    clave_tag=clave_tag,
-                    max_eighths=0,
-                    reference_files=reference_files,
-                )
+    midi_ref: Path
+    inversion: str
+    kwargs: Dict[str, object]
+    asignaciones: List[Tuple[str, List[int], str, Optional[str]]]
+    modo_tag: str
+    clave_tag: str
+    reference_files: List[Path]
+    # Voice-leading chain before manual overrides are applied.
+    default_inversions: List[str]
+    bass_pitches: List[int]
+    # Approach notes found in the progression text.
+    auto_approaches: List[Optional[List[str]]]
 
-            inst = pm_segment.instruments[0]
-            inst_params = (inst.program, inst.is_drum, inst.name)
-
-            grid_seg = 60.0 / bpm / 2
-            seg_cor = int(round(pm_segment.get_end_time() / grid_seg))
-            start = 0.0
-            for note in inst.notes:
-                if note.pitch in (0, 21):
-                    continue
-                notas_finales.append(
-                    pretty_midi.Note(
-                        velocity=note.velocity,
-                        pitch=note.pitch,
-                        start=note.start + start,
-                        end=note.end + start,
-                    )
-                )
-            max_cor = max(max_cor, seg_cor)
 
-        if inst_params is None:
-            raise ValueError("No se generaron notas para la progresión proporcionada")
+def reference_loop_names(clave_config: ClaveConfig, variacion: str) -> List[str]:
+    """Return the reference loops a render in ``variacion`` may read.
+
+    One template per inversion; a missing one falls back to the loop of the
+    default inversion, so callers that materialise files on demand (the web
+    worker) only need to provide those that exist.
+    """
+
+    clave_tag = get_clave_tag(clave_config)
+    return [f"salsa_{clave_tag}_{inv}_{variacion}.mid" for inv in salsa.INVERSIONS]
+
 
-        grid = 60.0 / bpm / 2
-        final_offset = max_cor * grid
-        if final_offset > 0 and not return_pm:
-            has_start = any(n.start <= 0 < n.end and n.pitch > 0 for n in notas_finales)
-            has_end = any(
-                n.pitch > 0 and n.start < final_offset and n.end > final_offset - grid for n in notas_finales
+def _prepare(
+    progression_text: str,
+    *,
+    clave_config: ClaveConfig,
+    octavas_por_indice: Optional[Sequence[str]],
+    octavacion_default: str,
+    variacion: str,
+    inversion: str,
+    reference_root: Path,
+    inversiones_por_indice: Optional[Sequence[Optional[str]]],
+    register_offsets: Optional[Sequence[Optional[int]]],
+    aproximaciones_por_indice: Optional[Sequence[Optional[Sequence[str]]]],
+    voice_leading: str,
+) -> _SalsaRender:
+    patron = clave_config.patron_grupos
+    with stage("parse") as etapa:
+        asignaciones_all, _, aproximaciones_auto = salsa.procesar_progresion_salsa(
+            progression_text, patron=patron
+        )
+        etapa.add(chords=len(asignaciones_all))
+
+    if not asignaciones_all:
+        raise ValueError("Progresión vacía")
+
+    num_chords = len(asignaciones_all)
+    octavaciones = _normalise_sequence(
+        octavas_por_indice, octavacion_default, num_chords
+    )
+    register_offsets_norm = _normalise_int_sequence(register_offsets, 0, num_chords)
+    inversiones = _normalise_optional_sequence(inversiones_por_indice, num_chords)
+    aproximaciones = (
+        _normalise_nested_notes(aproximaciones_por_indice, num_chords)
+        if aproximaciones_por_indice is not None
+        else aproximaciones_auto
+    )
+
+    inversion_limpia = limpiar_inversion(inversion)
+
+    bass_offsets = [
+        salsa._offset_octavacion(octavaciones[idx]) + register_offsets_norm[idx] * 12
+        for idx in range(num_chords)
+    ]
+    with stage("inversions"):
+        if voice_leading == "optimal":
+            default_inversions, bass_pitches = salsa.optimizar_inversiones(
+                asignaciones_all, inversion_limpia, bass_offsets, inversiones_por_indice
+            )
+        else:
+            default_inversions, bass_pitches = calc_default_inversions(
+                asignaciones_all,
+                lambda: inversion_limpia,
+                salsa.get_bass_pitch,
+                salsa._ajustar_rango_flexible,
+                salsa.seleccionar_inversion,
+                inversiones_por_indice,
+                offset_getter=bass_offsets.__getitem__,
+                return_pitches=True,
             )
-            if not has_start:
-                notas_finales.append(
-                    pretty_midi.Note(velocity=1, pitch=0, start=0.0, end=min(grid, final_offset))
-                )
-            if not has_end:
-                notas_finales.append(
-                    pretty_midi.Note(
-                        velocity=1,
-                        pitch=0,
-                        start=max(0.0, final_offset - grid),
-                        end=final_offset,
-                    )
-                )
 
-        pm_out = pretty_midi.PrettyMIDI()
-        inst_out = pretty_midi.Instrument(
-            program=inst_params[0], is_drum=inst_params[1], name=inst_params[2]
+    inversiones = [inv or default_inv for inv, default_inv in zip(inversiones, default_inversions)]
+    clave_tag = get_clave_tag(clave_config)
+
+    asignaciones_segmento = _build_segment_assignments(asignaciones_all)
+
+    midi_ref_seg = reference_root / f"salsa_{clave_tag}_{inversion_limpia}_{variacion}.mid"
+    if not midi_ref_seg.exists():
+        raise FileNotFoundError(f"No se encontró {midi_ref_seg}")
+
+    kwargs: Dict[str, object] = {
+        "asignaciones_custom": asignaciones_segmento,
+        "octavacion_default": octavacion_default,
+        "octavaciones_custom": octavaciones,
+        "register_offsets": register_offsets_norm,
+        "variante": variacion,
+        "patron": patron,
+    }
+
+    if any(aproximaciones):
+        kwargs["aproximaciones_por_acorde"] = aproximaciones
+    if any(inversiones):
+        kwargs["inversiones_manual"] = inversiones
+    if voice_leading == "optimal":
+        # Render the bass at the octave the optimiser chose, not just its
+        # inversion, so the played line is the one that was minimised.
+        kwargs["bajos_custom"] = bass_pitches
+
+    return _SalsaRender(
+        midi_ref=midi_ref_seg,
+        inversion=inversion_limpia,
+        kwargs=kwargs,
+        asignaciones=asignaciones_segmento,
+        modo_tag="salsa",
+        clave_tag=clave_tag,
+        reference_files=[midi_ref_seg],
+        default_inversions=default_inversions,
+        bass_pitches=bass_pitches,
+        auto_approaches=aproximaciones_auto,
+    )
+
+
+def _render(
+    progression_text: str,
+    *,
+    manual_edits: Optional[List[Dict]],
+    bpm: float,
+    return_pm: bool,
+    **options,
+) -> MontunoGenerateResult:
+    plan = _prepare(progression_text, **options)
+    with stage("render"):
+        plan_salsa = salsa._planificar_montuno_salsa(
+            "", plan.midi_ref, plan.inversion, inicio_cor=0, **plan.kwargs
         )
-        inst_out.notes = notas_finales
-        pm_out.instruments.append(inst_out)
+        notas = NoteBuffer.concat([lote for _, lote in salsa._lotes_salsa(plan_salsa)])
+        notas = NoteBuffer.concat([notas, salsa._notas_de_relleno(plan_salsa, notas)])
+    with stage("quantise") as etapa:
+        tick_scale = _write_tick_scale(pretty_midi.PrettyMIDI().resolution)
+        notas_segmento = notas.quantise(tick_scale)
+        etapa.add(notes=len(notas_segmento))
+    salida = plan_salsa.plantilla_salida
+    return _finish(
+        plan,
+        notas_segmento,
+        (salida.program, salida.is_drum, salida.instrument_name),
+        manual_edits=manual_edits,
+        bpm=bpm,
+        return_pm=return_pm,
+    )
+
+
+def _finish(
+    plan: _SalsaRender,
+    notas_segmento: NoteBuffer,
+    inst_params: Tuple[int, bool, str],
+    *,
+    manual_edits: Optional[List[Dict]],
+    bpm: float,
+    return_pm: bool,
+) -> MontunoGenerateResult:
+    """Drop the marker notes, apply manual edits and build the result.
 
-        if manual_edits:
-            apply_manual_edits(pm_out, manual_edits)
+    ``notas_segmento`` is the quantised engine output in reader order (see
+    :meth:`NoteBuffer.quantise`); notes become ``pretty_midi`` objects here.
+    """
 
+    modo_tag = plan.modo_tag
+    clave_tag = plan.clave_tag
+    reference_files = plan.reference_files
+    if not len(notas_segmento):
         return MontunoGenerateResult(
-            midi=pm_out,
+            midi=pretty_midi.PrettyMIDI(),
             modo_tag=modo_tag,
             clave_tag=clave_tag,
-            max_eighths=max_cor,
+            max_eighths=0,
             reference_files=reference_files,
         )
-    finally:
-        if seed is not None and old_state is not None:
-            random.setstate(old_state)
+
+    grid = 60.0 / bpm / 2
+    max_cor = int(round(float(notas_segmento.end_seconds().max()) / grid))
+    audibles = _audible(notas_segmento)
+    notas_finales = audibles.to_notes()
+
+    final_offset = max_cor * grid
+    if final_offset > 0 and not return_pm:
+        pitch = audibles.pitch
+        start = audibles.start_seconds()
+        end = audibles.end_seconds()
+        has_start = np.any((start <= 0) & (end > 0) & (pitch > 0))
+        has_end = np.any((pitch > 0) & (start < final_offset) & (end > final_offset - grid))
+        if not has_start:
+            notas_finales.append(
+                pretty_midi.Note(velocity=1, pitch=0, start=0.0, end=min(grid, final_offset))
+            )
+        if not has_end:
+            notas_finales.append(
+                pretty_midi.Note(
+                    velocity=1,
+                    pitch=0,
+                    start=max(0.0, final_offset - grid),
+                    end=final_offset,
+                )
+            )
+
+    pm_out = pretty_midi.PrettyMIDI()
+    inst_out = pretty_midi.Instrument(
+        program=inst_params[0], is_drum=inst_params[1], name=inst_params[2]
+    )
+    inst_out.notes = notas_finales
+    pm_out.instruments.append(inst_out)
+
+    unmatched_edits: List[Dict] = []
+    if manual_edits:
+        with stage("manual_edits") as etapa:
+            unmatched_edits = apply_manual_edits(pm_out, manual_edits)
+            etapa.add(edits=len(manual_edits), unmatched=len(unmatched_edits))
+
+    return MontunoGenerateResult(
+        midi=pm_out,
+        modo_tag=modo_tag,
+        clave_tag=clave_tag,
+        max_eighths=max_cor,
+        reference_files=reference_files,
+        unmatched_edits=unmatched_edits,
+    )
+
+
+def _write_tick_scale(resolution: int) -> float:
+    """Seconds per tick ``pretty_midi`` uses to write a fresh ``PrettyMIDI``."""
+
+    return 60.0 / (_DEFAULT_WRITE_BPM * resolution)
+
+
+def _audible(notas: NoteBuffer) -> NoteBuffer:
+    """Drop the silent marker notes (pitches 0 and 21)."""
+
+    return notas.take((notas.pitch != 0) & (notas.pitch != 21))
 
 
 def _build_segment_assignments(
@@ -0,0 +1,287 @@
+"""Incremental re-rendering while the chords of a chart are being edited.
+
+A :class:`MontunoSession` renders a progression once and keeps, per chord,
+the chosen inversion, the bass target and the translated note block.  When
+one chord's inversion, octavation, register offset or approach notes change,
+only that chord and the chords whose default inversion depends on it are
+translated again: the greedy bass chain is followed forward from the edit
+and stops as soon as a bass note matches the previous render, because every
+later chord only depends on the bass note before it.  The new blocks are
+spliced into the cached ones and :meth:`MontunoSession.render` returns the
+same result as :func:`generate_montuno` with the current options.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+import pretty_midi
+
+from .. import salsa
+from ..instrumentation import stage
+from ..note_buffer import NoteBuffer
+from ..utils import iter_default_inversions
+from .config import ClaveConfig
+from .generation import (
+    MontunoGenerateResult,
+    _clean_progression,
+    _finish,
+    _normalise_int_sequence,
+    _normalise_nested_notes,
+    _normalise_optional_sequence,
+    _normalise_sequence,
+    _prepare,
+    _write_tick_scale,
+)
+
+_UNSET = object()
+
+
+class MontunoSession:
+    """Keep a rendered montuno and re-render only the chords an edit affects.
+
+    The constructor takes the arguments of :func:`generate_montuno` that
+    depend on the chart itself; per-chord options are changed afterwards with
+    :meth:`update` or :meth:`set_chord`.  A new progression, clave, variation
+    or default inversion needs a new session.
+    """
+
+    def __init__(
+        self,
+        progression_text: str,
+        *,
+        clave_config: ClaveConfig,
+        variacion: str,
+        inversion: str,
+        reference_root: Path,
+        octavas_por_indice: Optional[Sequence[str]] = None,
+        octavacion_default: str = "Original",
+        inversiones_por_indice: Optional[Sequence[Optional[str]]] = None,
+        register_offsets: Optional[Sequence[Optional[int]]] = None,
+        aproximaciones_por_indice: Optional[Sequence[Optional[Sequence[str]]]] = None,
+        voice_leading: str = "greedy",
+    ) -> None:
+        progression_text = _clean_progression(progression_text, voice_leading)
+        self._prepared = _prepare(
+            progression_text,
+            clave_config=clave_config,
+            octavas_por_indice=octavas_por_indice,
+            octavacion_default=octavacion_default,
+            variacion=variacion,
+            inversion=inversion,
+            reference_root=reference_root,
+            inversiones_por_indice=inversiones_por_indice,
+            register_offsets=register_offsets,
+            aproximaciones_por_indice=aproximaciones_por_indice,
+            voice_leading=voice_leading,
+        )
+        prepared = self._prepared
+        self._plan = salsa._planificar_montuno_salsa(
+            "", prepared.midi_ref, prepared.inversion, inicio_cor=0, **prepared.kwargs
+        )
+        self._voice_leading = voice_leading
+        self._octavacion_default = octavacion_default
+
+        n = len(self._plan.asignaciones)
+        self._octavaciones = _normalise_sequence(octavas_por_indice, octavacion_default, n)
+        self._offsets = _normalise_int_sequence(register_offsets, 0, n)
+        self._overrides = _normalise_optional_sequence(inversiones_por_indice, n)
+        self._aproximaciones = self._normalise_approaches(aproximaciones_por_indice)
+        self._default_inversions = list(prepared.default_inversions)
+        self._bass_pitches = list(prepared.bass_pitches)
+
+        self._tablas: Dict = {}
+        acordes = range(n)
+        with stage("translate") as etapa:
+            crudos = salsa._traducir_acordes(self._plan, acordes, self._tablas)
+            etapa.add(chords=n)
+        # Untrimmed notes of each chord, kept to trim its neighbours again.
+        self._crudos = crudos.split_chords(acordes)
+        recortados = crudos.copy()
+        recortados.cut_overlaps()
+        recortados = salsa._ordenar_lote(recortados, self._plan.total_dest_cor * self._plan.grid)
+        self._bloques = recortados.split_chords(acordes)
+        # Quantised notes of each block, ready to be merged by :meth:`render`.
+        self._tick_scale = _write_tick_scale(pretty_midi.PrettyMIDI().resolution)
+        self._eventos = recortados.quantise(self._tick_scale, sort=False).split_chords(acordes)
+
+    def __len__(self) -> int:
+        return len(self._plan.asignaciones)
+
+    @property
+    def inversions(self) -> List[str]:
+        """Inversion used for each chord in the current render."""
+
+        return list(self._plan.inversiones)
+
+    def _normalise_approaches(
+        self, values: Optional[Sequence[Optional[Sequence[str]]]]
+    ) -> List[Optional[List[str]]]:
+        if values is None:
+            return list(self._prepared.auto_approaches)
+        return _normalise_nested_notes(values, len(self))
+
+    def update(
+        self,
+        *,
+        octavas_por_indice: Optional[Sequence[str]] = None,
+        inversiones_por_indice: Optional[Sequence[Optional[str]]] = None,
+        register_offsets: Optional[Sequence[Optional[int]]] = None,
+        aproximaciones_por_indice: Optional[Sequence[Optional[Sequence[str]]]] = None,
+    ) -> List[int]:
+        """Replace every per-chord option, with the meaning of :func:`generate_montuno`.
+
+        Returns the indices of the chords that were translated again.
+        """
+
+        n = len(self)
+        octavaciones = _normalise_sequence(octavas_por_indice, self._octavacion_default, n)
+        offsets = _normalise_int_sequence(register_offsets, 0, n)
+        overrides = _normalise_optional_sequence(inversiones_por_indice, n)
+        aproximaciones = self._normalise_approaches(aproximaciones_por_indice)
+        cambiados = [
+            idx
+            for idx in range(n)
+            if (octavaciones[idx], offsets[idx], overrides[idx], aproximaciones[idx])
+            != (
+                self._octavaciones[idx],
+                self._offsets[idx],
+                self._overrides[idx],
+                self._aproximaciones[idx],
+            )
+        ]
+        self._octavaciones = octavaciones
+        self._offsets = offsets
+        self._overrides = overrides
+        self._aproximaciones = aproximaciones
+        return self._refresh(cambiados)
+
+    def set_chord(
+        self,
+        index: int,
+        *,
+        inversion=_UNSET,
+        octavacion=_UNSET,
+        register_offset=_UNSET,
+        aproximaciones=_UNSET,
+    ) -> List[int]:
+        """Change the options of chord ``index``; omitted options are kept.
+
+        ``None`` restores the default of an option.  Returns the indices of the
+        chords that were translated again.
+        """
+
+        if not 0 <= index < len(self):
+            raise IndexError(f"Acorde fuera de rango: {index}")
+        if inversion is not _UNSET:
+            self._overrides[index] = inversion or None
+        if octavacion is not _UNSET:
+            self._octavaciones[index] = octavacion or self._octavacion_default
+        if register_offset is not _UNSET:
+            self._offsets[index] = 0 if register_offset is None else int(register_offset)
+        if aproximaciones is not _UNSET:
+            if aproximaciones is None:
+                self._aproximaciones[index] = self._prepared.auto_approaches[index]
+            else:
+                self._aproximaciones[index] = _normalise_nested_notes([aproximaciones], 1)[0]
+        return self._refresh([index])
+
+    def _bass_offset(self, idx: int) -> int:
+        return salsa._offset_octavacion(self._octavaciones[idx]) + self._offsets[idx] * 12
+
+    def _refresh(self, cambiados: Sequence[int]) -> List[int]:
+        if not cambiados:
+            return []
+        plan = self._plan
+        n = len(self)
+        editados = set(cambiados)
+
+        # Follow the voice-leading chain from the first edited chord.
+        revisar: Set[int] = set(editados)
+        if self._voice_leading == "optimal":
+            # The Viterbi search is global; it only works on chord metadata.
+            self._default_inversions, self._bass_pitches = salsa.optimizar_inversiones(
+                plan.asignaciones,
+                self._prepared.inversion,
+                [self._bass_offset(idx) for idx in range(n)],
+                self._overrides,
+            )
+            revisar.update(range(n))
+        else:
+            primero, ultimo = min(cambiados), max(cambiados)
+            for idx, inv, pitch in iter_default_inversions(
+                plan.asignaciones,
+                lambda: self._prepared.inversion,
+                salsa.get_bass_pitch,
+                salsa._ajustar_rango_flexible,
+                salsa.seleccionar_inversion,
+                self._overrides,
+                self._bass_offset,
+                start=primero,
+                prev_pitch=self._bass_pitches[primero - 1] if primero else None,
+            ):
+                converge = pitch == self._bass_pitches[idx]
+                self._default_inversions[idx] = inv
+                self._bass_pitches[idx] = pitch
+                revisar.add(idx)
+                if converge and idx >= ultimo:
+                    break
+
+        sucios: List[int] = []
+        for idx in sorted(revisar):
+            inv = self._overrides[idx] or self._default_inversions[idx]
+            if self._voice_leading == "optimal":
+                # The optimiser also chose the octave; render that pitch.
+                bajo = self._bass_pitches[idx]
+            else:
+                bajo = salsa.get_bass_pitch(plan.asignaciones[idx][0], inv) + self._bass_offset(idx)
+            sin_cambios = inv == plan.inversiones[idx] and bajo == plan.bajos_objetivo[idx]
+            if idx not in editados and sin_cambios:
+                continue
+            plan.inversiones[idx] = inv
+            plan.octavas[idx] = salsa._offset_octavacion(self._octavaciones[idx])
+            plan.bajos_objetivo[idx] = bajo
+            plan.aproximaciones[idx] = salsa._preparar_aproximaciones(
+                [self._aproximaciones[idx]], 1
+            )[0]
+            sucios.append(idx)
+
+        with stage("translate") as etapa:
+            for idx in sucios:
+                self._crudos[idx] = salsa._traducir_acorde(plan, idx, self._tablas)
+            etapa.add(chords=len(sucios))
+        # Overlap trimming looks one chord ahead and one behind.
+        vecinos = {v for idx in sucios for v in (idx - 1, idx, idx + 1) if 0 <= v < n}
+        for idx in vecinos:
+            self._bloques[idx] = salsa._bloque_recortado(plan, self._crudos, idx)
+            self._eventos[idx] = self._bloques[idx].quantise(self._tick_scale, sort=False)
+        return sucios
+
+    def render(
+        self,
+        *,
+        manual_edits: Optional[List[Dict]] = None,
+        bpm: float = 120.0,
+        return_pm: bool = False,
+    ) -> MontunoGenerateResult:
+        """Assemble the cached blocks like :func:`generate_montuno` would."""
+
+        plan = self._plan
+        with stage("quantise") as etapa:
+            # Only the first and last chords can sound on the first and last
+            # eighth, which decides whether silent marker notes are needed.
+            relleno = salsa._notas_de_relleno(
+                plan, NoteBuffer.concat([self._bloques[0], self._bloques[-1]])
+            )
+            bloques = self._eventos + [relleno.quantise(self._tick_scale, sort=False)]
+            notas = NoteBuffer.concat(bloques).reader_order()
+            etapa.add(notes=len(notas))
+        salida = plan.plantilla_salida
+        return _finish(
+            self._prepared,
+            notas,
+            (salida.program, salida.is_drum, salida.instrument_name),
+            manual_edits=manual_edits,
+            bpm=bpm,
+            return_pm=return_pm,
+        )
@@ -0,0 +1,241 @@
+"""Columnar note storage for the rendering pipeline.
+
+The engines used to carry every note as a ``pretty_midi.Note`` from template
+translation to the final ``PrettyMIDI``.  A :class:`NoteBuffer` keeps the same
+information as parallel NumPy columns (pitch, start, end, velocity and the
+index of the chord that produced the note), so a 1000-bar render holds a
+handful of arrays instead of tens of thousands of objects, and the sorts and
+trims of the pipeline become array operations.  ``pretty_midi`` objects are
+only built by :meth:`NoteBuffer.to_notes` at the API boundary.
+
+A buffer's times are seconds (``float64``) while the engine works on it and
+ticks (``int64``) once :meth:`NoteBuffer.quantise` has snapped it to the MIDI
+grid; ``tick_scale`` (seconds per tick) tells them apart.  Every operation
+reproduces the arithmetic of the object-based code it replaces, so the
+rendered notes are bit for bit the same.
+"""
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pretty_midi
+
+__all__ = ["NoteBuffer"]
+
+_PITCH = np.int16
+_VELOCITY = np.int16
+_CHORD = np.int32
+_SECONDS = np.float64
+_TICKS = np.int64
+
+
+class NoteBuffer:
+    """Notes stored as parallel arrays.
+
+    ``chord`` is the index of the chord that produced each note (``-1`` for
+    notes that belong to no chord, such as the silent markers).
+    """
+
+    __slots__ = ("pitch", "start", "end", "velocity", "chord", "tick_scale")
+
+    def __init__(
+        self,
+        pitch: np.ndarray,
+        start: np.ndarray,
+        end: np.ndarray,
+        velocity: np.ndarray,
+        chord: np.ndarray,
+        tick_scale: Optional[float] = None,
+    ) -> None:
+        self.pitch = pitch
+        self.start = start
+        self.end = end
+        self.velocity = velocity
+        self.chord = chord
+        self.tick_scale = tick_scale
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    @classmethod
+    def empty(cls, tick_scale: Optional[float] = None) -> "NoteBuffer":
+        tiempo = _SECONDS if tick_scale is None else _TICKS
+        return cls(
+            np.empty(0, _PITCH),
+            np.empty(0, tiempo),
+            np.empty(0, tiempo),
+            np.empty(0, _VELOCITY),
+            np.empty(0, _CHORD),
+            tick_scale,
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        pitch: Sequence[int],
+        start: Sequence[float],
+        end: Sequence[float],
+        velocity: Sequence[int],
+        chord: int = -1,
+    ) -> "NoteBuffer":
+        """Build a buffer in seconds, every note tagged with ``chord``."""
+
+        pitch_arr = np.asarray(pitch, _PITCH)
+        return cls(
+            pitch_arr,
+            np.asarray(start, _SECONDS),
+            np.asarray(end, _SECONDS),
+            np.asarray(velocity, _VELOCITY),
+            np.full(len(pitch_arr), chord, _CHORD),
+        )
+
+    @classmethod
+    def from_notes(cls, notes: Iterable[pretty_midi.Note], chord: int = -1) -> "NoteBuffer":
+        notes = list(notes)
+        return cls.from_columns(
+            [n.pitch for n in notes],
+            [n.start for n in notes],
+            [n.end for n in notes],
+            [n.velocity for n in notes],
+            chord,
+        )
+
+    @classmethod
+    def concat(cls, buffers: Sequence["NoteBuffer"]) -> "NoteBuffer":
+        """Join ``buffers`` (all in seconds or all in ticks of the same scale)."""
+
+        if not buffers:
+            return cls.empty()
+        if len(buffers) == 1:
+            return buffers[0].copy()
+        return cls(
+            np.concatenate([b.pitch for b in buffers]),
+            np.concatenate([b.start for b in buffers]),
+            np.concatenate([b.end for b in buffers]),
+            np.concatenate([b.velocity for b in buffers]),
+            np.concatenate([b.chord for b in buffers]),
+            buffers[0].tick_scale,
+        )
+
+    # ------------------------------------------------------------------
+    # Basic operations
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.pitch)
+
+    def take(self, index) -> "NoteBuffer":
+        """Return the notes selected by ``index`` (indices or boolean mask)."""
+
+        return NoteBuffer(
+            self.pitch[index],
+            self.start[index],
+            self.end[index],
+            self.velocity[index],
+            self.chord[index],
+            self.tick_scale,
+        )
+
+    def copy(self) -> "NoteBuffer":
+        return NoteBuffer(
+            self.pitch.copy(),
+            self.start.copy(),
+            self.end.copy(),
+            self.velocity.copy(),
+            self.chord.copy(),
+            self.tick_scale,
+        )
+
+    def split_chords(self, chords: Sequence[int]) -> List["NoteBuffer"]:
+        """Return one buffer per entry of ``chords`` (views, not copies).
+
+        The buffer must be grouped by ascending chord index.
+        """
+
+        indices = np.asarray(chords, dtype=self.chord.dtype)
+        desde = np.searchsorted(self.chord, indices, side="left").tolist()
+        hasta = np.searchsorted(self.chord, indices, side="right").tolist()
+        return [self.take(slice(a, b)) for a, b in zip(desde, hasta)]
+
+    def start_seconds(self) -> np.ndarray:
+        if self.tick_scale is None:
+            return self.start
+        return self.tick_scale * self.start
+
+    def end_seconds(self) -> np.ndarray:
+        if self.tick_scale is None:
+            return self.end
+        return self.tick_scale * self.end
+
+    def to_notes(self) -> List[pretty_midi.Note]:
+        """Return the notes as ``pretty_midi.Note`` objects, in buffer order."""
+
+        return [
+            pretty_midi.Note(velocity=velocity, pitch=pitch, start=start, end=end)
+            for pitch, start, end, velocity in zip(
+                self.pitch.tolist(),
+                self.start_seconds().tolist(),
+                self.end_seconds().tolist(),
+                self.velocity.tolist(),
+            )
+        ]
+
+    # ------------------------------------------------------------------
+    # Pipeline stages
+    # ------------------------------------------------------------------
+    def sort_by_start(self) -> "NoteBuffer":
+        """Return the notes ordered by ``(start, pitch)``, ties kept in order."""
+
+        return self.take(np.lexsort((self.pitch, self.start)))
+
+    def cut_overlaps(self) -> None:
+        """Shorten notes that overlap the next note of the same pitch, in place.
+
+        Same rule as :func:`backend.midi_utils._cortar_notas_superpuestas`:
+        after a stable sort by ``(pitch, start)`` a note ends where the next
+        one of its pitch begins if it would otherwise sound over it.
+        """
+
+        if len(self) < 2:
+            return
+        orden = np.lexsort((self.start, self.pitch))
+        previas = orden[:-1]
+        siguientes = orden[1:]
+        inicio_siguiente = self.start[siguientes]
+        cortar = (self.pitch[previas] == self.pitch[siguientes]) & (
+            self.end[previas] > inicio_siguiente
+        )
+        self.end[previas[cortar]] = inicio_siguiente[cortar]
+
+    def clip(self, limit: float) -> "NoteBuffer":
+        """Drop notes starting at or after ``limit`` and end the rest there."""
+
+        buffer = self.take(self.start < limit)
+        np.minimum(buffer.end, limit, out=buffer.end)
+        return buffer
+
+    def quantise(self, tick_scale: float, *, sort: bool = True) -> "NoteBuffer":
+        """Snap the notes to a tick grid of ``tick_scale`` seconds per tick.
+
+        Times are rounded like ``PrettyMIDI.time_to_tick`` for a single tempo
+        and notes that collapse to zero ticks are dropped.  With ``sort`` the
+        notes follow the note-off order of the MIDI reader (end tick, pitch,
+        start tick, velocity); :meth:`reader_order` sorts a buffer that was
+        quantised without it.
+        """
+
+        inicio = np.rint(self.start / tick_scale).astype(_TICKS)
+        fin = np.rint(self.end / tick_scale).astype(_TICKS)
+        validas = fin > inicio
+        buffer = NoteBuffer(
+            self.pitch[validas],
+            inicio[validas],
+            fin[validas],
+            self.velocity[validas],
+            self.chord[validas],
+            tick_scale,
+        )
+        return buffer.reader_order() if sort else buffer
+
+    def reader_order(self) -> "NoteBuffer":
+        return self.take(np.lexsort((self.velocity, self.start, self.pitch, self.end)))
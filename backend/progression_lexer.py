@@ -0,0 +1,143 @@
+"""Single-pass tokenizer for chord progressions.
+
+A progression such as ``"(8)Am7 [C# F] D7/3 | % | /5 G∆"`` is turned into a
+flat list of typed :class:`Token` objects carrying their offsets in the source
+text, so parsers consume tokens instead of re-running string regexes on every
+bar and chord, and editors can map each token back to the characters it came
+from.
+
+The rules reproduce the historical string parsing exactly:
+
+* ``|`` separates bars; bracketed groups never span one.
+* ``[...]`` at the start of a token is an approach marker, even if it
+  contains spaces (``[C# F]``); one that spans a line break is read as a
+  chord name.
+* Any other run of non-space characters is a word.  A word that is exactly
+  ``%`` is a repeat marker.  Otherwise it may start with any number of style
+  tags (``[TRAD]``) and harmonisation markers (``(8)``, ``(10)``, ``(13)``,
+  ``(15)``), followed by the chord and an optional forced inversion
+  (``/1``, ``/3``, ``/5``, ``/7``).  The chord may be empty, in which case an
+  inversion applies to the next chord.
+
+Bars are tokenized once and memoised, since charts repeat the same few bars
+over and over.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+import re
+
+__all__ = [
+    "APPROACH",
+    "BAR",
+    "CHORD",
+    "HARMONISATION",
+    "INVERSION",
+    "REPEAT",
+    "STYLE",
+    "Token",
+    "tokenize",
+    "tokenize_bars",
+]
+
+BAR = "bar"
+APPROACH = "approach"
+REPEAT = "repeat"
+STYLE = "style"
+HARMONISATION = "harmonisation"
+CHORD = "chord"
+INVERSION = "inversion"
+
+ARMONIZACIONES = {
+    "8": "Octavas",
+    "15": "Doble octava",
+    "10": "Décimas",
+    "13": "Treceavas",
+}
+INVERSIONES = {"1": "root", "3": "third", "5": "fifth", "7": "seventh"}
+
+
+class Token(NamedTuple):
+    """One lexical unit of a progression.
+
+    ``valor`` is the chord name, the inversion (``"third"``…), the
+    harmonisation (``"Octavas"``…) or the marker text; ``inicio`` and ``fin``
+    delimit the token in the source (``texto[inicio:fin]``).
+    """
+
+    tipo: str
+    valor: str
+    inicio: int
+    fin: int
+
+
+_LEXER = re.compile(r"(?P<approach>\[[^\]]*\])|(?P<word>\S+)")
+_PALABRA = re.compile(r"((?:\[[A-Z]+\]|\((?:8|10|13|15)\))*)(.*?)(?:/([1357]))?")
+_PREFIJO = re.compile(r"\[[A-Z]+\]|\((8|10|13|15)\)")
+
+
+def _palabra(palabra: str, inicio: int) -> List[Token]:
+    """Split ``palabra`` (found at ``inicio``) into its tokens."""
+
+    if palabra == "%":
+        return [Token(REPEAT, palabra, inicio, inicio + 1)]
+    m = _PALABRA.fullmatch(palabra)
+    tokens = []
+    for prefijo in _PREFIJO.finditer(m.group(1)):
+        codigo = prefijo.group(1)
+        tipo, valor = (STYLE, prefijo.group()) if codigo is None else (HARMONISATION, ARMONIZACIONES[codigo])
+        tokens.append(Token(tipo, valor, inicio + prefijo.start(), inicio + prefijo.end()))
+    if m.group(2):
+        tokens.append(Token(CHORD, m.group(2), inicio + m.start(2), inicio + m.end(2)))
+    if m.group(3):
+        tokens.append(Token(INVERSION, INVERSIONES[m.group(3)], inicio + m.start(3) - 1, inicio + m.end(3)))
+    return tokens
+
+
+@lru_cache(maxsize=4096)
+def _tokens_compas(compas: str) -> Tuple[Token, ...]:
+    """Tokens of one bar, with offsets relative to the start of ``compas``."""
+
+    tokens: List[Token] = []
+    for m in _LEXER.finditer(compas):
+        texto = m.group()
+        if m.lastgroup == "approach" and "\n" not in texto:
+            tokens.append(Token(APPROACH, texto, m.start(), m.end()))
+        elif m.lastgroup == "approach":
+            # Historically a bracket spanning lines was read as a chord name.
+            tokens.append(Token(CHORD, texto, m.start(), m.end()))
+        else:
+            tokens.extend(_palabra(texto, m.start()))
+    return tuple(tokens)
+
+
+def tokenize_bars(texto: str) -> List[Tuple[int, Tuple[Token, ...]]]:
+    """Return ``(offset, tokens)`` for every ``|``-separated bar of ``texto``.
+
+    The offsets of the tokens are relative to the bar, which starts at
+    ``offset`` in ``texto``; bars are tokenized once and shared, so parsers
+    that walk a chart bar by bar allocate nothing for repeated bars.  Empty
+    bars are included with no tokens.
+    """
+
+    compases = []
+    inicio = 0
+    for compas in texto.split("|"):
+        compases.append((inicio, _tokens_compas(compas)))
+        inicio += len(compas) + 1
+    return compases
+
+
+def tokenize(texto: str) -> List[Token]:
+    """Return the tokens of ``texto`` in source order."""
+
+    tokens: List[Token] = []
+    agregar = tokens.append
+    for inicio, piezas in tokenize_bars(texto):
+        if inicio:
+            agregar(Token(BAR, "|", inicio - 1, inicio))
+        for tipo, valor, desde, hasta in piezas:
+            agregar(Token(tipo, valor, inicio + desde, inicio + hasta))
+    return tokens
@@ -1,17 +1,27 @@
 # -*- coding: utf-8 -*-
 # salsa.py
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional, Set, Iterable
+from typing import List, Tuple, Dict, Optional, Set, Iterable, Iterator, Sequence
+import numpy as np
 import pretty_midi
 
 import re
 
-from .voicings import INTERVALOS_TRADICIONALES, parsear_nombre_acorde
-from .midi_utils import (
-    _grid_and_bpm,
-    _cortar_notas_superpuestas,
-    _recortar_notas_a_limite,
-    _siguiente_grupo,
+from .voicings import AcordeParseado, analizar_acorde
+from .midi_common import PATRON_GRUPOS_DEFECTO, PatronGrupos
+from .midi_utils import _grid_and_bpm
+from .instrumentation import active_tracer, stage
+from .note_buffer import NoteBuffer
+from .template_cache import TEMPLATE_CACHE
+from .progression_lexer import (
+    APPROACH,
+    CHORD,
+    HARMONISATION,
+    INVERSION,
+    REPEAT,
+    _tokens_compas,
 )
 
 # ========================
@@ -54,13 +64,25 @@ def _normalizar_nota_tonal(token: str) -> Optional[str]:
     return base + resto
 
 
-def _parsear_cifrado_seguro(cifrado: str) -> Tuple[int, str]:
+_RE_MAJ = re.compile(r"maj", re.IGNORECASE)
+_RE_EXTENSION_FINAL = re.compile(r"(9|11|13)$")
+
+
+@lru_cache(maxsize=1024)
+def _analizar_cifrado_seguro(cifrado: str) -> AcordeParseado:
+    """Como :func:`analizar_acorde` pero tolerando ``maj`` y extensiones finales."""
+
     try:
-        return parsear_nombre_acorde(cifrado)
+        return analizar_acorde(cifrado)
     except ValueError:
-        base = re.sub(r"maj", "∆", cifrado, flags=re.IGNORECASE)
-        base = re.sub(r"(9|11|13)$", "", base)
-        return parsear_nombre_acorde(base)
+        base = _RE_MAJ.sub("∆", cifrado)
+        base = _RE_EXTENSION_FINAL.sub("", base)
+        return analizar_acorde(base)
+
+
+def _parsear_cifrado_seguro(cifrado: str) -> Tuple[int, str]:
+    acorde = _analizar_cifrado_seguro(cifrado)
+    return acorde.raiz, acorde.sufijo
 
 
 def _prefer_flat_names(cifrado: str) -> bool:
@@ -100,9 +122,9 @@ _NOTE_NAME_TO_PC = {
 _NATURAL_PC_BY_LETTER = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
 
 
-def _detalles_intervalos(cifrado: str) -> Tuple[int, List[int]]:
-    root, suf = _parsear_cifrado_seguro(cifrado)
-    return root, INTERVALOS_TRADICIONALES[suf]
+def _detalles_intervalos(cifrado: str) -> Tuple[int, Tuple[int, ...]]:
+    acorde = _analizar_cifrado_seguro(cifrado)
+    return acorde.raiz, acorde.intervalos
 
 
 def _note_name_to_pc(note: str) -> Optional[int]:
@@ -220,35 +242,15 @@ def _preparar_aproximaciones(
 def _pitch_classes_en_acorde(cifrado: str) -> Set[int]:
     """Devuelve las clases de altura del acorde indicado."""
 
-    try:
-        root, suf = parsear_nombre_acorde(cifrado)
-    except ValueError:
-        base = re.sub(r"maj", "∆", cifrado, flags=re.IGNORECASE)
-        base = re.sub(r"(9|11|13)$", "", base)
-        root, suf = parsear_nombre_acorde(base)
-
-    return {(root + interval) % 12 for interval in INTERVALOS_TRADICIONALES[suf]}
+    return set(_analizar_cifrado_seguro(cifrado).clases_altura)
 
 
 def _ajustar_a_estructural_mas_cercano(note_name: str, cifrado: str, pitch: int) -> int:
     """Devuelve la fundamental, tercera o quinta más cercana a ``pitch``."""
 
-    try:
-        root, suf = parsear_nombre_acorde(cifrado)
-    except ValueError:
-        base = re.sub(r"maj", "∆", cifrado, flags=re.IGNORECASE)
-        base = re.sub(r"(9|11|13)$", "", base)
-        root, suf = parsear_nombre_acorde(base)
-    ints = INTERVALOS_TRADICIONALES[suf]
-    octave = int(note_name[-1])
-
-    def midi(interval: int) -> int:
-        return root + interval + 12 * (octave + 1)
-
-    opc1 = midi(0)
-    opc2 = midi(5 if "sus" in suf else ints[1])
-    opc3 = midi(ints[2])
-    candidatos = [opc1, opc2, opc3]
+    acorde = _analizar_cifrado_seguro(cifrado)
+    base = acorde.raiz + 12 * (int(note_name[-1]) + 1)
+    candidatos = [base + interval for interval in acorde.intervalos_estructurales]
     return min(candidatos, key=lambda p: abs(p - pitch))
 
 
@@ -313,13 +315,9 @@ def _ajustar_primera_voz_grave(pitch: int) -> int:
 
 def get_bass_pitch(cifrado: str, inversion: str) -> int:
     """Devuelve la nota MIDI de la voz grave para el acorde e inversión dada."""
-    try:
-        root, suf = parsear_nombre_acorde(cifrado)
-    except ValueError:
-        base = re.sub(r"maj", "∆", cifrado, flags=re.IGNORECASE)
-        base = re.sub(r"(9|11|13)$", "", base)
-        root, suf = parsear_nombre_acorde(base)
-    ints = INTERVALOS_TRADICIONALES[suf]
+    acorde = _analizar_cifrado_seguro(cifrado)
+    root = acorde.raiz
+    ints = acorde.intervalos
     if inversion == "root":
         return root + 12 * 3  # C3 por default
     elif inversion == "third":
@@ -361,6 +359,111 @@ def seleccionar_inversion(
     return mejor[1], mejor[2]
 
 
+# Octavas alrededor de ``get_bass_pitch`` que se exploran para cada inversión.
+_OCTAVAS_CANDIDATAS = (-1, 0, 1)
+
+# El render transporta cada plantilla para que su bajo caiga junto a la altura
+# objetivo, y ``get_bass_pitch`` la sitúa una octava por debajo de la ventana
+# C3–C4 del enlace voraz.  El óptimo busca en ese registro, el que suena.
+_RANGO_RENDER_MIN = RANGO_BAJO_MIN - 12
+_RANGO_RENDER_MAX = RANGO_BAJO_MAX - 12
+
+
+def _fuera_de_rango(pitch: int, offset: int) -> int:
+    """Semitonos que ``pitch`` sobresale del registro grave desplazado ``offset``."""
+
+    if pitch < _RANGO_RENDER_MIN + offset:
+        return _RANGO_RENDER_MIN + offset - pitch
+    if pitch > _RANGO_RENDER_MAX + offset:
+        return pitch - _RANGO_RENDER_MAX - offset
+    return 0
+
+
+def optimizar_inversiones(
+    asignaciones,
+    inversion_inicial: str,
+    offsets: Optional[Sequence[int]] = None,
+    manual_overrides: Optional[Sequence[Optional[str]]] = None,
+) -> Tuple[List[str], List[int]]:
+    """Elige inversiones minimizando el movimiento total de la voz grave.
+
+    A diferencia de :func:`seleccionar_inversion`, que decide acorde por
+    acorde, aquí se evalúan todas las inversiones en varias octavas para cada
+    acorde y se busca (Viterbi) el camino de menor coste en ``O(n·k²)``.  El
+    coste de cada paso es el salto en semitonos más lo que la nota se salga
+    del registro en que se renderiza el bajo (desplazado por ``offsets``), lo
+    que evita que el registro derive en progresiones largas.
+
+    Las inversiones de ``manual_overrides`` se respetan con su altura exacta;
+    las forzadas en el cifrado (``/3``…) y ``inversion_inicial`` para el
+    primer acorde limitan la inversión pero no la octava.  Devuelve las
+    inversiones y las alturas elegidas, que deben pasarse al render como
+    ``bajos_custom`` para que suene la línea optimizada.
+    """
+
+    overrides = list(manual_overrides or [])
+    desplazamientos = list(offsets or [])
+
+    candidatos_por_acorde: List[List[Tuple[str, int, int]]] = []
+    for idx, data in enumerate(asignaciones):
+        cifrado = data[0]
+        inv_forzado = data[3] if len(data) > 3 else None
+        override = overrides[idx] if idx < len(overrides) else None
+        offset = desplazamientos[idx] if idx < len(desplazamientos) else 0
+
+        if override:
+            pitch = get_bass_pitch(cifrado, override) + offset
+            candidatos_por_acorde.append([(override, pitch, 0)])
+            continue
+
+        if inv_forzado:
+            permitidas = [inv_forzado]
+        elif idx == 0:
+            permitidas = [inversion_inicial]
+        else:
+            permitidas = INVERSIONS
+        candidatos = []
+        for inv in permitidas:
+            base = get_bass_pitch(cifrado, inv) + offset
+            for octava in _OCTAVAS_CANDIDATAS:
+                pitch = base + 12 * octava
+                candidatos.append((inv, pitch, _fuera_de_rango(pitch, offset)))
+        candidatos_por_acorde.append(candidatos)
+
+    if not candidatos_por_acorde:
+        return [], []
+
+    costes = [penal for _, _, penal in candidatos_por_acorde[0]]
+    retrocesos: List[List[int]] = []
+    anteriores = candidatos_por_acorde[0]
+    for candidatos in candidatos_por_acorde[1:]:
+        nuevos: List[int] = []
+        punteros: List[int] = []
+        for _, pitch, penal in candidatos:
+            mejor_j = 0
+            mejor = costes[0] + abs(pitch - anteriores[0][1])
+            for j in range(1, len(anteriores)):
+                coste = costes[j] + abs(pitch - anteriores[j][1])
+                if coste < mejor:
+                    mejor, mejor_j = coste, j
+            nuevos.append(mejor + penal)
+            punteros.append(mejor_j)
+        costes = nuevos
+        retrocesos.append(punteros)
+        anteriores = candidatos
+
+    actual = min(range(len(costes)), key=costes.__getitem__)
+    camino = [actual]
+    for punteros in reversed(retrocesos):
+        actual = punteros[actual]
+        camino.append(actual)
+    camino.reverse()
+
+    inversiones = [candidatos_por_acorde[i][k][0] for i, k in enumerate(camino)]
+    alturas = [candidatos_por_acorde[i][k][1] for i, k in enumerate(camino)]
+    return inversiones, alturas
+
+
 # ========================
 # Traducción de notas plantilla → acorde cifrado
 # ========================
@@ -383,8 +486,9 @@ def traducir_nota(
 ) -> Tuple[int, bool]:
     """Traduce ``note_name`` según las reglas del modo salsa."""
 
-    root, suf = _parsear_cifrado_seguro(cifrado)
-    ints = INTERVALOS_TRADICIONALES[suf]
+    acorde = _analizar_cifrado_seguro(cifrado)
+    root, suf = acorde.raiz, acorde.sufijo
+    ints = acorde.intervalos
     approx_cfg: Dict[str, object] = aproximaciones or {}
     approx_tokens = set(APPROACH_NOTES)
     if isinstance(aproximaciones, dict):
@@ -447,66 +551,148 @@ def traducir_nota(
     return midi(interval), es_aprox
 
 
-def _extraer_grupos_con_nombres(
+def _columnas_por_corchea(
     posiciones_base: List[dict], total_cor_ref: int, grid_seg: float
-) -> List[List[dict]]:
-    """Agrupa ``posiciones_base`` por corchea conservando el nombre."""
-
-    grupos_ref: List[List[dict]] = [[] for _ in range(total_cor_ref)]
-    for pos in posiciones_base:
-        idx = int(round(pos["start"] / grid_seg))
-        if 0 <= idx < total_cor_ref:
-            grupos_ref[idx].append(
-                {
-                    "pitch": pos["pitch"],
-                    "start": pos["start"] - idx * grid_seg,
-                    "end": pos["end"] - idx * grid_seg,
-                    "velocity": pos["velocity"],
-                    "name": pos["name"],
-                }
-            )
+) -> Dict[str, object]:
+    """Agrupa ``posiciones_base`` por corchea en columnas conservando el nombre.
 
-    return grupos_ref
-
-
-def _cargar_grupos_por_inversion(
-    plantillas: Dict[str, pretty_midi.PrettyMIDI],
-) -> Tuple[Dict[str, List[List[Dict]]], int, float, float]:
-    """Devuelve notas agrupadas por corchea para cada inversión."""
-
-    grupos_por_inv: Dict[str, List[List[Dict]]] = {}
-    total_cor_ref = None
-    grid = bpm = None
-    for inv, pm in plantillas.items():
-        cor_ref, g, b = _grid_and_bpm(pm)
-        if grid is None:
-            grid = g
-            bpm = b
-            total_cor_ref = cor_ref
-        posiciones_base: List[dict] = []
-        for n in pm.instruments[0].notes:
-            posiciones_base.append(
-                {
-                    "pitch": int(n.pitch),
-                    "start": n.start,
-                    "end": n.end,
-                    "velocity": n.velocity,
-                    "name": pretty_midi.note_number_to_name(int(n.pitch)),
-                }
-            )
-        grupos_por_inv[inv] = _extraer_grupos_con_nombres(
-            posiciones_base, cor_ref, grid
+    Las posiciones quedan ordenadas por corchea (y, dentro de cada una, en el
+    orden de ``posiciones_base``); las de la corchea ``c`` ocupan
+    ``limites[c]:limites[c + 1]`` y sus tiempos son relativos a la corchea.
+    """
+
+    nombres = sorted({pos["name"] for pos in posiciones_base})
+    indice_nombre = {nombre: i for i, nombre in enumerate(nombres)}
+    starts = np.array([pos["start"] for pos in posiciones_base], dtype=np.float64)
+    corcheas = np.rint(starts / grid_seg).astype(np.int64)
+    dentro = np.flatnonzero((corcheas >= 0) & (corcheas < total_cor_ref))
+    orden = dentro[np.argsort(corcheas[dentro], kind="stable")]
+    corcheas = corcheas[orden]
+    elegidas = [posiciones_base[i] for i in orden.tolist()]
+    columnas = {
+        "limites": np.searchsorted(corcheas, np.arange(total_cor_ref + 1)),
+        "alturas": np.array([pos["pitch"] for pos in elegidas], dtype=np.int16),
+        "nombre_idx": np.array([indice_nombre[pos["name"]] for pos in elegidas], dtype=np.int64),
+        "desde": starts[orden] - corcheas * grid_seg,
+        "hasta": np.array([pos["end"] for pos in elegidas], dtype=np.float64) - corcheas * grid_seg,
+        "velocidades": np.array([pos["velocity"] for pos in elegidas], dtype=np.int16),
+    }
+    for columna in columnas.values():
+        columna.setflags(write=False)
+    columnas["nombres"] = tuple(nombres)
+    return columnas
+
+
+@dataclass(frozen=True, eq=False)
+class PlantillaSalsa:
+    """Plantilla de referencia ya agrupada por corchea.
+
+    Las posiciones se guardan en columnas (ver :func:`_columnas_por_corchea`):
+    las de la corchea ``c`` ocupan ``limites[c]:limites[c + 1]`` y
+    ``nombre_idx`` apunta a ``nombres``.  Las instancias se comparten a través
+    de :data:`TEMPLATE_CACHE`, por lo que los arrays son de sólo lectura.
+    """
+
+    limites: np.ndarray
+    alturas: np.ndarray
+    nombre_idx: np.ndarray
+    desde: np.ndarray
+    hasta: np.ndarray
+    velocidades: np.ndarray
+    total_cor: int
+    grid: float
+    bpm: float
+    program: int
+    is_drum: bool
+    instrument_name: str
+    nombres: Tuple[str, ...] = ()
+
+
+def _leer_plantilla_salsa(path: Path) -> PlantillaSalsa:
+    pm = pretty_midi.PrettyMIDI(str(path))
+    cor_ref, grid, bpm = _grid_and_bpm(pm)
+    inst = pm.instruments[0]
+    posiciones_base: List[dict] = []
+    for n in inst.notes:
+        posiciones_base.append(
+            {
+                "pitch": int(n.pitch),
+                "start": n.start,
+                "end": n.end,
+                "velocity": n.velocity,
+                "name": pretty_midi.note_number_to_name(int(n.pitch)),
+            }
         )
-    return grupos_por_inv, total_cor_ref, grid, bpm
+    return PlantillaSalsa(
+        **_columnas_por_corchea(posiciones_base, cor_ref, grid),
+        total_cor=cor_ref,
+        grid=grid,
+        bpm=bpm,
+        program=inst.program,
+        is_drum=inst.is_drum,
+        instrument_name=inst.name,
+    )
+
+
+def cargar_plantilla_salsa(path: Path) -> PlantillaSalsa:
+    """Devuelve la plantilla ``path`` agrupada, usando la caché compartida."""
+
+    return TEMPLATE_CACHE.get(path, _leer_plantilla_salsa, kind="salsa")
+
 
+def _tabla_traduccion(
+    nombres: Iterable[str], cifrado: str, aproximaciones: Dict[str, object]
+) -> Dict[str, Tuple[int, bool]]:
+    """Precalcula :func:`traducir_nota` para cada nota de la plantilla."""
 
-def _indice_para_corchea(cor: int) -> int:
-    idx = 0
-    pos = 0
-    while pos < cor:
-        pos += _siguiente_grupo(idx)
-        idx += 1
-    return idx
+    return {nombre: traducir_nota(nombre, cifrado, aproximaciones) for nombre in nombres}
+
+
+def _indice_para_corchea(cor: int, patron: PatronGrupos = PATRON_GRUPOS_DEFECTO) -> int:
+    return patron.indice_para_corchea(cor)
+
+
+_AcordeCompas = Tuple[str, str, Optional[str], Tuple[str, ...]]
+
+# Índices de corchea ``0, 1, 2…``; crece con la progresión más larga procesada.
+_CORCHEAS: List[int] = []
+
+
+@lru_cache(maxsize=4096)
+def _acordes_compas(
+    compas: str,
+    arm_actual: str,
+    inv_forzado: Optional[str],
+    aproximaciones: Tuple[str, ...],
+) -> Tuple[Tuple[_AcordeCompas, ...], str, Optional[str], Tuple[str, ...]]:
+    """Acordes de un compás según el estado que arrastran los anteriores.
+
+    Devuelve ``(nombre, armonización, inversión, aproximaciones)`` por acorde
+    y el estado con el que empieza el compás siguiente.  Se memoiza porque
+    las progresiones repiten unos pocos compases con el mismo estado.
+    """
+
+    acordes: List[_AcordeCompas] = []
+    fin_acorde = -1
+    for tipo, valor, inicio, fin in _tokens_compas(compas):
+        if tipo == CHORD or tipo == REPEAT:
+            acordes.append((valor, arm_actual, inv_forzado, aproximaciones))
+            inv_forzado = None
+            # Un corchete de varias líneas se lee como acorde, pero una
+            # inversión pegada a él sigue aplicándose al acorde siguiente.
+            fin_acorde = -1 if "\n" in valor else fin
+        elif tipo == INVERSION:
+            if inicio == fin_acorde:
+                # ``Am7/3``: la inversión pertenece al acorde de la palabra.
+                nombre, arm, _, aprox = acordes[-1]
+                acordes[-1] = (nombre, arm, valor, aprox)
+            else:
+                inv_forzado = valor
+        elif tipo == HARMONISATION:
+            arm_actual = valor
+        elif tipo == APPROACH:
+            aproximaciones = tuple(_aproximaciones_desde_marcador(valor))
+    return tuple(acordes), arm_actual, inv_forzado, aproximaciones
 
 
 def procesar_progresion_salsa(
@@ -514,122 +700,70 @@ def procesar_progresion_salsa(
     armonizacion_default: Optional[str] = None,
     *,
     inicio_cor: int = 0,
+    patron: PatronGrupos = PATRON_GRUPOS_DEFECTO,
 ) -> Tuple[List[Tuple[str, List[int], str, Optional[str]]], int, List[List[str]]]:
-    """Procesa la progresión reconociendo extensiones específicas de salsa."""
+    """Procesa la progresión reconociendo extensiones específicas de salsa.
 
-    import re
-
-    segmentos_raw = [s.strip() for s in texto.split("|") if s.strip()]
-
-    # Expand symbol '%' to repeat the previous measure
-    segmentos: List[str] = []
-    for seg in segmentos_raw:
-        if seg == "%":
-            if not segmentos:
-                raise ValueError("% no puede ir en el primer comp\u00e1s")
-            segmentos.append(segmentos[-1])
-        else:
-            segmentos.append(seg)
-
-    num_compases = len(segmentos)
+    ``patron`` es el esquema de agrupación de corcheas de la clave elegida.
+    El texto se recorre compás a compás (separados por ``|`` como en
+    :func:`progression_lexer.tokenize_bars`) y los acordes de cada compás se
+    obtienen de :func:`_acordes_compas`.  Un compás formado sólo por ``%``
+    repite el anterior.
+    """
 
+    compases = texto.split("|")
+    num_compases = 0
     resultado: List[Tuple[str, List[int], str, Optional[str]]] = []
     aproximaciones_por_acorde: List[List[str]] = []
-    indice_patron = _indice_para_corchea(inicio_cor)
+    siguiente_grupo = patron.grupos_desde(_indice_para_corchea(inicio_cor, patron)).__next__
     posicion = 0
     arm_actual = (armonizacion_default or "").capitalize()
     inv_forzado: Optional[str] = None
-    aproximaciones_actuales = list(DEFAULT_APPROACH_NOTES)
-
-    def procesar_token(token: str) -> Tuple[Optional[str], Optional[str]]:
-        """Return ``(chord, inversion)`` parsed from ``token``.
-
-        The global ``arm_actual`` is updated if the token contains a
-        harmonisation marker.  ``inversion`` may be ``None`` if no forced
-        inversion was found.
-        """
-
-        nonlocal arm_actual
-        inversion: Optional[str] = None
-
-        arm_map = {
-            "8": "Octavas",
-            "15": "Doble octava",
-            "10": "D\u00e9cimas",
-            "13": "Treceavas",
-        }
-
-        while True:
-            # Strip optional mode/style token (e.g. ``[TRAD]``)
-            m = re.match(r"^\[[A-Z]+\](.*)$", token)
-            if m:
-                token = m.group(1)
-                if not token:
-                    return None, inversion
-                continue
-
-            m = re.match(r"^\((8|10|13|15)\)(.*)$", token)
-            if m:
-                codigo, token = m.groups()
-                arm_actual = arm_map[codigo]
-                continue
-            break
-
-        m = re.match(r"^(.*)/([1357])$", token)
-        if m:
-            token, codigo = m.groups()
-            inv_map = {"1": "root", "3": "third", "5": "fifth", "7": "seventh"}
-            inversion = inv_map[codigo]
-
-        if not token:
-            return None, inversion
-
-        return token, inversion
-
-    for seg in segmentos:
-        tokens = re.findall(r"\[[^\]]*\]|\S+", seg)
-        acordes: List[Tuple[str, str, Optional[str], List[str]]] = []
-        for tok in tokens:
-            if re.match(r"^\[.*\]$", tok):
-                aproximaciones_actuales = _aproximaciones_desde_marcador(tok)
-                continue
-
-            nombre, inv_local = procesar_token(tok)
-            if nombre is None:
-                if inv_local is not None:
-                    inv_forzado = inv_local
-                continue
-            acordes.append((nombre, arm_actual, inv_local or inv_forzado, list(aproximaciones_actuales)))
-            inv_forzado = None
+    aproximaciones_actuales = tuple(DEFAULT_APPROACH_NOTES)
+    anterior = -1
+    # Cada compás ocupa como mucho dos grupos: las corcheas de los acordes se
+    # cortan de :data:`_CORCHEAS` en lugar de construir un ``range`` por acorde.
+    grupo_maximo = max(patron.primer_bloque + patron.patron_repetido)
+    cota = 2 * grupo_maximo * len(compases)
+    if len(_CORCHEAS) < cota:
+        _CORCHEAS.extend(range(len(_CORCHEAS), cota))
+    corcheas = _CORCHEAS
+
+    # Métodos ligados fuera del bucle: se recorre una vez por compás.
+    agregar = resultado.append
+    agregar_aproximaciones = aproximaciones_por_acorde.append
+    for i, compas in enumerate(compases):
+        # Un compás sin tokens es sólo espacio y uno de un único ``%`` no
+        # contiene nada más; basta mirar el texto.
+        contenido = compas.strip()
+        if not contenido:
+            continue
+        if contenido == "%":
+            if anterior < 0:
+                raise ValueError("% no puede ir en el primer comp\u00e1s")
+            i = anterior
+            compas = compases[i]
+        anterior = i
+        num_compases += 1
+        acordes, arm_actual, inv_forzado, aproximaciones_actuales = _acordes_compas(
+            compas, arm_actual, inv_forzado, aproximaciones_actuales
+        )
         if len(acordes) == 1:
-            g1 = _siguiente_grupo(indice_patron)
-            g2 = _siguiente_grupo(indice_patron + 1)
-            dur = g1 + g2
-            indices = list(range(posicion, posicion + dur))
             nombre, arm, inv, aprox = acordes[0]
-            resultado.append((nombre, indices, arm, inv))
-            aproximaciones_por_acorde.append(aprox)
-            posicion += dur
-            indice_patron += 2
+            fin = posicion + siguiente_grupo() + siguiente_grupo()
+            agregar((nombre, corcheas[posicion:fin], arm, inv))
+            agregar_aproximaciones(list(aprox))
+            posicion = fin
         elif len(acordes) == 2:
-            g1 = _siguiente_grupo(indice_patron)
-            indices1 = list(range(posicion, posicion + g1))
-            posicion += g1
-            indice_patron += 1
-
-            g2 = _siguiente_grupo(indice_patron)
-            indices2 = list(range(posicion, posicion + g2))
-            posicion += g2
-            indice_patron += 1
-
-            (n1, a1, i1, ap1), (n2, a2, i2, ap2) = acordes
-            resultado.append((n1, indices1, a1, i1))
-            resultado.append((n2, indices2, a2, i2))
-            aproximaciones_por_acorde.append(ap1)
-            aproximaciones_por_acorde.append(ap2)
-        elif len(acordes) == 0:
-            continue
-        else:
+            for nombre, arm, inv, aprox in acordes:
+                fin = posicion + siguiente_grupo()
+                agregar((nombre, corcheas[posicion:fin], arm, inv))
+                agregar_aproximaciones(list(aprox))
+                posicion = fin
+        elif acordes:
+            tokens = _tokens_compas(compas)
+            inicio_compas = sum(len(previo) + 1 for previo in compases[:i])
+            seg = texto[inicio_compas + tokens[0].inicio : inicio_compas + tokens[-1].fin]
             raise ValueError("Cada segmento debe contener uno o dos acordes: " f"{seg}")
 
     return resultado, num_compases, aproximaciones_por_acorde
@@ -640,33 +774,49 @@ def procesar_progresion_salsa(
 # ========================
 
 
-def montuno_salsa(
+@dataclass
+class _PlanSalsa:
+    """Datos por acorde que necesita :func:`_lotes_salsa` para traducir.
+
+    Sólo contiene información a nivel de acorde (inversiones, bajos objetivo,
+    plantillas); las notas se generan bajo demanda.
+    """
+
+    asignaciones: List[Tuple[str, List[int], str, Optional[str]]]
+    inversiones: List[str]
+    bajos_objetivo: Dict[int, int]
+    octavas: List[int]
+    aproximaciones: List[Dict[str, object]]
+    plantillas: Dict[str, PlantillaSalsa]
+    plantilla_salida: PlantillaSalsa
+    inicio_cor: int
+    total_dest_cor: int
+    grid: float
+
+
+def _planificar_montuno_salsa(
     progresion_texto: str,
     midi_ref: Path,
-    output: Path,
     inversion_inicial: str = "root",
     *,
     inicio_cor: int = 0,
     inversiones_manual: Optional[List[str]] = None,
-    return_pm: bool = False,
-    variante: str = "A",   # <-- NUEVO parámetro
+    variante: str = "A",
     asignaciones_custom: Optional[List[Tuple[str, List[int], str, Optional[str]]]] = None,
     octavacion_default: Optional[str] = None,
     octavaciones_custom: Optional[List[str]] = None,
     aproximaciones_por_acorde: Optional[List[Optional[List[str]]]] = None,
     register_offsets: Optional[List[int]] = None,
-) -> Optional[pretty_midi.PrettyMIDI]:
-    """Genera montuno estilo salsa enlazando acordes e inversiones.
-
-    ``inversion_inicial`` determina la posición del primer acorde y guía el
-    enlace de los siguientes. ``inicio_cor`` indica la corchea global donde
-    comienza este segmento para que la plantilla se alinee siempre con la
-    progresión completa.
-    """
+    patron: PatronGrupos = PATRON_GRUPOS_DEFECTO,
+    bajos_custom: Optional[Sequence[int]] = None,
+) -> _PlanSalsa:
+    # ``bajos_custom`` fija la altura de la voz grave de cada acorde (por
+    # ejemplo la elegida por :func:`optimizar_inversiones`) en lugar de
+    # derivarla de la inversión.
     # Procesa la progresión. Cada compás puede contener uno o dos acordes
     if asignaciones_custom is None:
         asignaciones, _, aproximaciones_auto = procesar_progresion_salsa(
-            progresion_texto, inicio_cor=inicio_cor
+            progresion_texto, inicio_cor=inicio_cor, patron=patron
         )
     else:
         asignaciones = asignaciones_custom
@@ -727,180 +877,389 @@ def montuno_salsa(
         for idx, (cifrado, _, _, _) in enumerate(asignaciones):
             inv = inversiones[idx]
             octava = _offset_octavacion(octavaciones[idx])
-            base_pitch = get_bass_pitch(cifrado, inv) + octava + _offset_registro(idx)
-            pitch = base_pitch
+            if bajos_custom is not None:
+                pitch = bajos_custom[idx]
+            else:
+                pitch = get_bass_pitch(cifrado, inv) + octava + _offset_registro(idx)
             bajos_objetivo[idx] = pitch
             voz_grave_anterior = pitch
 
-    # Carga los midis de referencia una única vez por inversión y
-    # construye las posiciones repetidas para toda la progresión
-    plantillas: Dict[str, pretty_midi.PrettyMIDI] = {}
+    # Carga los midis de referencia una única vez por inversión
+    plantillas: Dict[str, PlantillaSalsa] = {}
     parts = midi_ref.stem.split("_")
     base = "_".join(parts[:2]) if len(parts) >= 2 else midi_ref.stem
     if len(parts) >= 4:
         variante = parts[-1]
-    plantilla_defecto: Optional[pretty_midi.PrettyMIDI] = None
-    for inv in INVERSIONS:
-        path = midi_ref.parent / f"{base}_{inv}_{variante}.mid"
-        try:
-            plantillas[inv] = pretty_midi.PrettyMIDI(str(path))
-        except FileNotFoundError:
-            if plantilla_defecto is None:
-                plantilla_defecto = pretty_midi.PrettyMIDI(str(midi_ref))
-            plantillas[inv] = plantilla_defecto
+    plantilla_defecto: Optional[PlantillaSalsa] = None
+    with stage("templates") as etapa:
+        cache_antes = TEMPLATE_CACHE.stats() if active_tracer() is not None else None
+        for inv in INVERSIONS:
+            path = midi_ref.parent / f"{base}_{inv}_{variante}.mid"
+            try:
+                plantillas[inv] = cargar_plantilla_salsa(path)
+            except FileNotFoundError:
+                if plantilla_defecto is None:
+                    plantilla_defecto = cargar_plantilla_salsa(midi_ref)
+                plantillas[inv] = plantilla_defecto
+        if cache_antes is not None:
+            cache_despues = TEMPLATE_CACHE.stats()
+            etapa.add(
+                cache_hits=cache_despues.hits - cache_antes.hits,
+                cache_misses=cache_despues.misses - cache_antes.misses,
+            )
 
     # Número real de corcheas en la progresión según el patrón de clave
     total_dest_cor = max(i for _, idxs, _, _ in asignaciones for i in idxs) + 1
+    grid = next(iter(plantillas.values())).grid
+
+    return _PlanSalsa(
+        asignaciones=asignaciones,
+        inversiones=inversiones,
+        bajos_objetivo=bajos_objetivo,
+        octavas=[_offset_octavacion(etiqueta) for etiqueta in octavaciones],
+        aproximaciones=aproximaciones,
+        plantillas=plantillas,
+        plantilla_salida=plantillas[inversion_inicial],
+        inicio_cor=inicio_cor,
+        total_dest_cor=total_dest_cor,
+        grid=grid,
+    )
+
+
+# Acordes que :func:`_lotes_salsa` traduce de una vez al generar por lotes:
+# suficientes para repartir el coste de NumPy y pocos para que el primer
+# bloque llegue pronto.
+ACORDES_POR_LOTE = 32
 
-    grupos_por_inv, total_ref_cor, grid, bpm = _cargar_grupos_por_inversion(plantillas)
-    pm_ref = plantillas[inversion_inicial]
-    offset_ref = 0
-
-    # Mapa corchea -> índice de acorde y límites de cada acorde
-    mapa: Dict[int, int] = {}
-    limites: Dict[int, int] = {}
-    for i, (_, idxs, _, _) in enumerate(asignaciones):
-        for ix in idxs:
-            mapa[ix] = i
-        limites[i] = idxs[-1] + 1
-
-    offset_octava: Dict[int, int] = {}
-    for i, etiqueta in enumerate(octavaciones):
-        offset_octava[i] = _offset_octavacion(etiqueta)
-
-    inv_por_cor: Dict[int, str] = {}
-    for idx, (_, idxs, _, _) in enumerate(asignaciones):
-        for ix in idxs:
-            inv_por_cor[ix] = inversiones[idx]
-
-    mas_grave_por_acorde: Dict[int, int] = {}
-    for idx, (acorde, _, _, _) in enumerate(asignaciones):
-        inv = inversiones[idx]
-        base_min: Optional[int] = None
-        for grupo in grupos_por_inv[inv]:
-            for pos in grupo:
-                pitch, _ = traducir_nota(pos["name"], acorde, aproximaciones[idx])
-                if base_min is None or pitch < base_min:
-                    base_min = pitch
-        mas_grave_por_acorde[idx] = base_min if base_min is not None else 0
-
-    ajuste_por_acorde: Dict[int, int] = {}
-    for idx in range(len(asignaciones)):
-        objetivo = bajos_objetivo.get(idx)
-        base_min = mas_grave_por_acorde.get(idx, 0)
-        octava = offset_octava.get(idx, 0)
+
+@dataclass(frozen=True)
+class _TablaAcorde:
+    """:func:`traducir_nota` precalculado para las notas de una plantilla.
+
+    Las columnas siguen el orden de ``PlantillaSalsa.nombres``; ``deltas`` es
+    el desplazamiento hacia la nota estructural más cercana que se aplica a
+    las aproximaciones de la primera corchea del acorde.
+    """
+
+    alturas: np.ndarray
+    deltas: Tuple[int, ...]
+    clases: Tuple[str, ...]
+    base_min: int
+
+
+def _tabla_acorde(
+    nombres: Sequence[str], cifrado: str, aproximaciones: Dict[str, object]
+) -> _TablaAcorde:
+    tabla = _tabla_traduccion(nombres, cifrado, aproximaciones)
+    alturas = [tabla[nombre][0] for nombre in nombres]
+    deltas = []
+    for nombre, altura in zip(nombres, alturas):
+        delta = 0
+        if CONVERTIR_APROX_A_ESTRUCT and tabla[nombre][1]:
+            delta = _ajustar_a_estructural_mas_cercano(nombre, cifrado=cifrado, pitch=altura) - altura
+        deltas.append(delta)
+    return _TablaAcorde(
+        alturas=np.array(alturas, dtype=np.int64),
+        deltas=tuple(deltas),
+        clases=tuple(nombre[:-1] for nombre in nombres),
+        base_min=min(alturas, default=0),
+    )
+
+
+_TablasCompartidas = Dict[Tuple[str, str, Tuple[str, ...]], _TablaAcorde]
+
+
+def _traducir_acordes(
+    plan: _PlanSalsa, indices: Sequence[int], tablas_compartidas: _TablasCompartidas
+) -> NoteBuffer:
+    """Traduce la plantilla sobre las corcheas de los acordes ``indices``.
+
+    La traducción sólo depende de la nota de la plantilla, el acorde y sus
+    aproximaciones: se calcula una vez por combinación distinta sobre las
+    notas de la plantilla (``tablas_compartidas``) y las posiciones de todos
+    los acordes que usan la misma plantilla se traducen de una vez sobre sus
+    columnas.  La nota más grave de cada acorde se lleva a su bajo objetivo.
+
+    ``indices`` debe ser creciente; las notas se devuelven agrupadas por
+    acorde en ese orden.
+    """
+
+    por_inversion: Dict[str, List[int]] = {}
+    for idx in indices:
+        por_inversion.setdefault(plan.inversiones[idx], []).append(idx)
+    partes = [
+        _traducir_con_plantilla(plan, inv, acordes, tablas_compartidas)
+        for inv, acordes in por_inversion.items()
+    ]
+    if not partes:
+        return NoteBuffer.empty()
+    if len(partes) == 1:
+        return partes[0]
+    notas = NoteBuffer.concat(partes)
+    return notas.take(np.argsort(notas.chord, kind="stable"))
+
+
+def _traducir_con_plantilla(
+    plan: _PlanSalsa,
+    inv: str,
+    acordes: List[int],
+    tablas_compartidas: _TablasCompartidas,
+) -> NoteBuffer:
+    plantilla = plan.plantillas[inv]
+    grid = plan.grid
+
+    # Datos de cada acorde: fila de su tabla, transposición y bajo objetivo.
+    filas: Dict[Tuple[str, str, Tuple[str, ...]], int] = {}
+    tablas: List[_TablaAcorde] = []
+    fila_acorde: List[int] = []
+    transposiciones: List[int] = []
+    objetivos: List[int] = []
+    con_objetivo: List[bool] = []
+    corcheas: List[int] = []
+    corcheas_acorde: List[int] = []
+    for idx in acordes:
+        acorde, idxs, _, _ = plan.asignaciones[idx]
+        aproximaciones = plan.aproximaciones[idx]
+        clave_tabla = (inv, acorde, tuple(aproximaciones["notas"]))
+        tabla = tablas_compartidas.get(clave_tabla)
+        if tabla is None:
+            tabla = _tabla_acorde(plantilla.nombres, acorde, aproximaciones)
+            tablas_compartidas[clave_tabla] = tabla
+        fila = filas.get(clave_tabla)
+        if fila is None:
+            fila = filas[clave_tabla] = len(tablas)
+            tablas.append(tabla)
+        fila_acorde.append(fila)
+
+        octava = plan.octavas[idx] if idx < len(plan.octavas) else 0
+        objetivo = plan.bajos_objetivo.get(idx)
         if objetivo is None:
-            ajuste_por_acorde[idx] = 0
-            continue
-        diff = objetivo - (base_min + octava)
-        ajuste_por_acorde[idx] = 12 * round(diff / 12)
-
-    notas_finales: List[pretty_midi.Note] = []
-    notas_por_acorde: Dict[int, List[pretty_midi.Note]] = {i: [] for i in range(len(asignaciones))}
-    for cor in range(total_dest_cor):
-        inv = inv_por_cor.get(cor)
-        if inv is None:
-            continue
-        idx_acorde = mapa[cor]
-        acorde, _, _, _ = asignaciones[idx_acorde]
-        octava = offset_octava.get(idx_acorde, 0)
-        ajuste = ajuste_por_acorde.get(idx_acorde, 0)
-        grupos_act = grupos_por_inv
-        ref_idx = (inicio_cor + cor + offset_ref) % total_ref_cor
-        traducciones = []
-        comienzo = asignaciones[idx_acorde][1][0]
-        for pos in grupos_act[inv][ref_idx]:
-            pitch_base, es_aprox = traducir_nota(
-                pos["name"], acorde, aproximaciones[idx_acorde]
-            )
-            pitch_ajustado = pitch_base
-            if CONVERTIR_APROX_A_ESTRUCT and es_aprox and cor == comienzo:
-                pitch_ajustado = _ajustar_a_estructural_mas_cercano(
-                    pos["name"], cifrado=acorde, pitch=pitch_base
-                )
-            traducciones.append(
-                {
-                    "pos": pos,
-                    "pitch_base": pitch_base,
-                    "pitch_ajustado": pitch_ajustado,
-                    "pc": pos["name"][:-1],
-                }
-            )
+            ajuste = 0
+        else:
+            ajuste = 12 * round((objetivo - (tabla.base_min + octava)) / 12)
+        transposiciones.append(octava + ajuste)
+        objetivos.append(0 if objetivo is None else objetivo)
+        con_objetivo.append(objetivo is not None)
+        corcheas.extend(idxs)
+        corcheas_acorde.append(len(idxs))
+
+    # Posiciones de la plantilla para cada corchea, en orden de acorde.
+    total_ref_cor = plan.plantillas[INVERSIONS[0]].total_cor
+    cor = np.array(corcheas, dtype=np.int64)
+    por_acorde = np.array(corcheas_acorde, dtype=np.int64)
+    refs = (plan.inicio_cor + cor) % total_ref_cor
+    desde_ref = plantilla.limites[refs]
+    cuantas = plantilla.limites[refs + 1] - desde_ref
+    inicio_cor = np.cumsum(cuantas) - cuantas
+    posiciones = np.arange(int(cuantas.sum())) + np.repeat(desde_ref - inicio_cor, cuantas)
+    local = np.repeat(np.repeat(np.arange(len(acordes)), por_acorde), cuantas)
+    nombres = plantilla.nombre_idx[posiciones]
+    alturas = np.stack([tabla.alturas for tabla in tablas])[
+        np.array(fila_acorde, dtype=np.int64)[local], nombres
+    ]
 
+    # Las aproximaciones de la primera corchea de cada acorde se llevan a la
+    # nota estructural más cercana; todas las notas de una misma clase se
+    # mueven con la primera que cambia.
+    primera_cor = (np.cumsum(por_acorde) - por_acorde).tolist()
+    desde_primera = inicio_cor[primera_cor].tolist()
+    hasta_primera = (inicio_cor + cuantas)[primera_cor].tolist()
+    for fila, desde, hasta in zip(fila_acorde, desde_primera, hasta_primera):
+        tabla = tablas[fila]
+        primeras = nombres[desde:hasta].tolist()
         deltas_por_pc: Dict[str, int] = {}
-        for trad in traducciones:
-            delta = trad["pitch_ajustado"] - trad["pitch_base"]
-            pc = trad["pc"]
+        for nombre in primeras:
+            delta = tabla.deltas[nombre]
+            pc = tabla.clases[nombre]
             if pc not in deltas_por_pc or (deltas_por_pc[pc] == 0 and delta != 0):
                 deltas_por_pc[pc] = delta
+        if any(deltas_por_pc.values()):
+            alturas[desde:hasta] += [deltas_por_pc[tabla.clases[nombre]] for nombre in primeras]
+
+    # Las notas no pasan de la última corchea de su acorde.
+    ultima_cor = cor[np.cumsum(por_acorde) - 1]
+    fin_limite = ((ultima_cor + 1) * grid)[local]
+    base = np.repeat(cor, cuantas) * grid
+    inicio = base + plantilla.desde[posiciones]
+    fin = np.minimum(base + plantilla.hasta[posiciones], fin_limite)
+    validas = fin > inicio
+    local = local[validas]
+    pitch = alturas[validas] + np.array(transposiciones, dtype=np.int64)[local]
+
+    # Nota audible más grave de cada acorde (la primera si hay empate).
+    candidatas = np.flatnonzero((pitch > 0) & np.array(con_objetivo)[local])
+    if len(candidatas):
+        orden = np.lexsort((candidatas, pitch[candidatas], local[candidatas]))
+        grupos = local[candidatas][orden]
+        primeras_idx = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+        bajos = candidatas[orden[primeras_idx]]
+        pitch[bajos] = np.array(objetivos, dtype=np.int64)[local[bajos]]
+
+    return NoteBuffer(
+        pitch.astype(np.int16),
+        inicio[validas],
+        fin[validas],
+        plantilla.velocidades[posiciones][validas],
+        np.array(acordes, dtype=np.int32)[local],
+    )
 
-        for trad in traducciones:
-            pos = trad["pos"]
-            delta = deltas_por_pc.get(trad["pc"], 0)
-            pitch = trad["pitch_base"] + delta
-
-            inicio = cor * grid + pos["start"]
-            fin = cor * grid + pos["end"]
-            fin_limite = limites[idx_acorde] * grid
-            end = min(fin, fin_limite)
-            if end <= inicio:
-                continue
-            note_obj = pretty_midi.Note(
-                velocity=pos["velocity"],
-                pitch=pitch + octava + ajuste,
-                start=inicio,
-                end=end,
-            )
-            notas_finales.append(note_obj)
-            notas_por_acorde[idx_acorde].append(note_obj)
 
-    for idx, objetivo in bajos_objetivo.items():
-        notas = [n for n in notas_por_acorde.get(idx, []) if n.pitch > 0]
-        if not notas:
-            continue
-        nota_grave = min(notas, key=lambda n: n.pitch)
-        nota_grave.pitch = objetivo
+def _traducir_acorde(
+    plan: _PlanSalsa, idx: int, tablas_compartidas: _TablasCompartidas
+) -> NoteBuffer:
+    """Traduce sólo el acorde ``idx`` (ver :func:`_traducir_acordes`)."""
 
-    # ------------------------------------------------------------------
-    # Ajuste final de duración y bpm igual que en el modo tradicional
-    # ------------------------------------------------------------------
-    limite = total_dest_cor * grid
-    notas_finales = _cortar_notas_superpuestas(notas_finales)
-    notas_finales = _recortar_notas_a_limite(notas_finales, limite)
-    if limite > 0:
-        has_start = any(n.start <= 0 < n.end and n.pitch > 0 for n in notas_finales)
-        has_end = any(
-            n.pitch > 0 and n.start < limite and n.end > limite - grid for n in notas_finales
-        )
-        if not has_start:
-            notas_finales.append(
-                pretty_midi.Note(
-                    velocity=1,
-                    pitch=0,
-                    start=0.0,
-                    end=min(grid, limite),
-                )
-            )
-        if not has_end:
-            notas_finales.append(
-                pretty_midi.Note(
-                    velocity=1,
-                    pitch=0,
-                    start=max(0.0, limite - grid),
-                    end=limite,
-                )
-            )
+    return _traducir_acordes(plan, [idx], tablas_compartidas)
 
-    pm_out = pretty_midi.PrettyMIDI()
-    inst = pretty_midi.Instrument(
-        program=pm_ref.instruments[0].program,
-        is_drum=pm_ref.instruments[0].is_drum,
-        name=pm_ref.instruments[0].name,
+
+def _ordenar_lote(notas: NoteBuffer, limite: float) -> NoteBuffer:
+    """Recorta ``notas`` a ``limite`` y las ordena por acorde, inicio y altura."""
+
+    notas = notas.clip(limite)
+    return notas.take(np.lexsort((notas.pitch, notas.start, notas.chord)))
+
+
+def _lotes_salsa(
+    plan: _PlanSalsa, acordes_por_lote: Optional[int] = None
+) -> Iterator[Tuple[range, NoteBuffer]]:
+    """Genera ``(acordes, notas)`` traduciendo ``acordes_por_lote`` acordes a la vez.
+
+    Las notas de un acorde terminan en su última corchea y las del siguiente
+    empiezan como mucho media corchea antes, así que el recorte de notas
+    superpuestas sólo necesita retener el último acorde de cada lote hasta
+    traducir el siguiente, con el mismo resultado que recortar la progresión
+    entera de una vez.  Sin ``acordes_por_lote`` se traduce todo en un lote.
+    """
+
+    total = len(plan.asignaciones)
+    paso = max(1, acordes_por_lote or total)
+    limite = plan.total_dest_cor * plan.grid
+    tablas_compartidas: _TablasCompartidas = {}
+    pendiente: Optional[NoteBuffer] = None
+    for desde in range(0, total, paso):
+        acordes = range(desde, min(total, desde + paso))
+        with stage("translate") as etapa:
+            notas = _traducir_acordes(plan, acordes, tablas_compartidas)
+            etapa.add(chords=len(acordes), notes=len(notas))
+        with stage("trim"):
+            if pendiente is not None:
+                notas = NoteBuffer.concat([pendiente, notas])
+            notas.cut_overlaps()
+            if acordes.stop < total:
+                ultimo = notas.chord == acordes[-1]
+                pendiente = notas.take(ultimo)
+                notas = notas.take(~ultimo)
+                listos = range(acordes.start - (desde > 0), acordes[-1])
+            else:
+                listos = range(acordes.start - (desde > 0), acordes.stop)
+            listo = _ordenar_lote(notas, limite)
+        yield listos, listo
+
+
+def _bloque_recortado(plan: _PlanSalsa, crudos: Sequence[NoteBuffer], idx: int) -> NoteBuffer:
+    """Recorta una copia del bloque ``idx`` frente a sus vecinos.
+
+    ``crudos`` son los bloques tal como los devuelve :func:`_traducir_acorde`.
+    El resultado coincide con las notas de ese acorde en :func:`_lotes_salsa` y
+    los bloques originales no se modifican.
+    """
+
+    vecinos = [v for v in (idx - 1, idx, idx + 1) if 0 <= v < len(crudos)]
+    copias = NoteBuffer.concat([crudos[v] for v in vecinos])
+    copias.cut_overlaps()
+    desde = len(crudos[idx - 1]) if idx > 0 else 0
+    propias = copias.take(slice(desde, desde + len(crudos[idx])))
+    return _ordenar_lote(propias, plan.total_dest_cor * plan.grid)
+
+
+def montuno_salsa(
+    progresion_texto: str,
+    midi_ref: Path,
+    output: Path,
+    inversion_inicial: str = "root",
+    *,
+    inicio_cor: int = 0,
+    inversiones_manual: Optional[List[str]] = None,
+    return_pm: bool = False,
+    variante: str = "A",   # <-- NUEVO parámetro
+    asignaciones_custom: Optional[List[Tuple[str, List[int], str, Optional[str]]]] = None,
+    octavacion_default: Optional[str] = None,
+    octavaciones_custom: Optional[List[str]] = None,
+    aproximaciones_por_acorde: Optional[List[Optional[List[str]]]] = None,
+    register_offsets: Optional[List[int]] = None,
+    patron: PatronGrupos = PATRON_GRUPOS_DEFECTO,
+) -> Optional[pretty_midi.PrettyMIDI]:
+    """Genera montuno estilo salsa enlazando acordes e inversiones.
+
+    ``inversion_inicial`` determina la posición del primer acorde y guía el
+    enlace de los siguientes. ``inicio_cor`` indica la corchea global donde
+    comienza este segmento para que la plantilla se alinee siempre con la
+    progresión completa.  ``patron`` es la agrupación de corcheas de la clave
+    usada al procesar ``progresion_texto``.
+    """
+    plan = _planificar_montuno_salsa(
+        progresion_texto,
+        midi_ref,
+        inversion_inicial,
+        inicio_cor=inicio_cor,
+        inversiones_manual=inversiones_manual,
+        variante=variante,
+        asignaciones_custom=asignaciones_custom,
+        octavacion_default=octavacion_default,
+        octavaciones_custom=octavaciones_custom,
+        aproximaciones_por_acorde=aproximaciones_por_acorde,
+        register_offsets=register_offsets,
+        patron=patron,
     )
-    inst.notes = notas_finales
-    pm_out.instruments.append(inst)
+    pm_out = _montar_salida(plan, [lote for _, lote in _lotes_salsa(plan)])
 
     if return_pm:
         return pm_out
 
     pm_out.write(str(output))
+
+
+def _montar_salida(plan: _PlanSalsa, bloques: Sequence[NoteBuffer]) -> pretty_midi.PrettyMIDI:
+    """Ordena los bloques ya recortados y los envuelve en un ``PrettyMIDI``."""
+
+    # Un acorde puede empezar media corchea antes de que termine el anterior.
+    notas = NoteBuffer.concat(bloques).sort_by_start()
+    notas = NoteBuffer.concat([notas, _notas_de_relleno(plan, notas)])
+
+    pm_ref = plan.plantilla_salida
+    pm_out = pretty_midi.PrettyMIDI()
+    inst = pretty_midi.Instrument(
+        program=pm_ref.program,
+        is_drum=pm_ref.is_drum,
+        name=pm_ref.instrument_name,
+    )
+    inst.notes = notas.to_notes()
+    pm_out.instruments.append(inst)
+    return pm_out
+
+
+def _notas_de_relleno(plan: _PlanSalsa, notas: NoteBuffer) -> NoteBuffer:
+    """Notas silenciosas que marcan el principio y el final de la progresión.
+
+    Sólo se añaden si ninguna nota audible suena en la primera o en la última
+    corchea, para que la duración total se conserve al escribir el MIDI.
+    """
+
+    # ------------------------------------------------------------------
+    # Ajuste final de duración y bpm igual que en el modo tradicional
+    # ------------------------------------------------------------------
+    grid = plan.grid
+    limite = plan.total_dest_cor * grid
+    inicios: List[float] = []
+    finales: List[float] = []
+    if limite > 0:
+        audibles = notas.pitch > 0
+        has_start = np.any(audibles & (notas.start <= 0) & (notas.end > 0))
+        has_end = np.any(audibles & (notas.start < limite) & (notas.end > limite - grid))
+        if not has_start:
+            inicios.append(0.0)
+            finales.append(min(grid, limite))
+        if not has_end:
+            inicios.append(max(0.0, limite - grid))
+            finales.append(limite)
+    return NoteBuffer.from_columns([0] * len(inicios), inicios, finales, [1] * len(inicios))
@@ -0,0 +1,122 @@
+"""Process-wide cache for parsed reference MIDI templates.
+
+Parsing a reference loop with ``pretty_midi`` and regrouping its notes per
+eighth is far more expensive than the rest of a render.  The helpers here keep
+the processed result of each template in memory so a long-running process
+(render server, desktop session, Pyodide worker) pays that cost once per file.
+
+Entries are identified by the resolved path plus the ``(mtime, size)``
+signature of the file, so editing a template on disk transparently triggers a
+reload.  Cached values are shared between callers and must be treated as
+read-only.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Tuple, TypeVar, Union
+import os
+import threading
+
+__all__ = ["CacheStats", "TemplateCache", "TEMPLATE_CACHE"]
+
+T = TypeVar("T")
+
+PathLike = Union[str, Path]
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Snapshot of the counters kept by :class:`TemplateCache`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class TemplateCache:
+    """Bounded LRU cache of processed templates keyed by path and signature."""
+
+    def __init__(self, maxsize: int = 64) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize debe ser mayor que cero")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Tuple[int, int], object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _firma(path: Path) -> Tuple[int, int]:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, path: PathLike, loader: Callable[[Path], T], *, kind: str = "") -> T:
+        """Return ``loader(path)`` reusing the cached value when still valid.
+
+        ``kind`` separates different processed views of the same file (for
+        example salsa groups and traditional positions).  ``FileNotFoundError``
+        is propagated unchanged when ``path`` does not exist.
+        """
+
+        ruta = Path(path).resolve()
+        firma = self._firma(ruta)
+        clave = (kind, str(ruta))
+        with self._lock:
+            entrada = self._entries.get(clave)
+            if entrada is not None and entrada[0] == firma:
+                self._entries.move_to_end(clave)
+                self._hits += 1
+                return entrada[1]  # type: ignore[return-value]
+            self._misses += 1
+
+        valor = loader(ruta)
+
+        with self._lock:
+            self._entries[clave] = (firma, valor)
+            self._entries.move_to_end(clave)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return valor
+
+    def invalidate(self, path: Optional[PathLike] = None) -> int:
+        """Drop the entries for ``path`` (or every entry) and return how many."""
+
+        with self._lock:
+            if path is None:
+                eliminadas = len(self._entries)
+                self._entries.clear()
+                return eliminadas
+            ruta = str(Path(path).resolve())
+            claves = [clave for clave in self._entries if clave[1] == ruta]
+            for clave in claves:
+                del self._entries[clave]
+            return len(claves)
+
+    def stats(self) -> CacheStats:
+        """Return the current hit/miss/eviction counters."""
+
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+            )
+
+    def reset_stats(self) -> None:
+        """Zero the counters without touching the cached entries."""
+
+        with self._lock:
+            self._hits = self._misses = self._evictions = 0
+
+
+# Shared instance used by the engines.
+TEMPLATE_CACHE = TemplateCache()
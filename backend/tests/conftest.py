@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import pytest
+
+from backend.montuno_core import CLAVES, generate_montuno
+
+REFERENCE_ROOT = Path(__file__).resolve().parent.parent / "reference_midi_loops"
+PROGRESION = "Am7 D7 | G∆ | C7 | F#m7(b5) B7 | Em | % | A7 | Dm7 G7"
+
+
+@pytest.fixture
+def reference_root():
+    return REFERENCE_ROOT
+
+
+@pytest.fixture
+def progresion():
+    return PROGRESION
+
+
+@pytest.fixture
+def opciones(reference_root):
+    """Argumentos por defecto de ``generate_montuno`` para las pruebas."""
+    return dict(
+        clave_config=CLAVES["Clave 2-3"],
+        variacion="A",
+        inversion="root",
+        reference_root=reference_root,
+    )
+
+
+@pytest.fixture
+def generar(progresion, opciones):
+    """Genera un montuno con las opciones por defecto; ``kwargs`` las sustituyen."""
+
+    def _generar(texto=None, **kwargs):
+        return generate_montuno(progresion if texto is None else texto, **{**opciones, **kwargs})
+
+    return _generar
@@ -0,0 +1,69 @@
+from backend import midi_render, midi_utils_tradicional, salsa, voicings, voicings_tradicional
+
+
+def test_registro_de_acorde_se_reutiliza():
+    primero = voicings.analizar_acorde("F#m7(b5)")
+    assert primero is voicings.analizar_acorde("F#m7(b5)")
+    assert (primero.raiz, primero.sufijo) == (6, "m7(b5)")
+    assert primero.intervalos == (0, 3, 6, 10)
+    assert primero.clases_altura == frozenset({6, 9, 0, 4})
+    assert voicings.parsear_nombre_acorde("F#m7(b5)") == (6, "m7(b5)")
+
+
+def test_intervalos_estructurales_de_sus():
+    acorde = voicings.analizar_acorde("G7sus4")
+    assert acorde.intervalos_estructurales == (0, 5, 7)
+
+
+def test_tabla_extendida_tradicional():
+    acorde = voicings_tradicional.analizar_acorde("C∆9")
+    assert acorde.sufijo == "∆9"
+    assert acorde.intervalos == tuple(voicings_tradicional.INTERVALOS_TRADICIONALES["∆9"])
+
+
+def test_cifrado_seguro_acepta_extensiones_y_maj():
+    assert salsa._parsear_cifrado_seguro("C9") == (0, "∆")
+    assert salsa._parsear_cifrado_seguro("Dmaj") == (2, "∆")
+
+
+def test_tabla_de_traduccion_coincide_con_traducir_nota(reference_root):
+    plantilla = salsa.cargar_plantilla_salsa(reference_root / "salsa_2-3_root_A.mid")
+    assert set(plantilla.nombres) == {plantilla.nombres[i] for i in plantilla.nombre_idx.tolist()}
+
+    aprox = salsa._preparar_aproximaciones([["C#", "F", "G#", "B"]], 1)[0]
+    tabla = salsa._tabla_traduccion(plantilla.nombres, "Bb7(b9)", aprox)
+    for nombre in plantilla.nombres:
+        assert tabla[nombre] == salsa.traducir_nota(nombre, "Bb7(b9)", aprox)
+
+
+def test_tabla_de_armonizacion_por_voz_del_voicing():
+    estilo = midi_utils_tradicional.ESTILO
+    datos = midi_render._info_acorde("C∆", estilo)
+    voicing = [64, 55, 60, 59]  # G3 B3 C4 E4 una vez ordenado
+
+    def tabla(arm, offset=0):
+        return midi_render._tabla_armonizacion(voicing, arm, datos, estilo, offset)
+
+    assert tabla("") == ((55,), (59,), (60,), (64,))
+    assert tabla("octavas") == ((55, 67), (59, 71), (60, 72), (64, 76))
+    assert tabla("doble octava") == ((43, 67), (47, 71), (48, 72), (52, 76))
+    # Décimas diatónicas de C∆: G-B, B-D, C-E, E-G.
+    assert tabla("décimas") == ((55, 71), (59, 74), (60, 76), (64, 79))
+    assert tabla("treceavas") == ((67, 47), (71, 50), (72, 52), (76, 55))
+    assert tabla("décimas", 12) == tuple(
+        tuple(p + 12 for p in fila) for fila in tabla("décimas")
+    )
+
+
+def test_voicings_enlazados_reutilizan_las_transiciones(caplog):
+    progresion = ["Am7", "D7", "G∆", "C∆/3", "Am7", "D7", "G∆", "C∆/3"]
+    voicings_tradicional._voicing_enlazado.cache_clear()
+    voicings = voicings_tradicional.generar_voicings_enlazados_tradicional(progresion)
+    assert voicings[1:4] == voicings[5:8]
+    assert voicings_tradicional._voicing_enlazado.cache_info().hits >= 2
+    voicings[0].append(99)
+    assert voicings_tradicional.generar_voicings_enlazados_tradicional(progresion)[0] != voicings[0]
+
+    with caplog.at_level("DEBUG", logger=voicings_tradicional.logger.name):
+        voicings_tradicional.generar_voicings_enlazados_tradicional(["C∆/3"])
+    assert "Voicing C∆ (∆): E3" in caplog.text
@@ -0,0 +1,54 @@
+from backend.montuno_core import CLAVES, MontunoJob, batch, generate_many, iter_generate_many
+
+
+def _notas(result):
+    return [(n.start, n.end, n.pitch, n.velocity) for n in result.midi.instruments[0].notes]
+
+
+def _trabajos(reference_root):
+    trabajos = []
+    for clave in ("Clave 2-3", "Clave 3-2"):
+        for variacion in "AB":
+            trabajos.append(
+                MontunoJob(
+                    "Am7 D7 | G∆ | C7 | F#m7(b5) B7",
+                    CLAVES[clave],
+                    reference_root,
+                    {"variacion": variacion, "inversion": "root", "seed": 3},
+                )
+            )
+    vacio = MontunoJob("", CLAVES["Clave 2-3"], reference_root, {"variacion": "A", "inversion": "root"})
+    trabajos.insert(2, vacio)
+    return trabajos
+
+
+def test_resultados_en_orden_y_errores_por_trabajo(reference_root):
+    trabajos = _trabajos(reference_root)
+    resultados = generate_many(trabajos, workers=2)
+    en_serie = generate_many(list(reversed(trabajos)), workers=1)[::-1]
+
+    assert [r.index for r in resultados] == list(range(len(trabajos)))
+    assert not resultados[2].ok and isinstance(resultados[2].error, ValueError)
+    for salida, esperado, trabajo in zip(resultados, en_serie, trabajos):
+        if trabajo.progression_text:
+            assert salida.ok
+            assert _notas(salida.result) == _notas(esperado.result)
+
+
+def test_cerrar_el_generador_no_espera_al_lote(monkeypatch, reference_root):
+    enviados = []
+
+    class Pool(batch.ProcessPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            future = super().submit(fn, *args, **kwargs)
+            enviados.append(future)
+            return future
+
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", Pool)
+    trabajos = _trabajos(reference_root)[:2] * 10
+    salidas = iter_generate_many(trabajos, workers=2)
+    assert next(salidas).ok
+    salidas.close()
+
+    assert len(enviados) <= batch._EN_VUELO * 2 + 1
+    assert all(f.done() for f in enviados)
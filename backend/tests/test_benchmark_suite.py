@@ -0,0 +1,26 @@
+from backend.benchmarks import suite
+
+
+def test_suite_minima_y_comparacion():
+    resultados = suite.run(
+        casos=["generate_montuno", "procesar_progresion_salsa"],
+        bars=[8],
+        claves=["Clave 2-3"],
+        variaciones=["A"],
+        repeat=1,
+    )
+    datos = suite.a_json(resultados)
+
+    assert len(datos["results"]) == 2
+    for medicion in datos["results"].values():
+        assert medicion["median_ms"] > 0 and medicion["p95_ms"] >= medicion["median_ms"]
+        assert medicion["alloc_peak_kib"] > 0
+
+    lento = {"results": {k: dict(v, median_ms=v["median_ms"] * 2) for k, v in datos["results"].items()}}
+    assert suite.comparar(datos, datos, 0.1) == []
+    assert len(suite.comparar(lento, datos, 0.1)) == 2
+
+
+def test_variaciones_de_las_plantillas():
+    assert suite.variaciones_disponibles("salsa_3-2") == ["A", "B", "C", "D"]
+    assert suite.variaciones_disponibles("tradicional_2-3") == ["A", "B", "C", "D"]
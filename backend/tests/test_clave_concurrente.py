@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import midi_utils, salsa
+from backend.montuno_core import CLAVES
+
+
+def test_patron_explicito_no_depende_del_estado_global(progresion):
+    patron = CLAVES["Clave 3-2"].patron_grupos
+    asignaciones, _, _ = salsa.procesar_progresion_salsa(progresion, patron=patron)
+    assert [len(idxs) for _, idxs, _, _ in asignaciones[:3]] == [3, 3, 9]
+    assert midi_utils.PRIMER_BLOQUE == [3, 4, 4, 3]
+
+
+def test_claves_distintas_en_hilos_concurrentes(generar):
+    def _render(clave):
+        result = generar(clave_config=CLAVES[clave])
+        notas = [(n.start, n.end, n.pitch, n.velocity) for n in result.midi.instruments[0].notes]
+        return result.max_eighths, notas
+
+    esperado = {clave: _render(clave) for clave in CLAVES}
+    assert esperado["Clave 2-3"] != esperado["Clave 3-2"]
+
+    claves = list(CLAVES) * 16
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        resultados = list(pool.map(_render, claves))
+
+    for clave, resultado in zip(claves, resultados):
+        assert resultado == esperado[clave]
+
+
+def _indice_lineal(patron, cor):
+    idx = pos = 0
+    while pos < cor:
+        pos += patron.grupo(idx)
+        idx += 1
+    return idx
+
+
+def test_indice_para_corchea_equivale_al_recorrido():
+    for config in CLAVES.values():
+        patron = config.patron_grupos
+        for cor in list(range(0, 400)) + [10**5, 10**5 + 1]:
+            assert patron.indice_para_corchea(cor) == _indice_lineal(patron, cor)
+
+
+def test_grupos_desde_equivale_a_grupo():
+    for config in CLAVES.values():
+        patron = config.patron_grupos
+        for inicio in range(0, 40):
+            grupos = patron.grupos_desde(inicio)
+            assert [next(grupos) for _ in range(60)] == [patron.grupo(inicio + i) for i in range(60)]
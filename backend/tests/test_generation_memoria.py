@@ -0,0 +1,45 @@
+import pretty_midi
+
+from backend import salsa
+from backend.montuno_core.generation import _write_tick_scale
+from backend.note_buffer import NoteBuffer
+
+
+def _notas(notes):
+    return [(n.start, n.end, n.pitch, n.velocity) for n in notes]
+
+
+def test_cuantizacion_equivale_a_ida_y_vuelta_midi(tmp_path, reference_root, progresion):
+    asignaciones, _, aproximaciones = salsa.procesar_progresion_salsa(progresion)
+    pm = salsa.montuno_salsa(
+        "",
+        reference_root / "salsa_2-3_third_B.mid",
+        None,
+        "third",
+        asignaciones_custom=asignaciones,
+        aproximaciones_por_acorde=aproximaciones,
+        return_pm=True,
+    )
+
+    path = tmp_path / "segment_0.mid"
+    pm.write(str(path))
+    releido = pretty_midi.PrettyMIDI(str(path))
+
+    esperado = _notas(releido.instruments[0].notes)
+    cuantizado = NoteBuffer.from_notes(pm.instruments[0].notes).quantise(
+        _write_tick_scale(pm.resolution)
+    )
+    obtenido = _notas(cuantizado.to_notes())
+    assert obtenido == esperado
+
+
+def test_generate_montuno_no_escribe_en_disco(monkeypatch, generar):
+    def fallar(*_args, **_kwargs):
+        raise AssertionError("generate_montuno no debe usar archivos temporales")
+
+    monkeypatch.setattr(pretty_midi.PrettyMIDI, "write", fallar)
+
+    result = generar(seed=1)
+
+    assert result.max_eighths == 62
+    assert result.midi.instruments[0].notes
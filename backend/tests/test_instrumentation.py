@@ -0,0 +1,36 @@
+from backend.instrumentation import Tracer, active_tracer, stage, tracing
+
+
+def test_sin_trace_no_hay_tiempos(generar):
+    assert generar().timings is None
+    assert active_tracer() is None
+
+
+def test_trace_registra_las_etapas(generar):
+    resultado = generar(trace=True)
+    tiempos = resultado.timings
+    for etapa in ("parse", "inversions", "templates", "translate", "trim", "render", "quantise"):
+        assert etapa in tiempos, etapa
+        assert tiempos[etapa]["ms"] >= 0
+        assert tiempos[etapa]["calls"] >= 1
+    assert tiempos["parse"]["chords"] == 11
+    assert tiempos["quantise"]["notes"] == len(resultado.midi.instruments[0].notes)
+
+
+def test_tracer_externo_recibe_las_etapas_anidadas(generar):
+    vistos = []
+    with tracing(callback=lambda nombre, _s, _c: vistos.append(nombre)) as tracer:
+        resultado = generar(trace=True)
+        with stage("encode") as etapa:
+            etapa.add(bytes=10)
+    assert set(resultado.timings) <= set(tracer.stages)
+    assert tracer.as_dict()["encode"] == {"ms": tracer.as_dict()["encode"]["ms"], "calls": 1, "bytes": 10}
+    assert "render" in vistos and vistos[-1] == "encode"
+
+
+def test_stage_inactivo_es_un_no_op():
+    tracer = Tracer()
+    with stage("nada") as etapa:
+        etapa.add(notes=3)
+    assert tracer.stages == {}
+    assert stage("a") is stage("b")
@@ -0,0 +1,43 @@
+import pytest
+
+from backend.montuno_core import CLAVES, generate_montuno, iter_montuno
+
+
+def _notas(notes):
+    return sorted((n.start, n.end, n.pitch, n.velocity) for n in notes)
+
+
+@pytest.mark.parametrize("clave", ["Clave 2-3", "Clave 3-2"])
+@pytest.mark.parametrize("variacion", ["A", "B", "C"])
+def test_iter_montuno_equivale_a_generate_montuno(clave, variacion, progresion, opciones):
+    kwargs = dict(
+        opciones,
+        clave_config=CLAVES[clave],
+        variacion=variacion,
+        octavas_por_indice=["Original", "Octava abajo"],
+        register_offsets=[0, 0, 1],
+    )
+    completo = generate_montuno(progresion, **kwargs)
+    bloques = list(iter_montuno(progresion, **kwargs))
+
+    assert [b.index for b in bloques] == list(range(len(bloques)))
+    assert bloques[0].chord == "Am7"
+    for anterior, siguiente in zip(bloques, bloques[1:]):
+        assert anterior.end_eighth <= siguiente.start_eighth
+    assert bloques[-1].end_eighth == completo.max_eighths
+
+    notas = [n for b in bloques for n in b.notes]
+    assert _notas(notas) == _notas(completo.midi.instruments[0].notes)
+
+
+def test_iter_montuno_es_perezoso(opciones):
+    texto = " | ".join(["Am7 D7", "G∆", "C7", "F#m7(b5) B7"] * 250)
+    bloques = iter_montuno(texto, **opciones)
+    primero = next(bloques)
+    assert primero.index == 0 and primero.notes
+    bloques.close()
+
+
+def test_iter_montuno_valida_al_llamar(opciones):
+    with pytest.raises(ValueError):
+        iter_montuno("   ", **opciones)
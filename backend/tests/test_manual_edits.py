@@ -0,0 +1,79 @@
+import random
+
+import pretty_midi
+
+from backend.utils import apply_manual_edits
+
+
+def _aplicar_lineal(pm, edits):
+    """Implementación anterior (búsqueda lineal) usada como referencia."""
+    inst = pm.instruments[0]
+    for ed in edits:
+        typ = ed.get("type", "modify")
+        if typ == "modify":
+            for n in inst.notes:
+                if abs(n.start - ed["start"]) < 1e-6 and abs(n.end - ed["end"]) < 1e-6:
+                    n.pitch = ed["pitch"]
+                    break
+        elif typ == "add":
+            inst.notes.append(
+                pretty_midi.Note(velocity=100, pitch=ed["pitch"], start=ed["start"], end=ed["end"])
+            )
+        elif typ == "delete":
+            for n in list(inst.notes):
+                if (
+                    abs(n.start - ed["start"]) < 1e-6
+                    and abs(n.end - ed["end"]) < 1e-6
+                    and n.pitch == ed["pitch"]
+                ):
+                    inst.notes.remove(n)
+                    break
+    inst.notes.sort(key=lambda n: n.start)
+
+
+def _pm(rng):
+    pm = pretty_midi.PrettyMIDI()
+    inst = pretty_midi.Instrument(program=0)
+    for i in range(200):
+        inicio = (i // 3) * 0.25
+        inst.notes.append(
+            pretty_midi.Note(velocity=90, pitch=rng.choice([60, 64, 67]), start=inicio, end=inicio + 0.25)
+        )
+    pm.instruments.append(inst)
+    return pm
+
+
+def _notas(pm):
+    return [(n.start, n.end, n.pitch, n.velocity) for n in pm.instruments[0].notes]
+
+
+def test_equivale_a_la_busqueda_lineal():
+    rng = random.Random(5)
+    for _ in range(20):
+        edits = []
+        for _ in range(150):
+            inicio = rng.randrange(80) * 0.25 + rng.choice([0.0, 4e-7, -4e-7, 3e-6])
+            edits.append(
+                {
+                    "type": rng.choice(["modify", "delete", "add"]),
+                    "start": inicio,
+                    "end": inicio + 0.25,
+                    "pitch": rng.choice([60, 64, 67, 72]),
+                }
+            )
+        semilla = rng.random()
+        esperado, obtenido = _pm(random.Random(semilla)), _pm(random.Random(semilla))
+        _aplicar_lineal(esperado, edits)
+        apply_manual_edits(obtenido, edits)
+        assert _notas(obtenido) == _notas(esperado)
+
+
+def test_informa_ediciones_sin_coincidencia():
+    pm = _pm(random.Random(1))
+    primera = pm.instruments[0].notes[0]
+    edits = [
+        {"type": "modify", "start": primera.start, "end": primera.end, "pitch": 50},
+        {"type": "delete", "start": primera.start, "end": primera.end, "pitch": 99},
+        {"type": "modify", "start": 500.0, "end": 500.5, "pitch": 50},
+    ]
+    assert apply_manual_edits(pm, edits) == edits[1:]
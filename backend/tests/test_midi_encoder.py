@@ -0,0 +1,98 @@
+import io
+
+import mido
+import pretty_midi
+import pytest
+
+from backend.midi_encoder import encode_midi, tick_notes, timed_messages
+from backend.montuno_core import CLAVES
+
+
+def _pretty_midi_bytes(pm):
+    buffer = io.BytesIO()
+    pm.write(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("clave", list(CLAVES))
+@pytest.mark.parametrize("variacion", ["A", "B", "C", "D"])
+def test_bytes_identicos_a_pretty_midi(clave, variacion, generar):
+    pm = generar(
+        clave_config=CLAVES[clave],
+        variacion=variacion,
+        manual_edits=[{"type": "add", "start": 0.1234567, "end": 0.98765, "pitch": 70}],
+    ).midi
+    assert encode_midi(pm) == _pretty_midi_bytes(pm)
+
+
+def test_casos_limite():
+    pm = pretty_midi.PrettyMIDI()
+    assert encode_midi(pm) == _pretty_midi_bytes(pm)
+
+    vacio = pretty_midi.Instrument(program=5, name="")
+    pm.instruments.append(vacio)
+    assert encode_midi(pm) == _pretty_midi_bytes(pm)
+
+    bateria = pretty_midi.Instrument(program=0, is_drum=True, name="drums")
+    bateria.notes = [
+        pretty_midi.Note(velocity=100, pitch=36, start=-0.01, end=0.5),
+        pretty_midi.Note(velocity=90, pitch=36, start=0.5, end=200.0),
+        pretty_midi.Note(velocity=80, pitch=38, start=0.5, end=0.5),
+    ]
+    pm.instruments.append(bateria)
+    assert encode_midi(pm) == _pretty_midi_bytes(pm)
+
+
+def test_recurre_a_pretty_midi_con_metaeventos():
+    pm = pretty_midi.PrettyMIDI(initial_tempo=97)
+    inst = pretty_midi.Instrument(program=0)
+    inst.notes.append(pretty_midi.Note(velocity=100, pitch=60, start=0.0, end=1.0))
+    pm.instruments.append(inst)
+    assert encode_midi(pm) == _pretty_midi_bytes(pm)
+
+    pm.time_signature_changes.append(pretty_midi.TimeSignature(3, 4, 0.0))
+    assert encode_midi(pm) == _pretty_midi_bytes(pm)
+    with pytest.raises(ValueError):
+        timed_messages(pm)
+
+
+def test_mensajes_temporizados_coinciden_con_mido(generar):
+    pm = generar().midi
+    esperado = []
+    actual = 0.0
+    for msg in mido.MidiFile(file=io.BytesIO(_pretty_midi_bytes(pm))):
+        actual += msg.time
+        if not msg.is_meta:
+            esperado.append((actual, bytes(msg.bytes())))
+    obtenido = timed_messages(pm)
+    assert [m for _, m in obtenido] == [m for _, m in esperado]
+    assert [t for t, _ in obtenido] == pytest.approx([t for t, _ in esperado])
+
+
+def _notas_leidas(datos):
+    abiertas = {}
+    notas = []
+    tick = 0
+    for msg in mido.MidiFile(file=io.BytesIO(datos)).merged_track:
+        tick += msg.time
+        if msg.type == "note_on" and msg.velocity > 0:
+            abiertas.setdefault(msg.note, []).append((tick, msg.velocity))
+        elif msg.type in ("note_on", "note_off") and abiertas.get(msg.note):
+            inicio, velocidad = abiertas[msg.note].pop(0)
+            if tick > inicio:
+                notas.append((msg.note, inicio, tick, velocidad))
+    return sorted(notas)
+
+
+def test_tick_notes_son_las_del_archivo(generar):
+    pm = generar(
+        clave_config=CLAVES["Clave 3-2"],
+        variacion="B",
+        inversion="third",
+        manual_edits=[{"type": "add", "start": -0.2, "end": 0.98765, "pitch": 70}],
+    ).midi
+    notas = tick_notes(pm)
+
+    assert notas.start.tolist() == sorted(notas.start.tolist())
+    columnas = zip(notas.pitch.tolist(), notas.start.tolist(), notas.end.tolist(), notas.velocity.tolist())
+    assert sorted(columnas) == _notas_leidas(encode_midi(pm))
@@ -0,0 +1,98 @@
+"""Huellas de los renders de los modos tradicional y extendido.
+
+Ambos modos comparten el núcleo de :mod:`backend.midi_render`; estas huellas
+se tomaron antes de unificarlo y cualquier cambio en las notas las rompe.
+"""
+import hashlib
+import random
+
+import pytest
+
+from backend import modos
+from backend.instrumentation import tracing
+
+COMUN = "C6 | F7(b9) | Bbº7 Ab7sus4 | Dm7(b5) G7 | Em7 A7(b9) | (15)Dm7 G7 | C∆"
+EXTENSIONES = "Am9 | D13 | Gm11 C7(9) | F∆9 | Bm7(b5) E7(b9) | (8)Am7(13)"
+
+HUELLAS = {
+    ('montuno_tradicional', False, '', False): 'eebcd9b4ca9e8a59',
+    ('montuno_tradicional', False, '', True): '1df7d58499c5f2c9',
+    ('montuno_tradicional', False, 'Octavas', False): 'a350cddb5fb29861',
+    ('montuno_tradicional', False, 'Octavas', True): '5eeac137fb10aa1e',
+    ('montuno_tradicional', False, 'Doble octava', False): '1ac68186e5cc64c0',
+    ('montuno_tradicional', False, 'Doble octava', True): 'fa269f584f39b068',
+    ('montuno_tradicional', False, 'Décimas', False): '5b821a63f0aea3b9',
+    ('montuno_tradicional', False, 'Décimas', True): 'f847c08fc5b8ae36',
+    ('montuno_tradicional', False, 'Treceavas', False): '74fcd83be03c3287',
+    ('montuno_tradicional', False, 'Treceavas', True): '34a16519e724b64d',
+    ('montuno_tradicional', True, '', False): 'a24a32cf3b99de38',
+    ('montuno_tradicional', True, '', True): '625492209f79b061',
+    ('montuno_tradicional', True, 'Octavas', False): 'f1602fe6a4b44ed5',
+    ('montuno_tradicional', True, 'Octavas', True): '266e23c1a187c5de',
+    ('montuno_tradicional', True, 'Doble octava', False): '05acce0209a94da4',
+    ('montuno_tradicional', True, 'Doble octava', True): '6f6d28f7836dbcd7',
+    ('montuno_tradicional', True, 'Décimas', False): 'd9408ee4563859c3',
+    ('montuno_tradicional', True, 'Décimas', True): 'ee13a7ac364086f4',
+    ('montuno_tradicional', True, 'Treceavas', False): 'd8cb1bbf7129ab11',
+    ('montuno_tradicional', True, 'Treceavas', True): 'dd68dc8528f573d3',
+    ('montuno_extendido', False, '', False): '573aabdf30d51e40',
+    ('montuno_extendido', False, '', True): 'df0dd1e41ad184d4',
+    ('montuno_extendido', False, 'Octavas', False): '608a20c368c28779',
+    ('montuno_extendido', False, 'Octavas', True): '81c1c1abe4fd7e1f',
+    ('montuno_extendido', False, 'Doble octava', False): '938993b6f3f7c5da',
+    ('montuno_extendido', False, 'Doble octava', True): '3b77982ed58b0a74',
+    ('montuno_extendido', False, 'Décimas', False): '115a5fa40cd2eb03',
+    ('montuno_extendido', False, 'Décimas', True): '43f15da41b5099b5',
+    ('montuno_extendido', False, 'Treceavas', False): 'be3a6fe5026f1458',
+    ('montuno_extendido', False, 'Treceavas', True): '0979258a002fcf54',
+}
+
+
+def _huella(pm):
+    notas = sorted(
+        (float(round(n.start, 6)), float(round(n.end, 6)), int(n.pitch), int(n.velocity))
+        for n in pm.instruments[0].notes
+    )
+    return hashlib.sha256(repr(notas).encode()).hexdigest()[:16]
+
+
+def _casos():
+    for modo in ("montuno_tradicional", "montuno_extendido"):
+        progresiones = [COMUN, EXTENSIONES] if modo == "montuno_tradicional" else [COMUN]
+        for progresion in progresiones:
+            for armonizacion in ("", "Octavas", "Doble octava", "Décimas", "Treceavas"):
+                for aleatorio in (False, True):
+                    yield modo, progresion, armonizacion, aleatorio
+
+
+@pytest.mark.parametrize("modo,progresion,armonizacion,aleatorio", list(_casos()))
+def test_render_igual_a_la_huella(
+    tmp_path, reference_root, modo, progresion, armonizacion, aleatorio
+):
+    pm = getattr(modos, modo)(
+        progresion,
+        reference_root / "tradicional_3-2_B.mid",
+        tmp_path / "montuno.mid",
+        armonizacion,
+        inicio_cor=3,
+        return_pm=True,
+        aleatorio=aleatorio,
+        octavaciones_custom=["Octava arriba", "Original", "Octava abajo"] * 4,
+        rng=random.Random(5),
+    )
+    clave = (modo, progresion == EXTENSIONES, armonizacion, aleatorio)
+    assert _huella(pm) == HUELLAS[clave]
+    assert all(
+        type(n.start) is float and type(n.end) is float for n in pm.instruments[0].notes
+    )
+
+
+def test_ambos_modos_registran_las_etapas_del_nucleo(tmp_path, reference_root):
+    for modo in ("montuno_tradicional", "montuno_extendido"):
+        with tracing() as tracer:
+            getattr(modos, modo)(
+                COMUN, reference_root / "tradicional_3-2_B.mid", tmp_path / f"{modo}.mid"
+            )
+        tiempos = tracer.as_dict()
+        assert {"templates", "translate", "trim"} <= set(tiempos), modo
+        assert tiempos["translate"]["chords"] == 11
@@ -0,0 +1,79 @@
+import random
+
+import pretty_midi
+import pytest
+
+from backend import salsa
+from backend.midi_utils import _cortar_notas_superpuestas, _recortar_notas_a_limite
+from backend.montuno_core import generate_montuno, iter_montuno
+from backend.note_buffer import NoteBuffer
+
+
+def _notas_aleatorias(rng, cantidad):
+    notas = []
+    for _ in range(cantidad):
+        start = rng.randrange(0, 40) * 0.125
+        notas.append(
+            pretty_midi.Note(
+                velocity=rng.randrange(1, 128),
+                pitch=rng.choice([48, 50, 52, 55]),
+                start=start,
+                end=start + rng.randrange(1, 8) * 0.125,
+            )
+        )
+    return notas
+
+
+def _tuplas(notes):
+    return [(n.pitch, n.start, n.end, n.velocity) for n in notes]
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_recortes_equivalen_a_las_notas(semilla):
+    rng = random.Random(semilla)
+    notas = _notas_aleatorias(rng, 60)
+    buffer = NoteBuffer.from_notes(notas)
+
+    buffer.cut_overlaps()
+    esperado = _cortar_notas_superpuestas(notas)
+    esperado = _recortar_notas_a_limite(sorted(esperado, key=lambda n: (n.start, n.pitch)), 4.0)
+
+    assert _tuplas(buffer.clip(4.0).sort_by_start().to_notes()) == _tuplas(esperado)
+
+
+def test_cuantizar_y_separar_por_acorde():
+    buffer = NoteBuffer.concat(
+        [
+            NoteBuffer.from_columns([60, 64], [0.0, 0.5], [0.5, 0.5001], [90, 80], chord=0),
+            NoteBuffer.from_columns([62], [1.0], [1.25], [70], chord=2),
+        ]
+    )
+    cuantizado = buffer.quantise(0.25, sort=False)
+
+    # La nota que dura menos de un tick desaparece.
+    assert cuantizado.start.tolist() == [0, 4]
+    assert cuantizado.end_seconds().tolist() == [0.5, 1.25]
+    partes = cuantizado.split_chords(range(3))
+    assert [len(p) for p in partes] == [1, 0, 1]
+    assert _tuplas(partes[1].to_notes()) == []
+
+
+def test_plantilla_en_columnas(reference_root):
+    plantilla = salsa.cargar_plantilla_salsa(reference_root / "salsa_2-3_root_A.mid")
+    assert len(plantilla.desde) == plantilla.limites[-1]
+    assert (plantilla.limites[1:] >= plantilla.limites[:-1]).all()
+    assert not plantilla.desde.flags.writeable
+    assert (abs(plantilla.desde) < plantilla.grid).all()
+
+
+@pytest.mark.parametrize("por_lote", [1, 3])
+def test_lotes_pequenos_no_cambian_el_resultado(monkeypatch, por_lote, progresion, opciones):
+    kwargs = dict(opciones, variacion="B", inversion="third", register_offsets=[0, 1, 0, -1])
+    completo = generate_montuno(progresion, **kwargs)
+    monkeypatch.setattr(salsa, "ACORDES_POR_LOTE", por_lote)
+    bloques = list(iter_montuno(progresion, **kwargs))
+
+    assert [b.index for b in bloques] == list(range(len(bloques)))
+    assert sorted(_tuplas(n for b in bloques for n in b.notes)) == sorted(
+        _tuplas(completo.midi.instruments[0].notes)
+    )
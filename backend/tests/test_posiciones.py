@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from backend import modos
+from backend.midi_common import (
+    agrupar_posiciones,
+    construir_posiciones_por_ventanas,
+    construir_posiciones_secuenciales,
+    leer_midi_referencia,
+    obtener_posiciones_referencia,
+)
+from backend.midi_render import cargar_plantilla
+from backend.template_cache import TEMPLATE_CACHE
+
+PLANTILLAS = [f"tradicional_{clave}_{var}" for clave in ("2-3", "3-2") for var in "ABCD"]
+
+
+def _grupos_referencia(posiciones_base, total_cor_ref, grid):
+    grupos = [[] for _ in range(total_cor_ref)]
+    for pos in posiciones_base:
+        idx = int(round(pos["start"] / grid))
+        if 0 <= idx < total_cor_ref:
+            grupos[idx].append(
+                {
+                    "pitch": pos["pitch"],
+                    "start": pos["start"] - idx * grid,
+                    "end": pos["end"] - idx * grid,
+                    "velocity": pos["velocity"],
+                }
+            )
+    return grupos
+
+
+def _emitir_referencia(grupos, refs, grid):
+    posiciones = []
+    for dest_idx, ref_idx in enumerate(refs):
+        for nota in grupos[ref_idx]:
+            posiciones.append(
+                {
+                    "pitch": nota["pitch"],
+                    "start": round(dest_idx * grid + nota["start"], 6),
+                    "end": round(dest_idx * grid + nota["end"], 6),
+                    "velocity": nota["velocity"],
+                }
+            )
+    posiciones.sort(key=lambda x: (x["start"], x["pitch"]))
+    return posiciones
+
+
+def _base(path):
+    notes, _ = leer_midi_referencia(path)
+    return obtener_posiciones_referencia(notes)
+
+
+@pytest.mark.parametrize("nombre", PLANTILLAS)
+def test_secuenciales_igual_que_por_diccionarios(reference_root, nombre):
+    base = _base(reference_root / f"{nombre}.mid")
+    grupos = _grupos_referencia(base, 256, 0.25)
+    plantilla = agrupar_posiciones(base, 256, 0.25)
+    for inicio, total in ((0, 256), (3, 700), (250, 9)):
+        refs = [(inicio + d) % 256 for d in range(total)]
+        esperado = _emitir_referencia(grupos, refs, 0.25)
+        obtenido = construir_posiciones_secuenciales(plantilla, total, 256, 0.25, inicio_cor=inicio)
+        assert obtenido.como_dicts() == esperado
+        assert obtenido.corchea.tolist() == [int(round(p["start"] / 0.25)) for p in esperado]
+
+
+@pytest.mark.parametrize("nombre", PLANTILLAS[:2])
+def test_ventanas_igual_que_por_diccionarios(reference_root, nombre):
+    base = _base(reference_root / f"{nombre}.mid")
+    grupos = _grupos_referencia(base, 256, 0.25)
+    obtenido = construir_posiciones_por_ventanas(
+        base, 300, 256, 0.25, inicio_cor=5, compases_ventana=2, rng=random.Random(2)
+    )
+    generador = random.Random(2)
+    ventanas = list(range(16))
+    generador.shuffle(ventanas)
+    ventanas += [generador.randint(0, 15) for _ in range((5 + 299) // 16 + 1 - 16)]
+    refs = [
+        (ventanas[(5 + d) // 16] * 16 + (5 + d) % 16) % 256 for d in range(300)
+    ]
+    assert obtenido.como_dicts() == _emitir_referencia(grupos, refs, 0.25)
+
+
+def test_la_plantilla_agrupada_se_comparte(tmp_path, reference_root):
+    path = reference_root / "tradicional_2-3_A.mid"
+    TEMPLATE_CACHE.invalidate(path)
+    primera = cargar_plantilla(path)
+    assert not primera.posiciones.alturas.flags.writeable
+    antes = TEMPLATE_CACHE.stats()
+    modos.montuno_tradicional("Am7 D7 | G∆", path, tmp_path / "a.mid")
+    modos.montuno_extendido("Am7 D7 | G∆", path, tmp_path / "b.mid")
+    despues = TEMPLATE_CACHE.stats()
+    assert despues.hits - antes.hits == 2
+    assert despues.misses == antes.misses
+    assert cargar_plantilla(path) is primera
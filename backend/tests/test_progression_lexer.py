@@ -0,0 +1,91 @@
+import pytest
+
+from backend import salsa
+from backend.progression_lexer import (
+    APPROACH,
+    BAR,
+    CHORD,
+    HARMONISATION,
+    INVERSION,
+    REPEAT,
+    STYLE,
+    tokenize,
+    tokenize_bars,
+)
+
+
+def test_tokens_tipados_con_desplazamientos():
+    texto = "(8)Am7 [C# F] D7/3 | % | (13)[TRAD]/5 G∆"
+    tokens = tokenize(texto)
+    assert [(t.tipo, t.valor) for t in tokens] == [
+        (HARMONISATION, "Octavas"),
+        (CHORD, "Am7"),
+        (APPROACH, "[C# F]"),
+        (CHORD, "D7"),
+        (INVERSION, "third"),
+        (BAR, "|"),
+        (REPEAT, "%"),
+        (BAR, "|"),
+        (HARMONISATION, "Treceavas"),
+        (STYLE, "[TRAD]"),
+        (INVERSION, "fifth"),
+        (CHORD, "G∆"),
+    ]
+    assert [texto[t.inicio : t.fin] for t in tokens] == [
+        "(8)", "Am7", "[C# F]", "D7", "/3", "|", "%", "|", "(13)", "[TRAD]", "/5", "G∆",
+    ]
+
+
+def test_los_compases_repetidos_comparten_tokens():
+    compases = tokenize_bars("Am7 D7 | G∆ |Am7 D7 | G∆")
+    assert [inicio for inicio, _ in compases] == [0, 8, 13, 21]
+    assert compases[0][1] is compases[2][1]
+    assert compases[1][1] is not compases[3][1]
+    assert compases[3][1][0].valor == "G∆"
+    assert tokenize_bars("||")[1] == (1, ())
+
+
+def test_un_corchete_inicial_es_marcador_de_aproximacion():
+    assert [t.tipo for t in tokenize("[TRAD]Am7 (8)[TRAD]Am7")] == [
+        APPROACH, CHORD, HARMONISATION, STYLE, CHORD,
+    ]
+
+
+def test_inversion_pegada_o_suelta():
+    asignaciones, _, _ = salsa.procesar_progresion_salsa("Am7/3 /5 D7 | (10)G∆ /7")
+    assert [(n, a, i) for n, _, a, i in asignaciones] == [
+        ("Am7", "", "third"),
+        ("D7", "", "fifth"),
+        ("G∆", "Décimas", None),
+    ]
+
+
+def test_corchete_de_varias_lineas_no_toma_la_inversion():
+    assert [t.tipo for t in tokenize("[A\nB]/3 C7")] == [CHORD, INVERSION, CHORD]
+    asignaciones, _, _ = salsa.procesar_progresion_salsa("[A\nB]/3 C7")
+    assert [(n, i) for n, _, _, i in asignaciones] == [("[A\nB]", None), ("C7", "third")]
+
+
+def test_errores_de_la_progresion():
+    with pytest.raises(ValueError, match="primer comp"):
+        salsa.procesar_progresion_salsa(" % | Am7")
+    with pytest.raises(ValueError, match="uno o dos acordes: Am7 D7  G7$"):
+        salsa.procesar_progresion_salsa("C∆ |  Am7 D7  G7 ")
+
+
+def test_compas_repetido_con_otro_estado():
+    # El mismo compás se memoiza por estado de entrada: la armonización y las
+    # aproximaciones que arrastra cambian sus acordes.
+    asignaciones, _, aproximaciones = salsa.procesar_progresion_salsa(
+        "Am7 | (8) [C#] D7 | Am7 | % | /3 | Am7"
+    )
+    assert [(n, idx[0], a, i) for n, idx, a, i in asignaciones] == [
+        ("Am7", 0, "", None),
+        ("D7", 7, "Octavas", None),
+        ("Am7", 14, "Octavas", None),
+        ("Am7", 23, "Octavas", None),
+        ("Am7", 30, "Octavas", "third"),
+    ]
+    assert aproximaciones[0] == ["D", "F", "A", "B"]
+    assert aproximaciones[2] == aproximaciones[1] != aproximaciones[0]
+    assert aproximaciones[2] is not aproximaciones[3]
@@ -0,0 +1,90 @@
+import random
+
+import pretty_midi
+import pytest
+
+from backend import midi_utils, midi_utils_tradicional
+
+
+def _cortar_referencia(notas):
+    agrupadas = {}
+    for n in sorted(notas, key=lambda x: (x.pitch, x.start)):
+        lista = agrupadas.setdefault(n.pitch, [])
+        if lista and lista[-1].end > n.start:
+            lista[-1].end = n.start
+        lista.append(n)
+    resultado = [n for lst in agrupadas.values() for n in lst]
+    resultado.sort(key=lambda x: (x.start, x.pitch))
+    return resultado
+
+
+def _recortar_referencia(notas, limite):
+    recortadas = []
+    for n in notas:
+        if n.start >= limite:
+            continue
+        if n.end > limite:
+            n.end = limite
+        recortadas.append(n)
+    return recortadas
+
+
+def _notas_aleatorias(semilla, cantidad=300):
+    rng = random.Random(semilla)
+    notas = []
+    for _ in range(cantidad):
+        start = round(rng.randrange(0, 64) * 0.25 + rng.choice([0.0, 0.01, -0.01]), 6)
+        notas.append(
+            pretty_midi.Note(
+                velocity=rng.randrange(1, 128),
+                pitch=rng.randrange(55, 67),
+                start=start,
+                end=start + rng.randrange(0, 12) * 0.125,
+            )
+        )
+    return notas
+
+
+def _copias(notas):
+    return [pretty_midi.Note(n.velocity, n.pitch, n.start, n.end) for n in notas]
+
+
+def _estado(originales, devueltas):
+    posicion = {id(n): i for i, n in enumerate(originales)}
+    return (
+        [(n.start, n.end) for n in originales],
+        [posicion[id(n)] for n in devueltas],
+    )
+
+
+@pytest.mark.parametrize("semilla", range(8))
+def test_cortar_notas_superpuestas_igual_a_la_referencia(semilla):
+    esperadas = _notas_aleatorias(semilla)
+    obtenidas = _copias(esperadas)
+    resultado_esperado = _cortar_referencia(esperadas)
+    resultado = midi_utils._cortar_notas_superpuestas(obtenidas)
+    assert _estado(obtenidas, resultado) == _estado(esperadas, resultado_esperado)
+
+
+@pytest.mark.parametrize("semilla", range(8))
+def test_recortar_notas_a_limite_igual_a_la_referencia(semilla):
+    esperadas = _notas_aleatorias(semilla)
+    obtenidas = _copias(esperadas)
+    resultado_esperado = _recortar_referencia(esperadas, 9.0)
+    resultado = midi_utils._recortar_notas_a_limite(obtenidas, 9.0)
+    assert _estado(obtenidas, resultado) == _estado(esperadas, resultado_esperado)
+
+
+@pytest.mark.parametrize("semilla", range(8))
+def test_limpiar_notas_equivale_a_los_dos_recortes(semilla):
+    esperadas = _notas_aleatorias(semilla)
+    obtenidas = _copias(esperadas)
+    resultado_esperado = _recortar_referencia(_cortar_referencia(esperadas), 9.0)
+    resultado = midi_utils._limpiar_notas(obtenidas, 9.0)
+    assert _estado(obtenidas, resultado) == _estado(esperadas, resultado_esperado)
+
+
+def test_listas_vacias_y_modo_tradicional():
+    assert midi_utils._cortar_notas_superpuestas([]) == []
+    assert midi_utils._recortar_notas_a_limite([], 1.0) == []
+    assert midi_utils_tradicional._limpiar_notas is midi_utils._limpiar_notas
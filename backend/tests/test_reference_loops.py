@@ -0,0 +1,24 @@
+import shutil
+
+import pytest
+
+from backend.montuno_core import CLAVES, generate_montuno, reference_loop_names
+
+
+def _notas(result):
+    return [(n.pitch, n.start, n.end, n.velocity) for n in result.midi.instruments[0].notes]
+
+
+@pytest.mark.parametrize("clave", sorted(CLAVES))
+def test_solo_los_loops_de_la_variacion_bastan(tmp_path, clave, reference_root, progresion):
+    nombres = reference_loop_names(CLAVES[clave], "C")
+    for nombre in nombres:
+        if (reference_root / nombre).exists():
+            shutil.copy(reference_root / nombre, tmp_path / nombre)
+    kwargs = dict(clave_config=CLAVES[clave], variacion="C", inversion="third")
+
+    parcial = generate_montuno(progresion, reference_root=tmp_path, **kwargs)
+    completo = generate_montuno(progresion, reference_root=reference_root, **kwargs)
+
+    assert {path.name for path in parcial.reference_files} <= set(nombres)
+    assert _notas(parcial) == _notas(completo)
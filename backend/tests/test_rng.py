@@ -0,0 +1,32 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.midi_common import construir_posiciones_por_ventanas
+
+POSICIONES = [
+    {"pitch": 40 + i // 16, "start": i * 0.25, "end": i * 0.25 + 0.2, "velocity": 90}
+    for i in range(256)
+]
+
+
+def _ventanas(seed):
+    return construir_posiciones_por_ventanas(
+        POSICIONES, 200, 256, 0.25, compases_ventana=2, rng=random.Random(seed)
+    )
+
+
+def test_rng_explicito_no_toca_el_estado_global():
+    random.seed(11)
+    estado = random.getstate()
+    primero = _ventanas(3)
+    assert random.getstate() == estado
+    assert _ventanas(3) == primero
+    assert _ventanas(4) != primero
+
+
+def test_renders_con_semilla_identicos_en_hilos():
+    esperado = {seed: _ventanas(seed) for seed in range(4)}
+    semillas = list(range(4)) * 16
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        resultados = list(pool.map(_ventanas, semillas))
+    assert all(r == esperado[s] for s, r in zip(semillas, resultados))
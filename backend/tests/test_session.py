@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from backend.montuno_core import MontunoSession, generate_montuno
+
+PROGRESION = " | ".join(["Am7 D7", "G∆", "C7", "F#m7(b5) B7", "Em", "A7", "Dm7 G7", "C∆"] * 5)
+
+
+@pytest.fixture
+def base(opciones):
+    return dict(opciones, variacion="B")
+
+
+def _notas(result):
+    return [(n.start, n.end, n.pitch, n.velocity) for n in result.midi.instruments[0].notes]
+
+
+@pytest.mark.parametrize("voice_leading", ["greedy", "optimal"])
+def test_sesion_equivale_a_generate_montuno_tras_ediciones(voice_leading, base):
+    rng = random.Random(3)
+    sesion = MontunoSession(PROGRESION, voice_leading=voice_leading, **base)
+    n = len(sesion)
+    opciones = {
+        "octavas_por_indice": [None] * n,
+        "inversiones_por_indice": [None] * n,
+        "register_offsets": [0] * n,
+        "aproximaciones_por_indice": [None] * n,
+    }
+    for paso in range(25):
+        idx = rng.randrange(n)
+        campo = rng.choice(list(opciones))
+        valor = {
+            "octavas_por_indice": rng.choice([None, "Octava arriba", "Octava abajo"]),
+            "inversiones_por_indice": rng.choice([None, "root", "third", "fifth", "seventh"]),
+            "register_offsets": rng.choice([-1, 0, 1]),
+            "aproximaciones_por_indice": rng.choice([None, ["Db", "F", "Ab", "B"]]),
+        }[campo]
+        opciones[campo][idx] = valor
+        if paso % 2:
+            sesion.update(**opciones)
+        else:
+            nombre = {
+                "octavas_por_indice": "octavacion",
+                "inversiones_por_indice": "inversion",
+                "register_offsets": "register_offset",
+                "aproximaciones_por_indice": "aproximaciones",
+            }[campo]
+            sesion.set_chord(idx, **{nombre: valor})
+
+        esperado = generate_montuno(
+            PROGRESION, voice_leading=voice_leading, bpm=100, **opciones, **base
+        )
+        obtenido = sesion.render(bpm=100)
+        assert _notas(obtenido) == _notas(esperado), paso
+        assert obtenido.max_eighths == esperado.max_eighths
+
+
+def test_sesion_solo_retraduce_hasta_que_el_bajo_converge(base):
+    texto = " | ".join(["Am7 D7", "G∆", "C7", "F#m7(b5) B7"] * 50)
+    sesion = MontunoSession(texto, **base)
+    retraducidos = sesion.set_chord(3, register_offset=1)
+    assert 3 in retraducidos
+    assert len(retraducidos) < len(sesion) // 4
+    # Restaurar la opción vuelve exactamente al render original.
+    sesion.set_chord(3, register_offset=None)
+    assert _notas(sesion.render()) == _notas(generate_montuno(texto, **base))
+
+
+def test_sesion_sin_cambios_no_retraduce(base):
+    sesion = MontunoSession(PROGRESION, **base)
+    assert sesion.update() == []
+    with pytest.raises(IndexError):
+        sesion.set_chord(len(sesion), inversion="third")
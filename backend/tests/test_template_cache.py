@@ -0,0 +1,87 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from backend import salsa
+from backend.template_cache import TemplateCache
+
+
+def _contador():
+    llamadas = []
+
+    def loader(path: Path) -> str:
+        llamadas.append(path)
+        return path.read_text()
+
+    return loader, llamadas
+
+
+def test_reutiliza_hasta_que_cambia_el_archivo(tmp_path):
+    path = tmp_path / "plantilla.txt"
+    path.write_text("a")
+    cache = TemplateCache()
+    loader, llamadas = _contador()
+
+    assert cache.get(path, loader) == "a"
+    assert cache.get(path, loader) == "a"
+    assert len(llamadas) == 1
+
+    path.write_text("bb")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert cache.get(path, loader) == "bb"
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 2, 1)
+
+
+def test_desaloja_la_entrada_menos_usada(tmp_path):
+    cache = TemplateCache(maxsize=2)
+    loader, llamadas = _contador()
+    paths = []
+    for nombre in "abc":
+        path = tmp_path / nombre
+        path.write_text(nombre)
+        paths.append(path)
+
+    cache.get(paths[0], loader)
+    cache.get(paths[1], loader)
+    cache.get(paths[0], loader)
+    cache.get(paths[2], loader)
+
+    assert cache.stats().evictions == 1
+    cache.get(paths[0], loader)
+    cache.get(paths[1], loader)
+    assert [p.name for p in llamadas] == ["a", "b", "c", "b"]
+
+
+def test_invalidacion_explicita(tmp_path):
+    path = tmp_path / "x"
+    path.write_text("x")
+    cache = TemplateCache()
+    loader, llamadas = _contador()
+
+    cache.get(path, loader, kind="salsa")
+    cache.get(path, loader, kind="tradicional")
+    assert cache.invalidate(path) == 2
+    cache.get(path, loader, kind="salsa")
+    assert len(llamadas) == 3
+    assert cache.invalidate() == 1
+
+
+def test_archivo_inexistente_no_se_cachea(tmp_path):
+    cache = TemplateCache()
+    with pytest.raises(FileNotFoundError):
+        cache.get(tmp_path / "nada.mid", lambda p: p)
+    assert cache.stats().size == 0
+
+
+def test_plantilla_salsa_compartida(reference_root):
+    path = reference_root / "salsa_2-3_root_A.mid"
+    primera = salsa.cargar_plantilla_salsa(path)
+    segunda = salsa.cargar_plantilla_salsa(path)
+
+    assert primera is segunda
+    assert len(primera.limites) - 1 == primera.total_cor == 256
+    assert len(primera.nombre_idx) == len(primera.alturas) == primera.limites[-1]
@@ -0,0 +1,86 @@
+import pytest
+
+from backend import salsa
+from backend.utils import calc_default_inversions
+
+PROGRESION = "C∆ | Dm7 | Em7 | F∆ | G7 | Am7 | Bm7(b5) | C∆ | D7 | E7 | F#m7(b5) | B7"
+
+
+def _coste(alturas, offsets=None):
+    offsets = offsets or [0] * len(alturas)
+    salto = sum(abs(b - a) for a, b in zip(alturas, alturas[1:]))
+    return salto + sum(salsa._fuera_de_rango(p, o) for p, o in zip(alturas, offsets))
+
+
+def _voraz(asignaciones):
+    inversiones, _ = calc_default_inversions(
+        asignaciones,
+        lambda: "root",
+        salsa.get_bass_pitch,
+        salsa._ajustar_rango_flexible,
+        salsa.seleccionar_inversion,
+        return_pitches=True,
+    )
+    # El render voraz sólo conserva la inversión: el bajo suena en get_bass_pitch.
+    return inversiones, [salsa.get_bass_pitch(a[0], inv) for a, inv in zip(asignaciones, inversiones)]
+
+
+def test_optimo_no_empeora_al_voraz():
+    asignaciones, _, _ = salsa.procesar_progresion_salsa(PROGRESION)
+    _, voraz = _voraz(asignaciones)
+    inversiones, optimo = salsa.optimizar_inversiones(asignaciones, "root")
+
+    assert inversiones[0] == "root"
+    assert _coste(optimo) <= _coste(voraz)
+    for (cifrado, *_), inv, pitch in zip(asignaciones, inversiones, optimo):
+        assert pitch % 12 == salsa.get_bass_pitch(cifrado, inv) % 12
+
+
+def test_optimo_respeta_manuales_forzadas_y_octavacion():
+    asignaciones, _, _ = salsa.procesar_progresion_salsa("C∆ | F∆/3 | G7 | C∆")
+    offsets = [0, 0, 12, 0]
+    inversiones, alturas = salsa.optimizar_inversiones(
+        asignaciones, "fifth", offsets, [None, None, "seventh", None]
+    )
+
+    assert inversiones[:3] == ["fifth", "third", "seventh"]
+    assert alturas[2] == salsa.get_bass_pitch("G7", "seventh") + 12
+
+
+def _bajo_renderizado(result, asignaciones, alturas):
+    """Nota más grave de cada acorde con la clase de altura de su bajo."""
+
+    notas = result.midi.instruments[0].notes
+    grid = result.midi.get_end_time() / result.max_eighths
+    linea = []
+    for (_, idxs, _, _), pitch in zip(asignaciones, alturas):
+        desde, hasta = idxs[0] * grid - 1e-6, (idxs[-1] + 1) * grid - 1e-6
+        linea.append(
+            min(n.pitch for n in notas if desde <= n.start < hasta and n.pitch % 12 == pitch % 12)
+        )
+    return linea
+
+
+@pytest.mark.parametrize(
+    "progresion",
+    [
+        PROGRESION,
+        "Eb∆ | Eb∆ | Ab7 | Em7 | Bm7(b5) | E7 | B7 | Em7 | F#m7(b5) | B7 | C∆ | Ab7 | F∆ | G7"
+        " | D7 | F∆ | C∆ | Dm7 | Db∆",
+    ],
+)
+def test_generate_montuno_voice_leading(generar, progresion):
+    asignaciones, _, _ = salsa.procesar_progresion_salsa(progresion)
+    _, voraz = _voraz(asignaciones)
+    _, optimo = salsa.optimizar_inversiones(asignaciones, "root")
+
+    linea_voraz = _bajo_renderizado(generar(progresion, seed=0), asignaciones, voraz)
+    linea_optima = _bajo_renderizado(
+        generar(progresion, seed=0, voice_leading="optimal"), asignaciones, optimo
+    )
+    assert linea_voraz == voraz
+    assert linea_optima == optimo
+    assert _coste(linea_optima) <= _coste(linea_voraz)
+
+    with pytest.raises(ValueError):
+        generar(progresion, voice_leading="perfecto")
@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 import json
 import re
 
@@ -14,6 +15,7 @@ __all__ = [
     "limpiar_inversion",
     "apply_manual_edits",
     "calc_default_inversions",
+    "iter_default_inversions",
     "normalise_bars",
     "clean_tokens",
 ]
@@ -28,35 +30,84 @@ def limpiar_inversion(valor: str) -> str:
     return valor
 
 
-def apply_manual_edits(pm: pretty_midi.PrettyMIDI, edits: Iterable[dict]) -> None:
-    """Apply recorded manual edits to a ``PrettyMIDI`` object."""
+# Manual edits identify notes by their times with this tolerance (seconds).
+_TOLERANCIA_EDICION = 1e-6
+
+
+def _clave_tiempo(valor: float) -> int:
+    return int(round(valor / _TOLERANCIA_EDICION))
+
+
+def apply_manual_edits(pm: pretty_midi.PrettyMIDI, edits: Iterable[dict]) -> List[dict]:
+    """Apply recorded manual edits to a ``PrettyMIDI`` object.
+
+    Edits are replayed in order: ``modify`` changes the pitch of the first
+    note with the given start/end, ``delete`` removes the first note with the
+    given start/end/pitch and ``add`` appends a new note.  Notes are looked up
+    through a hash index on quantised times built once, so replaying many
+    edits over a long montuno stays linear.  Returns the ``modify``/``delete``
+    edits that matched no note.
+    """
     inst = pm.instruments[0]
+    notas: List[Optional[pretty_midi.Note]] = list(inst.notes)
+    indice: Dict[Tuple[int, int], List[int]] = {}
+
+    def indexar(pos: int, nota: pretty_midi.Note) -> None:
+        clave = (_clave_tiempo(nota.start), _clave_tiempo(nota.end))
+        indice.setdefault(clave, []).append(pos)
+
+    def buscar(ed: dict, pitch: Optional[int]) -> Optional[int]:
+        # A tolerance match may fall in a neighbouring bucket; keep the
+        # earliest note in list order among all candidates.
+        inicio, fin = ed["start"], ed["end"]
+        ks, ke = _clave_tiempo(inicio), _clave_tiempo(fin)
+        mejor: Optional[int] = None
+        for ds in (-1, 0, 1):
+            for de in (-1, 0, 1):
+                for pos in indice.get((ks + ds, ke + de), ()):
+                    if mejor is not None and pos >= mejor:
+                        break
+                    n = notas[pos]
+                    if (
+                        n is not None
+                        and abs(n.start - inicio) < _TOLERANCIA_EDICION
+                        and abs(n.end - fin) < _TOLERANCIA_EDICION
+                        and (pitch is None or n.pitch == pitch)
+                    ):
+                        mejor = pos
+                        break
+        return mejor
+
+    for pos, nota in enumerate(notas):
+        indexar(pos, nota)
+
+    sin_coincidencia: List[dict] = []
     for ed in edits:
         typ = ed.get("type", "modify")
         if typ == "modify":
-            for n in inst.notes:
-                if abs(n.start - ed["start"]) < 1e-6 and abs(n.end - ed["end"]) < 1e-6:
-                    n.pitch = ed["pitch"]
-                    break
+            pos = buscar(ed, None)
+            if pos is None:
+                sin_coincidencia.append(ed)
+            else:
+                notas[pos].pitch = ed["pitch"]
         elif typ == "add":
-            inst.notes.append(
-                pretty_midi.Note(
-                    velocity=100,
-                    pitch=ed["pitch"],
-                    start=ed["start"],
-                    end=ed["end"],
-                )
+            nota = pretty_midi.Note(
+                velocity=100,
+                pitch=ed["pitch"],
+                start=ed["start"],
+                end=ed["end"],
             )
+            notas.append(nota)
+            indexar(len(notas) - 1, nota)
         elif typ == "delete":
-            for n in list(inst.notes):
-                if (
-                    abs(n.start - ed["start"]) < 1e-6
-                    and abs(n.end - ed["end"]) < 1e-6
-                    and n.pitch == ed["pitch"]
-                ):
-                    inst.notes.remove(n)
-                    break
+            pos = buscar(ed, ed["pitch"])
+            if pos is None:
+                sin_coincidencia.append(ed)
+            else:
+                notas[pos] = None
+    inst.notes = [n for n in notas if n is not None]
     inst.notes.sort(key=lambda n: n.start)
+    return sin_coincidencia
 
 
 def calc_default_inversions(
@@ -82,10 +133,44 @@ def calc_default_inversions(
 
     invs: List[str] = []
     pitches: List[int] = []
-    voz: Optional[int] = None
+    for _, inv, pitch in iter_default_inversions(
+        asignaciones,
+        inversion_getter,
+        get_bass_pitch,
+        ajustar_rango_flexible,
+        seleccionar_inversion,
+        manual_overrides,
+        offset_getter,
+    ):
+        invs.append(inv)
+        pitches.append(pitch)
+
+    return (invs, pitches) if return_pitches else invs
+
+
+def iter_default_inversions(
+    asignaciones,
+    inversion_getter: Callable[[], str],
+    get_bass_pitch: Callable[[str, str], int],
+    ajustar_rango_flexible: Callable[[Optional[int], int], int],
+    seleccionar_inversion: Callable[[Optional[int], str], Tuple[str, int]],
+    manual_overrides: Optional[Sequence[Optional[str]]] = None,
+    offset_getter: Optional[Callable[[int], int]] = None,
+    *,
+    start: int = 0,
+    prev_pitch: Optional[int] = None,
+) -> Iterator[Tuple[int, str, int]]:
+    """Yield ``(index, inversion, bass_pitch)`` as :func:`calc_default_inversions` computes them.
+
+    Each chord only depends on the bass pitch of the previous one, so the
+    chain can be resumed at ``start`` given that chord's ``prev_pitch``; the
+    caller may stop iterating as soon as a pitch matches a previous run.
+    """
+
+    voz = prev_pitch
     overrides = list(manual_overrides or [])
 
-    for idx, data in enumerate(asignaciones):
+    for idx, data in islice(enumerate(asignaciones), start, None):
         cif = data[0]
         inv_for = data[3] if len(data) > 3 else None
         override = overrides[idx] if idx < len(overrides) else None
@@ -105,12 +190,9 @@ def calc_default_inversions(
                 pitch = ajustar_rango_flexible(voz, pitch)
             else:
                 inv, pitch = seleccionar_inversion(voz, cif, offset)
-        invs.append(inv)
-        pitches.append(pitch)
+        yield idx, inv, pitch
         voz = pitch
 
-    return (invs, pitches) if return_pitches else invs
-
 
 def normalise_bars(text: str) -> str:
     """Remove duplicated barlines and tidy spacing."""
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 """Utilities for generating piano voicings."""
 
-from typing import List, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, List, Sequence, Tuple
+import re
 
 # ---------------------------------------------------------------------------
 # Pitch range limits for the generated voicings.  Notes are adjusted so that
@@ -60,29 +63,75 @@ NOTAS = {
 # Chord parsing and linked voicing generation
 # ==========================================================================
 
-def parsear_nombre_acorde(nombre: str) -> Tuple[int, str]:
-    """Parse a chord name into root MIDI pitch class and suffix.
+# Patterns compiled once; chord symbols are parsed for every template note.
+_RE_INVERSION_FORZADA = re.compile(r"/[1357]$")
+_RE_EXTENSIONES_IGNORADAS = re.compile(r"\(b6\)|\(b13\)")
+_PATRON_ACORDE = re.compile(
+    r'^([A-G][b#]?)(m6|m7|m∆|m|6|7|∆sus4|∆sus2|∆|\+7|º7|º∆|m7\(b5\)|7sus4|7sus2|7\(b5\)|7\(b9\)|\+7\(b9\)|7\(b5\)b9|7sus4\(b9\)|∆\(b5\))?$'
+)
 
-    Extra modifiers like ``(b6)`` or ``(b13)`` are ignored for the
-    purposes of voicing generation but may be used elsewhere.
+
+@dataclass(frozen=True)
+class AcordeParseado:
+    """Immutable result of parsing a chord symbol.
+
+    ``intervalos_estructurales`` holds the intervals of the root, the third
+    (the fourth on ``sus`` chords) and the fifth, in that order.
     """
 
-    import re
+    raiz: int
+    sufijo: str
+    intervalos: Tuple[int, ...]
+    clases_altura: FrozenSet[int]
+    intervalos_estructurales: Tuple[int, int, int]
+
+
+def construir_acorde_parseado(
+    raiz: int, sufijo: str, intervalos: Sequence[int]
+) -> AcordeParseado:
+    """Build the :class:`AcordeParseado` record for ``raiz`` and ``sufijo``."""
+
+    ints = tuple(intervalos)
+    tercera = 5 if "sus" in sufijo else ints[1]
+    return AcordeParseado(
+        raiz=raiz,
+        sufijo=sufijo,
+        intervalos=ints,
+        clases_altura=frozenset((raiz + i) % 12 for i in ints),
+        intervalos_estructurales=(0, tercera, ints[2]),
+    )
+
+
+@lru_cache(maxsize=1024)
+def analizar_acorde(nombre: str) -> AcordeParseado:
+    """Parse ``nombre`` once and return its interned :class:`AcordeParseado`.
+
+    Results are memoised in a bounded LRU table, so repeated symbols in a
+    progression (or in every template note of a render) cost a dict lookup.
+    """
 
     # Strip forced inversion notation at the end (e.g. C∆/3)
-    base = re.sub(r"/[1357]$", "", nombre)
+    base = _RE_INVERSION_FORZADA.sub("", nombre)
     # Remove optional extensions that are not part of the base dictionary
-    base = re.sub(r"\(b6\)|\(b13\)", "", base)
+    base = _RE_EXTENSIONES_IGNORADAS.sub("", base)
 
-    m = re.match(
-        r'^([A-G][b#]?)(m6|m7|m∆|m|6|7|∆sus4|∆sus2|∆|\+7|º7|º∆|m7\(b5\)|7sus4|7sus2|7\(b5\)|7\(b9\)|\+7\(b9\)|7\(b5\)b9|7sus4\(b9\)|∆\(b5\))?$',
-        base,
-    )
+    m = _PATRON_ACORDE.match(base)
     if not m:
         raise ValueError(f"Acorde no reconocido: {nombre}")
 
     root, suf = m.group(1), m.group(2) or '∆'
-    return NOTAS[root], suf
+    return construir_acorde_parseado(NOTAS[root], suf, INTERVALOS_TRADICIONALES[suf])
+
+
+def parsear_nombre_acorde(nombre: str) -> Tuple[int, str]:
+    """Parse a chord name into root MIDI pitch class and suffix.
+
+    Extra modifiers like ``(b6)`` or ``(b13)`` are ignored for the
+    purposes of voicing generation but may be used elsewhere.
+    """
+
+    acorde = analizar_acorde(nombre)
+    return acorde.raiz, acorde.sufijo
 
 
 def _ajustar_octava(pitch: int) -> int:
@@ -110,8 +159,9 @@ def generar_voicings_enlazados_tradicional(progresion: List[str]) -> List[List[i
     bajo_anterior = 43  # G2
 
     for nombre in progresion:
-        root, suf = parsear_nombre_acorde(nombre)
-        intervalos = INTERVALOS_TRADICIONALES[suf][:4]
+        acorde = analizar_acorde(nombre)
+        root = acorde.raiz
+        intervalos = acorde.intervalos[:4]
         notas_base = [root + i for i in intervalos]
 
         candidatos: List[Tuple[int, int, List[int], int]] = []
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 """Utilities for generating piano voicings."""
 
+from functools import lru_cache
 from typing import Callable, Dict, List, Optional, Tuple
 import logging
 import re
 
+from .voicings import AcordeParseado, construir_acorde_parseado
+
 # ---------------------------------------------------------------------------
 # Pitch range limits for the generated voicings.  Notes are adjusted so that
 # they remain within this interval when building the linked voicings.
@@ -85,16 +88,27 @@ _SUFIJOS_PATRON = "|".join(re.escape(suf) for suf in _SUFIJOS_ORDENADOS)
 _PATRON_ACORDE = re.compile(rf'^([A-G][b#]?)(?:({_SUFIJOS_PATRON}))?$', re.ASCII)
 
 
-def parsear_nombre_acorde(nombre: str) -> Tuple[int, str]:
-    """Parse a chord name into root MIDI pitch class and suffix."""
+_RE_INVERSION_FORZADA = re.compile(r"/[1357]$")
+
 
-    base = re.sub(r"/[1357]$", "", nombre)
+@lru_cache(maxsize=1024)
+def analizar_acorde(nombre: str) -> AcordeParseado:
+    """Parse ``nombre`` against the extended table, memoising the record."""
+
+    base = _RE_INVERSION_FORZADA.sub("", nombre)
 
     m = _PATRON_ACORDE.match(base)
     if not m:
         raise ValueError(f"Acorde no reconocido: {nombre}")
     root, suf = m.group(1), m.group(2) or '∆'
-    return NOTAS[root], suf
+    return construir_acorde_parseado(NOTAS[root], suf, INTERVALOS_TRADICIONALES[suf])
+
+
+def parsear_nombre_acorde(nombre: str) -> Tuple[int, str]:
+    """Parse a chord name into root MIDI pitch class and suffix."""
+
+    acorde = analizar_acorde(nombre)
+    return acorde.raiz, acorde.sufijo
 
 
 IntervalSelector = Callable[[List[int]], Tuple[List[int], Dict[str, int]]]
@@ -125,79 +139,106 @@ def _selector_extendido(intervalos: List[int]) -> Tuple[List[int], Dict[str, int
     return seleccion, mapa
 
 
+_RE_INVERSION = re.compile(r"/([1357])$")
+_INVERSIONES = {'1': 'root', '3': 'third', '5': 'fifth', '7': 'seventh'}
+
+# Voicing de referencia: la primera nota es el bajo del que parte el enlace.
+_REFERENCIA = (55, 57, 60, 64)
+
+
+def _ajustar_cercano(pc: int, target: int) -> int:
+    """Return the pitch of class ``pc`` closest to ``target``."""
+
+    pitch = target + ((pc - target) % 12)
+    if abs(pitch - target) > abs(pitch - 12 - target):
+        pitch -= 12
+    return pitch
+
+
+@lru_cache(maxsize=4096)
+def _voicing_enlazado(
+    nombre: str,
+    inv_forzado: Optional[str],
+    bajo_anterior: int,
+    selector: IntervalSelector,
+) -> Tuple[Tuple[int, ...], int]:
+    """Return the voicing of ``nombre`` linked to ``bajo_anterior`` and its bass.
+
+    The result depends only on the arguments, and charts repeat the same few
+    chords over the same preceding bass, so transitions are memoised.
+    """
+
+    acorde = analizar_acorde(nombre)
+    root = acorde.raiz
+    ints, idx_map = selector(list(acorde.intervalos))
+    pcs = [(root + i) % 12 for i in ints]
+
+    if inv_forzado:
+        idx_lookup = idx_map.get(inv_forzado, idx_map.get('root', 0))
+        pc_bajo = pcs[idx_lookup]
+        bajo_tmp = _ajustar_cercano(pc_bajo, bajo_anterior)
+        bajo = _ajustar_octava_flexible(bajo_tmp, bajo_anterior)
+        restantes_pcs = [p for i, p in enumerate(pcs) if i != idx_lookup][:3]
+    else:
+        idx_y = min(2, len(pcs) - 1)
+        idx_z = min(3, len(pcs) - 1)
+        pc_y, pc_z = pcs[idx_y], pcs[idx_z]
+        cand_y = _ajustar_octava_flexible(_ajustar_cercano(pc_y, bajo_anterior), bajo_anterior)
+        cand_z = _ajustar_octava_flexible(_ajustar_cercano(pc_z, bajo_anterior), bajo_anterior)
+        if abs(cand_y - bajo_anterior) <= abs(cand_z - bajo_anterior):
+            bajo = cand_y
+            restantes_pcs = [pcs[0], pcs[1], pc_z]
+        else:
+            bajo = cand_z
+            restantes_pcs = [pcs[0], pcs[1], pc_y]
+
+    notas_restantes: List[int] = []
+    for pc, ref in zip(restantes_pcs, _REFERENCIA[1:]):
+        pitch = _ajustar_cercano(pc, ref)
+        while pitch <= bajo:
+            pitch += 12
+        pitch = _ajustar_octava(pitch)
+        while pitch <= bajo:
+            pitch += 12
+        notas_restantes.append(pitch)
+
+    voicing = sorted([bajo] + notas_restantes)
+
+    if root % 12 == 0:
+        alt_voicing = [n + 12 for n in voicing]
+        if abs(alt_voicing[0] - bajo_anterior) < abs(voicing[0] - bajo_anterior):
+            voicing = alt_voicing
+            bajo = voicing[0]
+
+    return tuple(voicing), bajo
+
+
 def _generar_voicings_enlazados(
     progresion: List[str],
     selector: IntervalSelector,
 ) -> List[List[int]]:
     """Generate linked voicings applying the provided interval selector."""
 
-    import pretty_midi
-
-    referencia = [55, 57, 60, 64]
+    depurar = logger.isEnabledFor(logging.DEBUG)
     voicings: List[List[int]] = []
-    bajo_anterior = referencia[0]
-
-    def ajustar(pc: int, target: int) -> int:
-        pitch = target + ((pc - target) % 12)
-        if abs(pitch - target) > abs(pitch - 12 - target):
-            pitch -= 12
-        return pitch
+    bajo_anterior = _REFERENCIA[0]
 
     for nombre in progresion:
         inv_forzado = None
-        m = re.search(r"/([1357])$", nombre)
+        m = _RE_INVERSION.search(nombre)
         if m:
-            inv_map = {'1': 'root', '3': 'third', '5': 'fifth', '7': 'seventh'}
-            inv_forzado = inv_map[m.group(1)]
+            inv_forzado = _INVERSIONES[m.group(1)]
             nombre = nombre[: m.start()]
 
-        root, suf = parsear_nombre_acorde(nombre)
-        ints_completos = INTERVALOS_TRADICIONALES[suf]
-        ints, idx_map = selector(ints_completos)
-        pcs = [(root + i) % 12 for i in ints]
-
-        if inv_forzado:
-            idx_lookup = idx_map.get(inv_forzado, idx_map.get('root', 0))
-            pc_bajo = pcs[idx_lookup]
-            bajo_tmp = ajustar(pc_bajo, bajo_anterior)
-            bajo = _ajustar_octava_flexible(bajo_tmp, bajo_anterior)
-            restantes_pcs = [p for i, p in enumerate(pcs) if i != idx_lookup][:3]
-        else:
-            idx_y = min(2, len(pcs) - 1)
-            idx_z = min(3, len(pcs) - 1)
-            pc_y, pc_z = pcs[idx_y], pcs[idx_z]
-            cand_y = _ajustar_octava_flexible(ajustar(pc_y, bajo_anterior), bajo_anterior)
-            cand_z = _ajustar_octava_flexible(ajustar(pc_z, bajo_anterior), bajo_anterior)
-            if abs(cand_y - bajo_anterior) <= abs(cand_z - bajo_anterior):
-                bajo = cand_y
-                restantes_pcs = [pcs[0], pcs[1], pc_z]
-            else:
-                bajo = cand_z
-                restantes_pcs = [pcs[0], pcs[1], pc_y]
-
-        notas_restantes: List[int] = []
-        for pc, ref in zip(restantes_pcs, referencia[1:]):
-            pitch = ajustar(pc, ref)
-            while pitch <= bajo:
-                pitch += 12
-            pitch = _ajustar_octava(pitch)
-            while pitch <= bajo:
-                pitch += 12
-            notas_restantes.append(pitch)
-
-        voicing = sorted([bajo] + notas_restantes)
-
-        if root % 12 == 0:
-            alt_voicing = [n + 12 for n in voicing]
-            if abs(alt_voicing[0] - bajo_anterior) < abs(voicing[0] - bajo_anterior):
-                voicing = alt_voicing
-                bajo = voicing[0]
-
-        voicings.append(voicing)
-        nombres = [pretty_midi.note_number_to_name(n) for n in voicing]
-        logger.debug("Voicing %s (%s): %s", nombre, suf, ", ".join(nombres))
-
-        bajo_anterior = bajo
+        voicing, bajo_anterior = _voicing_enlazado(nombre, inv_forzado, bajo_anterior, selector)
+        voicings.append(list(voicing))
+        if depurar:
+            import pretty_midi
+
+            nombres = [pretty_midi.note_number_to_name(n) for n in voicing]
+            logger.debug(
+                "Voicing %s (%s): %s", nombre, analizar_acorde(nombre).sufijo, ", ".join(nombres)
+            )
 
     return voicings
 
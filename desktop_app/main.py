@@ -34,7 +34,6 @@ except Exception:  # pragma: no cover - optional dependency
     ctk = None
 import threading
 import time
-import mido
 import pretty_midi
 import pygame.midi
 from typing import Dict, List, Optional, Tuple, Set
@@ -58,6 +57,7 @@ from .ui_config import (
     save_preferences,
 )
 
+from backend.midi_encoder import encode_midi, timed_messages
 from backend.montuno_core import CLAVES, generate_montuno, get_clave_tag
 from backend.modos import MODOS_DISPONIBLES
 
@@ -298,6 +298,20 @@ class NumberedChordInput(Frame):
         self.numbers.configure(scrollregion=(0, 0, 0, y))
 
 
+def _aviso_modo(modo_combo: ComboBox, armon_combo: ComboBox) -> str:
+    """Suffix for status messages when the selected mode is not salsa.
+
+    ``generate_montuno`` only drives the salsa engine, which takes neither the
+    mode nor the harmonisation of ``modo_combo``/``armon_combo``.
+    """
+
+    modo = MODOS_INV.get(modo_combo.get(), modo_combo.get())
+    if modo == "Salsa":
+        return ""
+    armonizacion = ARMONIZACION_INV.get(armon_combo.get(), armon_combo.get())
+    return f" (sólo salsa: se ignoran el modo {modo} y la armonización {armonizacion})"
+
+
 def generar(
     status_var: StringVar,
     clave_var: StringVar,
@@ -308,7 +322,6 @@ def generar(
     armon_combo: ComboBox,
     *,
     inversiones_custom: Optional[List[str]] = None,
-    armonias_custom: Optional[List[str]] = None,
     return_pm: bool = False,
     output_path: Optional[Path] = None,
     override_text: Optional[str] = None,
@@ -328,21 +341,14 @@ def generar(
         status_var.set("Ingresa una progresión de acordes")
         return None
 
-    modo_nombre = MODOS_INV.get(modo_combo.get(), modo_combo.get())
-    armonizacion_default = ARMONIZACION_INV.get(armon_combo.get(), armon_combo.get())
     variacion = variacion_var.get()
     inversion = limpiar_inversion(inversion_var.get())
-    armonias_seq = armonias_custom if armonias_custom is not None else list(chord_armos)
     bpm_val = bpm if bpm is not None else 120.0
 
     try:
         resultado = generate_montuno(
             progresion_texto,
             clave_config=cfg,
-            modo_default=modo_nombre,
-            modo_por_acorde=list(chord_styles),
-            armonias_por_indice=armonias_seq,
-            armonizacion_default=armonizacion_default,
             variacion=variacion,
             inversion=inversion,
             reference_root=REFERENCE_ROOT,
@@ -351,10 +357,13 @@ def generar(
             seed=seed,
             bpm=bpm_val,
             return_pm=return_pm,
+            trace=logger.isEnabledFor(logging.DEBUG),
         )
     except Exception as exc:
         status_var.set(str(exc))
         return None
+    if resultado.timings:
+        logger.debug("Tiempos por etapa: %s", resultado.timings)
 
     global CONTADOR_MONTUNO
     output_dir = Path.home() / "Desktop" / "montunos"
@@ -369,8 +378,8 @@ def generar(
         return resultado.midi
 
     try:
-        resultado.midi.write(str(output))
-        status_var.set(f"MIDI generado: {output}")
+        output.write_bytes(encode_midi(resultado.midi))
+        status_var.set(f"MIDI generado: {output}{_aviso_modo(modo_combo, armon_combo)}")
     except Exception as exc:
         status_var.set(f"Error: {exc}")
     return None
@@ -1222,7 +1231,6 @@ def main():
             modo_combo,
             armon_combo,
             inversiones_custom=current_inversions,
-            armonias_custom=chord_armos,
             return_pm=True,
             output_path=None,
             override_text=prog_mod,
@@ -1232,12 +1240,10 @@ def main():
         )
         if pm_preview is not None:
             _draw_piano_roll(pm_preview, asign, highlight_idx)
-            status_var.set("Vista actualizada")
+            status_var.set(f"Vista actualizada{_aviso_modo(modo_combo, armon_combo)}")
 
     def reproducir_preview() -> None:
         import time
-        import mido
-        from tempfile import TemporaryDirectory
 
         # Asegúrate de que pm_preview esté generado
         if pm_preview is None:
@@ -1258,65 +1264,55 @@ def main():
             grid = 60.0 / preview_bpm / 2
             start_time = PLAYHEAD_POS * grid
 
-            with TemporaryDirectory() as td:
-                path = Path(td) / "prev.mid"
-                pm.write(str(path))
-                mid = mido.MidiFile(str(path))
-
-                messages = []
-                cur = 0.0
-                for msg in mid:
-                    cur += msg.time * scale
-                    messages.append((cur, msg))
-                midi_state["messages"] = messages
-                midi_state["current_idx"] = 0
-                midi_state["start_wall"] = time.time()
-                midi_state["start_time"] = start_time
-                midi_state["grid"] = grid
-
-                port = _ensure_port()
-                if port is None:
-                    status_var.set("No hay dispositivo MIDI disponible")
+            messages = [(t * scale, data) for t, data in timed_messages(pm)]
+            midi_state["messages"] = messages
+            midi_state["current_idx"] = 0
+            midi_state["start_wall"] = time.time()
+            midi_state["start_time"] = start_time
+            midi_state["grid"] = grid
+
+            port = _ensure_port()
+            if port is None:
+                status_var.set("No hay dispositivo MIDI disponible")
+                return
+
+            def process_next():
+                if midi_state.get("stop"):
+                    try:
+                        port.write_short(0xB0, 0x7B, 0)
+                    except Exception:
+                        pass
+                    status_var.set("Playback detenido.")
                     return
 
-                def process_next():
-                    if midi_state.get("stop"):
-                        try:
-                            port.write_short(0xB0, 0x7B, 0)
-                        except Exception:
-                            pass
-                        status_var.set("Playback detenido.")
-                        return
-
-                    idx = midi_state["current_idx"]
-                    if idx >= len(messages):
-                        try:
-                            port.write_short(0xB0, 0x7B, 0)
-                        except Exception:
-                            pass
-                        status_var.set("Playback finalizado.")
-                        return
-
-                    cur, msg = messages[idx]
-                    elapsed = time.time() - midi_state["start_wall"]
-                    wait = (cur - start_time) - elapsed
-                    if wait > 0:
-                        root.after(int(wait * 1000), process_next)
-                        return
-
-                    if not msg.is_meta:
-                        port.write_short(*msg.bytes())
-                    pos = (cur - start_time) / grid
-                    x = pos * CELL_WIDTH
-                    root.after(0, lambda px=x: canvas.coords(PLAYHEAD_LINE, px, 20, px, PLAYHEAD_HEIGHT))
-                    midi_state["current_idx"] += 1
-                    root.after(1, process_next)
-
-                midi_state["stop"] = False
-                midi_state["current_idx"] = 0
-                midi_state["start_wall"] = time.time()
-                process_next()
-                status_var.set("Preview iniciado.")
+                idx = midi_state["current_idx"]
+                if idx >= len(messages):
+                    try:
+                        port.write_short(0xB0, 0x7B, 0)
+                    except Exception:
+                        pass
+                    status_var.set("Playback finalizado.")
+                    return
+
+                cur, msg = messages[idx]
+                elapsed = time.time() - midi_state["start_wall"]
+                wait = (cur - start_time) - elapsed
+                if wait > 0:
+                    root.after(int(wait * 1000), process_next)
+                    return
+
+                port.write_short(*msg)
+                pos = (cur - start_time) / grid
+                x = pos * CELL_WIDTH
+                root.after(0, lambda px=x: canvas.coords(PLAYHEAD_LINE, px, 20, px, PLAYHEAD_HEIGHT))
+                midi_state["current_idx"] += 1
+                root.after(1, process_next)
+
+            midi_state["stop"] = False
+            midi_state["current_idx"] = 0
+            midi_state["start_wall"] = time.time()
+            process_next()
+            status_var.set("Preview iniciado.")
 
         play_preview(pm_preview)
 
@@ -1686,7 +1682,6 @@ def main():
             modo_combo,
             armon_combo,
             inversiones_custom=current_inversions,
-            armonias_custom=chord_armos,
             override_text=_normalise_bars(texto.text.get("1.0", "end")),
             manual_edits=manual_edits,
             seed=current_seed,
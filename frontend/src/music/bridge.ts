@@ -22,26 +22,50 @@ export interface RawGenerationInput {
     end: number;
     pitch: number;
   }[];
+  /** Collect per-stage timings in the Python engine (see backend/instrumentation.py). */
+  trace?: boolean;
+  /** Variation the next generation will probably use; its loops are loaded once this one is done. */
+  prefetchVariation?: AppState['variation'] | null;
+}
+
+export type StageTimings = Record<string, Record<string, number>>;
+
+/** Rendered notes in MIDI ticks, one entry per note across the parallel arrays. */
+export interface NoteColumns {
+  pitch: Uint8Array;
+  start: Int32Array;
+  end: Int32Array;
+  velocity: Uint8Array;
 }
 
 export interface RawGenerationResult {
-  midi_base64: string;
+  notes: NoteColumns;
+  /** Ticks per beat of ``notes`` and ``midi``. */
+  ppq: number;
+  /** Standard MIDI File bytes, used for export and the signal viewer. */
+  midi: Uint8Array;
   modo_tag: string;
   clave_tag: string;
   max_eighths: number;
   reference_files: string[];
+  timings?: StageTimings | null;
 }
 
-interface WorkerRequest {
-  id: number;
-  type: 'generate';
-  payload: RawGenerationInput & { baseUrl: string };
+/** How the worker started Pyodide: milliseconds per stage and whether the FS snapshot was reused. */
+export interface StartupReport {
+  snapshot: 'hit' | 'miss' | 'unavailable';
+  stages: Record<string, number>;
+  totalMs: number;
 }
 
+type WorkerRequest =
+  | { id: number; type: 'generate'; payload: RawGenerationInput & { baseUrl: string } }
+  | { id: number; type: 'warmup'; payload: { baseUrl: string } };
+
 interface WorkerSuccess {
   id: number;
   success: true;
-  result: RawGenerationResult;
+  result: RawGenerationResult | StartupReport;
 }
 
 interface WorkerFailure {
@@ -53,7 +77,7 @@ interface WorkerFailure {
 type WorkerResponse = WorkerSuccess | WorkerFailure;
 
 type PendingEntry = {
-  resolve: (value: RawGenerationResult) => void;
+  resolve: (value: any) => void;
   reject: (reason: Error) => void;
 };
 
@@ -86,17 +110,23 @@ function getWorker(): Worker {
   return workerInstance;
 }
 
-export function generateMontunoRaw(input: RawGenerationInput, baseUrl: string): Promise<RawGenerationResult> {
+function request<T>(message: WorkerRequest): Promise<T> {
   const worker = getWorker();
-  const id = ++requestCounter;
-  const payload: WorkerRequest = {
-    id,
+  return new Promise<T>((resolve, reject) => {
+    pending.set(message.id, { resolve, reject });
+    worker.postMessage(message);
+  });
+}
+
+export function generateMontunoRaw(input: RawGenerationInput, baseUrl: string): Promise<RawGenerationResult> {
+  return request<RawGenerationResult>({
+    id: ++requestCounter,
     type: 'generate',
     payload: { ...input, baseUrl },
-  };
-
-  return new Promise<RawGenerationResult>((resolve, reject) => {
-    pending.set(id, { resolve, reject });
-    worker.postMessage(payload);
   });
 }
+
+/** Create the worker and boot Pyodide ahead of the first generation. */
+export function warmUpMontunoWorker(baseUrl: string): Promise<StartupReport> {
+  return request<StartupReport>({ id: ++requestCounter, type: 'warmup', payload: { baseUrl } });
+}
@@ -1,4 +1,4 @@
-import type { RawGenerationResult } from './bridge';
+import type { NoteColumns, RawGenerationResult } from './bridge';
 
 const MIDI_BASE64 =
 
@@ -48,10 +48,40 @@ const MIDI_BASE64 =
   'AAE0AApDADKQMlsAPl8ASltdgDJAAEoAKj4AaZAwVgA8YgBIVoI0gEgATDwANjAAKpA0TgBAW4FwN1cAQ1oMgDQADUAAa0MANTcAN5AvVgA7WQBHW3WAOwAG'
   'RwAJLwBskC9WADtVAEddXIA7AAtHABIvAHeQL1YAO1UAR15TgDsADUcAFy8AeZAwVgA8XQBIZYFmgDwAG0gAgV8wAIGWAP8vAA==';
 
-export const FALLBACK_RAW_RESULT: RawGenerationResult = {
-  midi_base64: MIDI_BASE64.replace(/\n/g, ''),
-  modo_tag: 'Salsa (fallback)',
-  clave_tag: 'Clave 2-3 (fallback)',
-  max_eighths: 16,
-  reference_files: ['fallback/salsa_2-3_root_A.mid'],
-};
+function decodeBase64(base64: string): Uint8Array {
+  const binaryString = globalThis.atob(base64);
+  const bytes = new Uint8Array(binaryString.length);
+  for (let i = 0; i < binaryString.length; i += 1) {
+    bytes[i] = binaryString.charCodeAt(i);
+  }
+  return bytes;
+}
+
+/** Read the notes of a MIDI file into the columns the worker sends. */
+export async function noteColumnsFromMidi(midiData: Uint8Array): Promise<{ notes: NoteColumns; ppq: number }> {
+  // Only the fallback needs a MIDI parser, so it stays out of the main bundle.
+  const { Midi } = await import('@tonejs/midi');
+  const midi = new Midi(midiData);
+  const parsed = midi.tracks.flatMap((track) => track.notes);
+  return {
+    notes: {
+      pitch: Uint8Array.from(parsed, (note) => note.midi),
+      start: Int32Array.from(parsed, (note) => note.ticks),
+      end: Int32Array.from(parsed, (note) => note.ticks + note.durationTicks),
+      velocity: Uint8Array.from(parsed, (note) => Math.round(note.velocity * 127)),
+    },
+    ppq: midi.header.ppq || 480,
+  };
+}
+
+export async function loadFallbackRawResult(): Promise<RawGenerationResult> {
+  const midi = decodeBase64(MIDI_BASE64.replace(/\n/g, ''));
+  return {
+    ...(await noteColumnsFromMidi(midi)),
+    midi,
+    modo_tag: 'Salsa (fallback)',
+    clave_tag: 'Clave 2-3 (fallback)',
+    max_eighths: 16,
+    reference_files: ['fallback/salsa_2-3_root_A.mid'],
+  };
+}
@@ -1,25 +1,28 @@
 import { beforeEach, describe, expect, it, vi } from 'vitest';
-import { Midi } from '@tonejs/midi';
 
-import { generateMontuno } from './generator';
+import { generateMontuno, warmUpGenerator } from './generator';
 import type { AppState } from '../types';
-import { FALLBACK_RAW_RESULT } from './fallbackResult';
+import type { RawGenerationResult } from './bridge';
 import { deriveApproachNotes } from './approachNotes';
 
 const mockedGenerateMontunoRaw = vi.hoisted(() => vi.fn());
+const mockedWarmUpMontunoWorker = vi.hoisted(() => vi.fn());
 
 vi.mock('./bridge', () => ({
   generateMontunoRaw: mockedGenerateMontunoRaw,
+  warmUpMontunoWorker: mockedWarmUpMontunoWorker,
 }));
 
-function buildFixture() {
-  const midi = new Midi();
-  midi.addTrack().addNote({ midi: 60, time: 0, duration: 0.5, velocity: 0.8 });
-  const buffer = midi.toArray();
-  const base64 = Buffer.from(buffer).toString('base64');
+function buildFixture(): RawGenerationResult {
   return {
-    ...FALLBACK_RAW_RESULT,
-    midi_base64: base64,
+    notes: {
+      pitch: Uint8Array.of(60),
+      start: Int32Array.of(0),
+      end: Int32Array.of(480),
+      velocity: Uint8Array.of(102),
+    },
+    ppq: 480,
+    midi: Uint8Array.of(0x4d, 0x54, 0x68, 0x64),
     modo_tag: 'salsa',
     clave_tag: '2-3',
     max_eighths: 8,
@@ -128,6 +131,12 @@ describe('generateMontuno', () => {
     );
   });
 
+  it('pasa al worker la variación que conviene precargar', async () => {
+    await generateMontuno(baseState, { prefetchVariation: 'C' });
+    const [payload] = mockedGenerateMontunoRaw.mock.calls.at(-1) ?? [];
+    expect(payload).toMatchObject({ variation: 'A', prefetchVariation: 'C' });
+  });
+
   it('calcula la duración en segundos en función de los corcheas máximos', async () => {
     const result = await generateMontuno(baseState);
     const expectedSeconds = fixture.max_eighths * (60 / baseState.bpm / 2);
@@ -168,23 +177,43 @@ describe('generateMontuno', () => {
   });
 
   it('recorta notas superpuestas cuando cambian los modos por acorde', async () => {
-    const midi = new Midi();
-    const track = midi.addTrack();
-    track.addNote({ midi: 60, ticks: 0, durationTicks: 480, velocity: 0.8 });
-    track.addNote({ midi: 60, ticks: 360, durationTicks: 480, velocity: 0.7 });
-    const buffer = midi.toArray();
-    const base64 = Buffer.from(buffer).toString('base64');
-
     mockedGenerateMontunoRaw.mockResolvedValueOnce({
       ...fixture,
-      midi_base64: base64,
-      max_eighths: 8,
+      notes: {
+        pitch: Uint8Array.of(60, 60),
+        start: Int32Array.of(0, 360),
+        end: Int32Array.of(480, 840),
+        velocity: Uint8Array.of(102, 89),
+      },
     });
 
     const result = await generateMontuno(baseState);
 
     expect(result.events).toHaveLength(2);
-    expect(result.events[0]).toMatchObject({ time: 0, duration: 0.75 });
+    expect(result.events[0]).toMatchObject({ time: 0, duration: 0.75, velocity: 102 / 127 });
     expect(result.events[1]).toMatchObject({ time: 0.75 });
   });
+
+  it('usa el MIDI de respaldo cuando el worker falla', async () => {
+    vi.spyOn(console, 'warn').mockImplementation(() => {});
+    mockedGenerateMontunoRaw.mockRejectedValueOnce(new Error('sin Pyodide'));
+
+    const result = await generateMontuno(baseState);
+
+    expect(result.modoTag).toBe('Salsa (respaldo)');
+    expect(result.events.length).toBeGreaterThan(0);
+    expect(result.events.every((event) => event.duration > 0)).toBe(true);
+    expect(result.midiData.byteLength).toBeGreaterThan(0);
+  });
+
+  it('precalienta el worker y tolera que el arranque falle', async () => {
+    const report = { snapshot: 'hit', stages: { runtime: 900, restore: 40 }, totalMs: 1100 };
+    mockedWarmUpMontunoWorker.mockResolvedValueOnce(report);
+    await expect(warmUpGenerator()).resolves.toEqual(report);
+    expect(mockedWarmUpMontunoWorker).toHaveBeenCalledWith(expect.any(String));
+
+    vi.spyOn(console, 'warn').mockImplementation(() => {});
+    mockedWarmUpMontunoWorker.mockRejectedValueOnce(new Error('sin red'));
+    await expect(warmUpGenerator()).resolves.toBeNull();
+  });
 });
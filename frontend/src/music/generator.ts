@@ -1,8 +1,7 @@
-import { Midi } from '@tonejs/midi';
 import { applyChordReplacements } from './chordNormalizer';
-import { generateMontunoRaw } from './bridge';
-import type { RawGenerationResult } from './bridge';
-import { FALLBACK_RAW_RESULT } from './fallbackResult';
+import { generateMontunoRaw, warmUpMontunoWorker } from './bridge';
+import type { RawGenerationResult, StartupReport } from './bridge';
+import { loadFallbackRawResult } from './fallbackResult';
 import type { AppState, GenerationResult, NoteEvent } from '../types';
 import { normaliseProgressionText } from '../utils/progression';
 import { resolveInversionChain } from './inversions';
@@ -28,8 +27,41 @@ async function withTimeout<T>(
   }
 }
 
-export async function generateMontuno(state: AppState): Promise<GenerationResult> {
-  const baseUrl = typeof import.meta.env.BASE_URL === 'string' ? import.meta.env.BASE_URL : '/';
+function resolveBaseUrl(): string {
+  return typeof import.meta.env.BASE_URL === 'string' ? import.meta.env.BASE_URL : '/';
+}
+
+function isAutomation(): boolean {
+  return typeof navigator !== 'undefined' && navigator.webdriver;
+}
+
+/**
+ * Boot the Pyodide worker before the first generation.  Failures are only
+ * logged: the generation request retries the start-up and falls back as usual.
+ */
+export async function warmUpGenerator(): Promise<StartupReport | null> {
+  if (isAutomation()) {
+    return null;
+  }
+  try {
+    const report = await warmUpMontunoWorker(resolveBaseUrl());
+    if (import.meta.env.DEV) {
+      console.debug(`Arranque de Pyodide (instantánea: ${report.snapshot})`, report.stages, report.totalMs);
+    }
+    return report;
+  } catch (error) {
+    console.warn('No se pudo precalentar el generador.', error);
+    return null;
+  }
+}
+
+export interface GenerateOptions {
+  /** Variation of the following generation, so the worker can load its loops in advance. */
+  prefetchVariation?: AppState['variation'] | null;
+}
+
+export async function generateMontuno(state: AppState, options: GenerateOptions = {}): Promise<GenerationResult> {
+  const baseUrl = resolveBaseUrl();
   const seed = resolveSeed(state.seed);
   const progressionNormalised = applyChordReplacements(normaliseProgressionText(state.progressionInput));
   const resolvedInversions = resolveInversionChain(state.chords, state.inversionDefault);
@@ -49,10 +81,9 @@ export async function generateMontuno(state: AppState): Promise<GenerationResult
   }));
 
   let raw: RawGenerationResult;
-  const isAutomation = typeof navigator !== 'undefined' && navigator.webdriver;
-  if (isAutomation) {
+  if (isAutomation()) {
     raw = {
-      ...FALLBACK_RAW_RESULT,
+      ...(await loadFallbackRawResult()),
       modo_tag: 'Salsa (automatizado)',
       clave_tag: `${state.clave} (automatizado)`,
     } satisfies RawGenerationResult;
@@ -71,6 +102,8 @@ export async function generateMontuno(state: AppState): Promise<GenerationResult
             chords,
             referenceRoot: REFERENCE_ROOT,
             manualEdits,
+            trace: import.meta.env.DEV,
+            prefetchVariation: options.prefetchVariation ?? null,
           },
           baseUrl
         ),
@@ -80,34 +113,18 @@ export async function generateMontuno(state: AppState): Promise<GenerationResult
     } catch (error) {
       console.warn('Fallo al generar el montuno con Pyodide, usando resultado de respaldo.', error);
       raw = {
-        ...FALLBACK_RAW_RESULT,
+        ...(await loadFallbackRawResult()),
         modo_tag: 'Salsa (respaldo)',
         clave_tag: `${state.clave} (respaldo)`,
       } satisfies RawGenerationResult;
     }
   }
 
-  const midiData = base64ToUint8Array(raw.midi_base64);
-  const buffer = midiData.buffer.slice(midiData.byteOffset, midiData.byteOffset + midiData.byteLength);
-  const midi = new Midi(buffer);
-  const ppq = midi.header.ppq || 480;
-  const events: NoteEvent[] = [];
+  if (raw.timings) {
+    console.debug('Tiempos del generador por etapa', raw.timings);
+  }
 
-  midi.tracks.forEach((track) => {
-    track.notes.forEach((note) => {
-      if (note.midi <= 0) {
-        return;
-      }
-      const timeBeats = note.ticks / ppq;
-      const durationBeats = note.durationTicks / ppq;
-      events.push({
-        time: timeBeats,
-        duration: durationBeats,
-        midi: note.midi,
-        velocity: note.velocity,
-      });
-    });
-  });
+  const events = eventsFromColumns(raw);
 
   events.sort((a, b) => {
     if (a.time === b.time) {
@@ -127,7 +144,7 @@ export async function generateMontuno(state: AppState): Promise<GenerationResult
     lengthBars,
     bpm: state.bpm,
     durationSeconds,
-    midiData,
+    midiData: raw.midi,
     modoTag: raw.modo_tag,
     claveTag: raw.clave_tag,
     maxEighths: raw.max_eighths,
@@ -135,13 +152,21 @@ export async function generateMontuno(state: AppState): Promise<GenerationResult
   } satisfies GenerationResult;
 }
 
-function base64ToUint8Array(base64: string): Uint8Array {
-  const binaryString = globalThis.atob(base64);
-  const bytes = new Uint8Array(binaryString.length);
-  for (let i = 0; i < binaryString.length; i += 1) {
-    bytes[i] = binaryString.charCodeAt(i);
+function eventsFromColumns(raw: RawGenerationResult): NoteEvent[] {
+  const { pitch, start, end, velocity } = raw.notes;
+  const events: NoteEvent[] = [];
+  for (let i = 0; i < pitch.length; i += 1) {
+    if (pitch[i] <= 0) {
+      continue;
+    }
+    events.push({
+      time: start[i] / raw.ppq,
+      duration: (end[i] - start[i]) / raw.ppq,
+      midi: pitch[i],
+      velocity: velocity[i] / 127,
+    });
   }
-  return bytes;
+  return events;
 }
 
 function trimOverlappingNotes(events: NoteEvent[]): NoteEvent[] {
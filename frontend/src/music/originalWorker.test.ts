@@ -0,0 +1,77 @@
+import { describe, expect, it, vi } from 'vitest';
+
+vi.mock('./pythonSources', () => ({
+  PYTHON_SOURCES: { 'backend/__init__.py': '' },
+  PYTHON_DATA_FILES: {},
+}));
+
+vi.mock('./referenceLoops', () => ({
+  getReferenceLoop: vi.fn(),
+  hasReferenceLoop: () => false,
+}));
+
+vi.mock('./wheels/mido-1.3.3-py3-none-any.whl?url', () => ({
+  default: '/mido-1.3.3-py3-none-any.whl',
+}));
+
+function buildFakePyodide() {
+  const resultProxy = {
+    toJs: () => ({
+      notes: {
+        pitch: Uint8Array.of(60),
+        start: Int32Array.of(0),
+        end: Int32Array.of(480),
+        velocity: Uint8Array.of(102),
+      },
+      ppq: 480,
+      midi: Uint8Array.of(0x4d, 0x54, 0x68, 0x64),
+      modo_tag: 'salsa',
+    }),
+    destroy: vi.fn(),
+  };
+  const globals: Record<string, unknown> = {
+    _precompile: Object.assign(vi.fn(), { destroy: vi.fn() }),
+    web_generate: vi.fn(async () => resultProxy),
+    web_reference_loops: () => '[]',
+  };
+  return {
+    runPython: (code: string) => (code.includes('sysconfig') ? '/lib/python3.11/site-packages' : undefined),
+    runPythonAsync: vi.fn(async () => undefined),
+    globals: { get: (name: string) => globals[name] },
+    FS: { mkdir: vi.fn(), writeFile: vi.fn(), stat: vi.fn() },
+    loadPackage: vi.fn(async () => undefined),
+    unpackArchive: vi.fn(),
+  };
+}
+
+describe('originalWorker', () => {
+  it('reintenta el arranque de Pyodide tras un precalentamiento fallido', async () => {
+    vi.spyOn(console, 'warn').mockImplementation(() => {});
+    vi.stubGlobal('fetch', vi.fn(async () => new Response(new ArrayBuffer(0))));
+    const loadPyodide = vi
+      .fn()
+      .mockRejectedValueOnce(new Error('CDN no disponible'))
+      .mockResolvedValueOnce(buildFakePyodide());
+    const postMessage = vi.fn();
+    Object.assign(self, { loadPyodide, postMessage });
+
+    await import('./originalWorker');
+    const dispatch = self.onmessage as (event: { data: unknown }) => void;
+
+    dispatch({ data: { id: 1, type: 'warmup', payload: { baseUrl: '/' } } });
+    await vi.waitFor(() => expect(postMessage).toHaveBeenCalledTimes(1));
+    expect(postMessage).toHaveBeenLastCalledWith({ id: 1, success: false, error: 'CDN no disponible' });
+
+    dispatch({
+      data: {
+        id: 2,
+        type: 'generate',
+        payload: { baseUrl: '/', referenceRoot: 'backend/reference_midi_loops', clave: 'Clave 2-3', variation: 'A' },
+      },
+    });
+    await vi.waitFor(() => expect(postMessage).toHaveBeenCalledTimes(2));
+    expect(loadPyodide).toHaveBeenCalledTimes(2);
+    expect(postMessage.mock.calls[1][0]).toMatchObject({ id: 2, success: true, result: { modo_tag: 'salsa' } });
+    vi.unstubAllGlobals();
+  });
+});
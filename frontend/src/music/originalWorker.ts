@@ -1,18 +1,44 @@
 /// <reference lib="webworker" />
 
 import { PYTHON_DATA_FILES, PYTHON_SOURCES } from './pythonSources';
-import { REFERENCE_LOOP_FILES, getReferenceLoop } from './referenceLoops';
+import { getReferenceLoop, hasReferenceLoop } from './referenceLoops';
+import midoWheelUrl from './wheels/mido-1.3.3-py3-none-any.whl?url';
+
+const PYODIDE_INDEX_URL = 'https://cdn.jsdelivr.net/pyodide/v0.24.1/full/';
+const SNAPSHOT_CACHE = 'montuno-pyodide-snapshot';
+// Directories (relative to the Pyodide home) that make up the snapshot besides mido.
+const SNAPSHOT_DIRECTORIES = ['backend', 'pretty_midi', 'shared'];
 
 interface GenerateMessage {
   id: number;
   type: 'generate';
-  payload: Record<string, unknown> & { baseUrl: string; referenceRoot: string };
+  payload: Record<string, unknown> & {
+    baseUrl: string;
+    referenceRoot: string;
+    clave: string;
+    variation: string;
+    prefetchVariation?: string | null;
+  };
+}
+
+interface WarmupMessage {
+  id: number;
+  type: 'warmup';
+  payload: { baseUrl: string };
+}
+
+type WorkerMessage = GenerateMessage | WarmupMessage;
+
+interface StartupReport {
+  snapshot: 'hit' | 'miss' | 'unavailable';
+  stages: Record<string, number>;
+  totalMs: number;
 }
 
 interface SuccessResponse {
   id: number;
   success: true;
-  result: Record<string, unknown>;
+  result: Record<string, unknown> | StartupReport;
 }
 
 interface ErrorResponse {
@@ -24,6 +50,7 @@ interface ErrorResponse {
 type WorkerResponse = SuccessResponse | ErrorResponse;
 
 type PyodideInterface = {
+  runPython: (code: string) => any;
   runPythonAsync: (code: string) => Promise<any>;
   globals: Map<string, any> & { get: (name: string) => any };
   FS: {
@@ -32,14 +59,24 @@ type PyodideInterface = {
     stat: (path: string) => any;
   };
   loadPackage: (names: string | string[]) => Promise<void>;
+  unpackArchive: (buffer: ArrayBuffer, format: string, options?: { extractDir?: string }) => void;
+};
+
+type Snapshot = {
+  cache: Cache | null;
+  key: string;
+  data: ArrayBuffer | null;
 };
 
 type WebGenerateFn = (payloadJson: string) => Promise<any>;
+type WebReferenceLoopsFn = (clave: string, variation: string) => string;
 
 const ctx: DedicatedWorkerGlobalScope & { loadPyodide?: (options: { indexURL: string }) => Promise<PyodideInterface> } = self as any;
 
 let pyodideReady: Promise<PyodideInterface> | null = null;
 let webGenerateFn: WebGenerateFn | null = null;
+let webReferenceLoopsFn: WebReferenceLoopsFn | null = null;
+let startupReport: StartupReport | null = null;
 const loadedReferenceFiles = new Set<string>();
 
 type PyodideLoaderModule = {
@@ -51,8 +88,8 @@ async function ensurePyodideLoader(): Promise<void> {
     return;
   }
 
-  const moduleUrl = 'https://cdn.jsdelivr.net/pyodide/v0.24.1/full/pyodide.mjs';
-  const scriptUrl = 'https://cdn.jsdelivr.net/pyodide/v0.24.1/full/pyodide.js';
+  const moduleUrl = `${PYODIDE_INDEX_URL}pyodide.mjs`;
+  const scriptUrl = `${PYODIDE_INDEX_URL}pyodide.js`;
   let lastError: unknown = null;
 
   if (!ctx.loadPyodide) {
@@ -113,35 +150,178 @@ function writeBinaryFile(pyodide: PyodideInterface, path: string, data: Uint8Arr
   pyodide.FS.writeFile(path, data);
 }
 
+async function timed<T>(stages: Record<string, number>, name: string, fn: () => T | Promise<T>): Promise<T> {
+  const startedAt = performance.now();
+  try {
+    return await fn();
+  } finally {
+    stages[name] = performance.now() - startedAt;
+  }
+}
+
+// Python helpers for the snapshot.  Bytecode is written with unchecked hashes:
+// restored sources get fresh mtimes, and the snapshot key already changes
+// whenever a source does.
+const STARTUP_HELPERS = [
+  'import compileall, importlib, io, os, py_compile, tarfile',
+  '',
+  'def _precompile(paths):',
+  '    for path in paths:',
+  '        if os.path.isdir(path):',
+  '            compileall.compile_dir(path, quiet=1, invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)',
+  '',
+  'def _without_loops(info):',
+  '    # Reference loops are written per request, never snapshotted.',
+  '    return None if "reference_midi_loops" in info.name else info',
+  '',
+  'def _snapshot_archive(paths):',
+  '    buffer = io.BytesIO()',
+  '    with tarfile.open(fileobj=buffer, mode="w") as tar:',
+  '        for path in paths:',
+  '            if os.path.exists(path):',
+  '                tar.add(os.path.abspath(path), filter=_without_loops)',
+  '    return buffer.getvalue()',
+].join('\n');
+
+function snapshotRoots(sitePackages: string): string[] {
+  return [...SNAPSHOT_DIRECTORIES, `${sitePackages}/mido`, `${sitePackages}/mido-1.3.3.dist-info`];
+}
+
+async function snapshotKey(): Promise<string> {
+  const parts = [PYODIDE_INDEX_URL, midoWheelUrl];
+  for (const files of [PYTHON_SOURCES, PYTHON_DATA_FILES]) {
+    for (const [path, source] of Object.entries(files)) {
+      parts.push(path, source);
+    }
+  }
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(parts.join('\0')));
+  const hex = Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+  return new URL(`pyodide-snapshot/${hex}.tar`, ctx.location.href).href;
+}
+
+async function lookupSnapshot(): Promise<Snapshot> {
+  try {
+    const key = await snapshotKey();
+    const cache = await ctx.caches.open(SNAPSHOT_CACHE);
+    const response = await cache.match(key);
+    return { cache, key, data: response ? await response.arrayBuffer() : null };
+  } catch (error) {
+    // Insecure contexts have neither crypto.subtle nor the Cache API.
+    console.warn('Cache API no disponible, Pyodide arrancará sin instantánea.', error);
+    return { cache: null, key: '', data: null };
+  }
+}
+
+function restoreSnapshot(pyodide: PyodideInterface, snapshot: Snapshot): boolean {
+  try {
+    pyodide.unpackArchive(snapshot.data!, 'tar', { extractDir: '/' });
+    pyodide.runPython(STARTUP_HELPERS);
+    pyodide.runPython('importlib.invalidate_caches()');
+    return true;
+  } catch (error) {
+    console.warn('Instantánea de Pyodide inválida, se reconstruye.', error);
+    void snapshot.cache?.delete(snapshot.key);
+    return false;
+  }
+}
+
+async function saveSnapshot(pyodide: PyodideInterface, snapshot: Snapshot, roots: string[]): Promise<void> {
+  try {
+    const archiveProxy = pyodide.globals.get('_snapshot_archive')(roots);
+    const archive: Uint8Array = archiveProxy.toJs();
+    archiveProxy.destroy();
+    for (const request of await snapshot.cache!.keys()) {
+      await snapshot.cache!.delete(request);
+    }
+    await snapshot.cache!.put(snapshot.key, new Response(archive, { headers: { 'Content-Type': 'application/x-tar' } }));
+  } catch (error) {
+    console.warn('No se pudo guardar la instantánea de Pyodide.', error);
+  }
+}
+
+async function installMido(pyodide: PyodideInterface, sitePackages: string): Promise<void> {
+  try {
+    const response = await fetch(midoWheelUrl);
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+    pyodide.unpackArchive(await response.arrayBuffer(), 'wheel', { extractDir: sitePackages });
+  } catch (error) {
+    console.warn('No se pudo instalar mido desde la rueda local, usando micropip.', error);
+    await pyodide.loadPackage('micropip');
+    await pyodide.runPythonAsync('import micropip\nawait micropip.install(["mido"])');
+  }
+  pyodide.runPython(STARTUP_HELPERS);
+  pyodide.runPython('importlib.invalidate_caches()');
+}
+
 async function ensurePyodide(_baseUrl: string): Promise<PyodideInterface> {
   if (!pyodideReady) {
     pyodideReady = (async () => {
-      await ensurePyodideLoader();
-      const pyodide = await ctx.loadPyodide!({ indexURL: 'https://cdn.jsdelivr.net/pyodide/v0.24.1/full/' });
-      await pyodide.loadPackage(['micropip', 'numpy', 'scipy']);
-      await pyodide.runPythonAsync('import micropip\nawait micropip.install(["mido"])');
-      for (const [path, source] of Object.entries(PYTHON_SOURCES)) {
-        writeTextFile(pyodide, path, source);
+      const stages: Record<string, number> = {};
+      const startedAt = performance.now();
+      const snapshotPromise = timed(stages, 'snapshotLookup', lookupSnapshot);
+      await timed(stages, 'loader', ensurePyodideLoader);
+      const pyodide = await timed(stages, 'runtime', () => ctx.loadPyodide!({ indexURL: PYODIDE_INDEX_URL }));
+      // numpy backs backend/note_buffer.py and packaging is mido's only dependency;
+      // scipy and micropip are no longer needed on the normal path.
+      await timed(stages, 'packages', () => pyodide.loadPackage(['numpy', 'packaging']));
+      const sitePackages = String(pyodide.runPython('import sysconfig; sysconfig.get_paths()["purelib"]'));
+      const snapshot = await snapshotPromise;
+      const restored = snapshot.data ? await timed(stages, 'restore', () => restoreSnapshot(pyodide, snapshot)) : false;
+      if (!restored) {
+        await timed(stages, 'mido', () => installMido(pyodide, sitePackages));
+        await timed(stages, 'sources', () => {
+          for (const [path, source] of Object.entries(PYTHON_SOURCES)) {
+            writeTextFile(pyodide, path, source);
+          }
+          for (const [path, source] of Object.entries(PYTHON_DATA_FILES)) {
+            writeTextFile(pyodide, path, source);
+          }
+        });
+        await timed(stages, 'bytecode', () => {
+          const precompile = pyodide.globals.get('_precompile');
+          precompile(snapshotRoots(sitePackages));
+          precompile.destroy();
+        });
       }
-      for (const [path, source] of Object.entries(PYTHON_DATA_FILES)) {
-        writeTextFile(pyodide, path, source);
-      }
-      await pyodide.runPythonAsync(
+      await timed(stages, 'bridge', () => pyodide.runPythonAsync(
         [
-          'import json, base64, os, tempfile',
+          'import contextlib, json',
           'from pathlib import Path',
-          'from backend.montuno_core import CLAVES',
-          'from backend.montuno_core.generation import generate_montuno',
+          'from backend.instrumentation import stage, tracing',
+          'from backend.midi_encoder import encode_midi, tick_notes',
+          'from backend.montuno_core import CLAVES, MontunoSession, reference_loop_names',
           'from backend.utils import clean_tokens',
           '',
-          'def _midi_to_base64(pm):',
-          '    with tempfile.NamedTemporaryFile(suffix=".mid", delete=False) as tmp:',
-          '        pm.write(tmp.name)',
-          '        tmp.flush()',
-          '        tmp.seek(0)',
-          '        data = tmp.read()',
-          '    os.unlink(tmp.name)',
-          '    return base64.b64encode(data).decode("ascii")',
+          'def web_reference_loops(clave_name, variation):',
+          '    if clave_name not in CLAVES:',
+          '        return "[]"',
+          '    return json.dumps(reference_loop_names(CLAVES[clave_name], variation))',
+          '',
+          'def _note_columns(pm):',
+          '    notes = tick_notes(pm)',
+          '    return {',
+          '        "pitch": notes.pitch.astype("u1").tobytes(),',
+          '        "start": notes.start.astype("<i4").tobytes(),',
+          '        "end": notes.end.astype("<i4").tobytes(),',
+          '        "velocity": notes.velocity.astype("u1").tobytes(),',
+          '    }',
+          '',
+          '# Charts are re-rendered on every chord edit; keep the last one warm so',
+          '# only the chords an edit affects are translated again.',
+          '_SESSION = None',
+          '_SESSION_KEY = None',
+          '',
+          'def _render_session(key, progression, options, per_chord):',
+          '    global _SESSION, _SESSION_KEY',
+          '    if _SESSION is not None and key == _SESSION_KEY:',
+          '        _SESSION.update(**per_chord)',
+          '        return _SESSION',
+          '    _SESSION, _SESSION_KEY = None, None',
+          '    _SESSION = MontunoSession(progression, **options, **per_chord)',
+          '    _SESSION_KEY = key',
+          '    return _SESSION',
           '',
           'def web_generate(payload_json):',
           '    params = json.loads(payload_json)',
@@ -159,79 +339,157 @@ async function ensurePyodide(_baseUrl: string): Promise<PyodideInterface> {
           '    offsets_por_indice = [c.get("registerOffset", 0) for c in chords] if chords else None',
           '    aproximaciones_por_indice = [c.get("approachNotes") for c in chords] if chords else None',
           '    manual_edits = params.get("manualEdits") or None',
-          '    result = generate_montuno(',
-          '        progression,',
+          '    trace = bool(params.get("trace"))',
+          '    options = dict(',
           '        clave_config=clave_cfg,',
-          '        octavas_por_indice=octavas_por_indice,',
           '        octavacion_default=params.get("octavacionDefault", "Original"),',
           '        variacion=params.get("variation"),',
           '        inversion=params.get("inversionDefault"),',
           '        reference_root=Path(params.get("referenceRoot")),',
+          '    )',
+          '    per_chord = dict(',
+          '        octavas_por_indice=octavas_por_indice,',
           '        inversiones_por_indice=inversiones_por_indice,',
           '        register_offsets=offsets_por_indice,',
           '        aproximaciones_por_indice=aproximaciones_por_indice,',
-          '        manual_edits=manual_edits,',
-          '        seed=params.get("seed"),',
-          '        bpm=params.get("bpm", 120),',
-          '        return_pm=True,',
           '    )',
-          '    midi_b64 = _midi_to_base64(result.midi)',
-          '    return json.dumps({',
-          '        "midi_base64": midi_b64,',
+          '    key = (progression, clave_name, options["octavacion_default"], options["variacion"], options["inversion"], str(options["reference_root"]))',
+          '    with (tracing() if trace else contextlib.nullcontext()) as tracer:',
+          '        session = _render_session(key, progression, options, per_chord)',
+          '        result = session.render(',
+          '            manual_edits=manual_edits,',
+          '            bpm=params.get("bpm", 120),',
+          '            return_pm=True,',
+          '        )',
+          '        with stage("encode"):',
+          '            notes = _note_columns(result.midi)',
+          '            midi_bytes = encode_midi(result.midi)',
+          '    return {',
+          '        "notes": notes,',
+          '        "ppq": result.midi.resolution,',
+          '        "midi": midi_bytes,',
           '        "modo_tag": result.modo_tag,',
           '        "clave_tag": result.clave_tag,',
           '        "max_eighths": result.max_eighths,',
           '        "reference_files": [str(path) for path in result.reference_files],',
-          '    })',
+          '        "timings": tracer.as_dict() if tracer is not None else None,',
+          '    }',
         ].join('\n')
-      );
+      ));
+      if (!restored && snapshot.cache) {
+        // Archiving the tree is synchronous Python work: run it after the first
+        // reply has been posted so it never delays a render.
+        setTimeout(() => {
+          void saveSnapshot(pyodide, snapshot, snapshotRoots(sitePackages));
+        }, 0);
+      }
+      startupReport = {
+        snapshot: restored ? 'hit' : snapshot.cache ? 'miss' : 'unavailable',
+        stages,
+        totalMs: performance.now() - startedAt,
+      };
       return pyodide;
-    })();
+    })().catch((error) => {
+      // Forget the failed start-up so the next message retries it.
+      pyodideReady = null;
+      throw error;
+    });
   }
   const pyodide = await pyodideReady;
-  await ensureReferenceLoops(pyodide);
   if (!webGenerateFn) {
-    const fnProxy = pyodide.globals.get('web_generate');
-    webGenerateFn = fnProxy;
+    webGenerateFn = pyodide.globals.get('web_generate');
+    webReferenceLoopsFn = pyodide.globals.get('web_reference_loops');
   }
   return pyodide;
 }
 
-async function ensureReferenceLoops(pyodide: PyodideInterface): Promise<void> {
-  for (const filename of REFERENCE_LOOP_FILES) {
-    if (loadedReferenceFiles.has(filename)) {
+/**
+ * Write the reference loops a render in ``variation`` reads (one per inversion)
+ * into the Pyodide FS.  Loops are decoded only when first needed, so the
+ * worker never holds the templates of claves and variations nobody asked for.
+ */
+function ensureReferenceLoops(pyodide: PyodideInterface, clave: string, variation: string): void {
+  const filenames: string[] = JSON.parse(webReferenceLoopsFn!(clave, variation));
+  for (const filename of filenames) {
+    if (loadedReferenceFiles.has(filename) || !hasReferenceLoop(filename)) {
       continue;
     }
-    const data = getReferenceLoop(filename);
-    writeBinaryFile(pyodide, `backend/reference_midi_loops/${filename}`, data);
+    writeBinaryFile(pyodide, `backend/reference_midi_loops/${filename}`, getReferenceLoop(filename));
     loadedReferenceFiles.add(filename);
   }
 }
 
+function prefetchReferenceLoops(pyodide: PyodideInterface, clave: string, variation: string): void {
+  // Runs after the reply has been posted so it never delays a render.
+  setTimeout(() => {
+    try {
+      ensureReferenceLoops(pyodide, clave, variation);
+    } catch (error) {
+      console.warn('No se pudieron precargar los loops de referencia.', error);
+    }
+  }, 0);
+}
+
+function ownBuffer(bytes: Uint8Array): ArrayBuffer {
+  // toJs() copies Python bytes into a fresh array; slice anything that is a view.
+  if (bytes.byteOffset === 0 && bytes.byteLength === bytes.buffer.byteLength) {
+    return bytes.buffer as ArrayBuffer;
+  }
+  return bytes.slice().buffer;
+}
+
 async function handleGenerate(message: GenerateMessage): Promise<void> {
   const { id, payload } = message;
   try {
-    const { baseUrl, ...pythonPayload } = payload;
+    const { baseUrl, prefetchVariation, ...pythonPayload } = payload;
     const pyodide = await ensurePyodide(String(baseUrl ?? '/'));
     if (!webGenerateFn) {
       throw new Error('Python bridge no inicializado');
     }
+    ensureReferenceLoops(pyodide, pythonPayload.clave, pythonPayload.variation);
     const resultProxy = await webGenerateFn(JSON.stringify(pythonPayload));
-    const resultJson = typeof resultProxy === 'string' ? resultProxy : resultProxy.toString();
-    if (typeof (resultProxy as any).destroy === 'function') {
-      (resultProxy as any).destroy();
+    const raw = resultProxy.toJs({ dict_converter: Object.fromEntries });
+    resultProxy.destroy();
+    // Columns and MIDI bytes travel as transferred buffers, never copied or encoded.
+    const notes = {
+      pitch: new Uint8Array(ownBuffer(raw.notes.pitch)),
+      start: new Int32Array(ownBuffer(raw.notes.start)),
+      end: new Int32Array(ownBuffer(raw.notes.end)),
+      velocity: new Uint8Array(ownBuffer(raw.notes.velocity)),
+    };
+    const midi = new Uint8Array(ownBuffer(raw.midi));
+    ctx.postMessage({ id, success: true, result: { ...raw, notes, midi } } satisfies SuccessResponse, [
+      notes.pitch.buffer,
+      notes.start.buffer,
+      notes.end.buffer,
+      notes.velocity.buffer,
+      midi.buffer,
+    ]);
+    if (prefetchVariation) {
+      prefetchReferenceLoops(pyodide, pythonPayload.clave, prefetchVariation);
     }
-    const parsed = JSON.parse(resultJson);
-    ctx.postMessage({ id, success: true, result: parsed } satisfies SuccessResponse);
   } catch (error) {
     const messageText = error instanceof Error ? error.message : 'No se pudo generar el montuno.';
     ctx.postMessage({ id, success: false, error: messageText } satisfies ErrorResponse);
   }
 }
 
-ctx.onmessage = (event: MessageEvent<GenerateMessage>) => {
+async function handleWarmup(message: WarmupMessage): Promise<void> {
+  const { id, payload } = message;
+  try {
+    await ensurePyodide(String(payload.baseUrl ?? '/'));
+    ctx.postMessage({ id, success: true, result: startupReport! } satisfies SuccessResponse);
+  } catch (error) {
+    const messageText = error instanceof Error ? error.message : 'No se pudo iniciar Pyodide.';
+    ctx.postMessage({ id, success: false, error: messageText } satisfies ErrorResponse);
+  }
+}
+
+ctx.onmessage = (event: MessageEvent<WorkerMessage>) => {
   const data = event.data;
   if (data.type === 'generate') {
     handleGenerate(data);
+  } else if (data.type === 'warmup') {
+    handleWarmup(data);
   }
 };
@@ -1,13 +1,21 @@
 import backendInit from '../../../backend/__init__.py?raw';
 import backendUtils from '../../../backend/utils.py?raw';
 import backendStyleUtils from '../../../backend/style_utils.py?raw';
+import backendInstrumentation from '../../../backend/instrumentation.py?raw';
+import backendMidiEncoder from '../../../backend/midi_encoder.py?raw';
 import backendMidiCommon from '../../../backend/midi_common.py?raw';
+import backendMidiRender from '../../../backend/midi_render.py?raw';
 import backendMidiUtils from '../../../backend/midi_utils.py?raw';
+import backendNoteBuffer from '../../../backend/note_buffer.py?raw';
+import backendProgressionLexer from '../../../backend/progression_lexer.py?raw';
 import backendSalsa from '../../../backend/salsa.py?raw';
+import backendTemplateCache from '../../../backend/template_cache.py?raw';
 import backendVoicings from '../../../backend/voicings.py?raw';
 import montunoInit from '../../../backend/montuno_core/__init__.py?raw';
+import montunoBatch from '../../../backend/montuno_core/batch.py?raw';
 import montunoConfig from '../../../backend/montuno_core/config.py?raw';
 import montunoGeneration from '../../../backend/montuno_core/generation.py?raw';
+import montunoSession from '../../../backend/montuno_core/session.py?raw';
 import prettyMidiStub from './pyodide_pretty_midi.py?raw';
 import chordReplacements from '@shared/chord_replacements.json?raw';
 
@@ -15,13 +23,21 @@ export const PYTHON_SOURCES: Record<string, string> = {
   'backend/__init__.py': backendInit,
   'backend/utils.py': backendUtils,
   'backend/style_utils.py': backendStyleUtils,
+  'backend/instrumentation.py': backendInstrumentation,
   'backend/midi_common.py': backendMidiCommon,
+  'backend/midi_encoder.py': backendMidiEncoder,
+  'backend/midi_render.py': backendMidiRender,
   'backend/midi_utils.py': backendMidiUtils,
+  'backend/note_buffer.py': backendNoteBuffer,
+  'backend/progression_lexer.py': backendProgressionLexer,
   'backend/salsa.py': backendSalsa,
+  'backend/template_cache.py': backendTemplateCache,
   'backend/voicings.py': backendVoicings,
   'backend/montuno_core/__init__.py': montunoInit,
+  'backend/montuno_core/batch.py': montunoBatch,
   'backend/montuno_core/config.py': montunoConfig,
   'backend/montuno_core/generation.py': montunoGeneration,
+  'backend/montuno_core/session.py': montunoSession,
   'pretty_midi/__init__.py': prettyMidiStub,
 };
 
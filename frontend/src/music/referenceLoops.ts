@@ -20,22 +20,15 @@ function decodeBase64ToUint8Array(base64: string): Uint8Array {
   throw new Error('El entorno actual no soporta decodificación base64.');
 }
 
-const LOOP_CACHE = new Map<string, Uint8Array>();
-
-export const REFERENCE_LOOP_FILES = Object.keys(REFERENCE_LOOP_DATA) as (keyof typeof REFERENCE_LOOP_DATA)[];
+export function hasReferenceLoop(filename: string): boolean {
+  return Object.prototype.hasOwnProperty.call(REFERENCE_LOOP_DATA, filename);
+}
 
+/** Decode a bundled loop.  Not cached: the worker writes it to the Pyodide FS once. */
 export function getReferenceLoop(filename: string): Uint8Array {
-  const cached = LOOP_CACHE.get(filename);
-  if (cached) {
-    return cached;
-  }
-
   const base64 = REFERENCE_LOOP_DATA[filename];
   if (!base64) {
     throw new Error(`Archivo de loop desconocido: ${filename}`);
   }
-
-  const data = decodeBase64ToUint8Array(base64);
-  LOOP_CACHE.set(filename, data);
-  return data;
+  return decodeBase64ToUint8Array(base64);
 }
@@ -107,6 +107,16 @@ function getMidiManagerModule(): Promise<MidiManagerModule> {
   return midiManagerModulePromise;
 }
 
+// Variation the next "Generar" will switch to.  Drawn one generation ahead so
+// the worker can load its reference loops while the user listens.
+let upcomingVariation: AppState['variation'] | null = null;
+
+function takeUpcomingVariation(current: AppState['variation']): AppState['variation'] {
+  const next = upcomingVariation && upcomingVariation !== current ? upcomingVariation : pickRandomVariation(current);
+  upcomingVariation = pickRandomVariation(next);
+  return next;
+}
+
 function pickRandomVariation(current: AppState['variation']): AppState['variation'] {
   const options = VARIACIONES.filter((variation) => variation !== current);
   if (!options.length) {
@@ -116,6 +126,10 @@ function pickRandomVariation(current: AppState['variation']): AppState['variatio
   return options[index];
 }
 
+function startGeneratorWarmUp(): void {
+  void getGeneratorModule().then((generator) => generator.warmUpGenerator());
+}
+
 function scheduleModulePrefetch(): void {
   window.setTimeout(() => {
     void getGeneratorModule();
@@ -387,6 +401,7 @@ export function setupApp(root: HTMLElement): void {
     hasRenderedOnce = true;
     previousState = state;
   });
+  startGeneratorWarmUp();
   scheduleModulePrefetch();
 
   if (typeof navigator !== 'undefined' && navigator.webdriver) {
@@ -741,7 +756,7 @@ async function handleGenerate(refs: UiRefs): Promise<GenerationResult | undefine
   try {
     const generatorPromise = getGeneratorModule();
     const state = getState();
-    const nextVariation = pickRandomVariation(state.variation);
+    const nextVariation = takeUpcomingVariation(state.variation);
     setVariation(nextVariation);
     const stateWithVariation = getState();
     const shouldPrepareAudio = !stateWithVariation.selectedMidiOutputId;
@@ -751,7 +766,7 @@ async function handleGenerate(refs: UiRefs): Promise<GenerationResult | undefine
     const [generator, audio] = await Promise.all([generatorPromise, audioPromise]);
     setSeed(generator.createRandomSeed());
     const stateWithSeed = getState();
-    const result = await generator.generateMontuno(stateWithSeed);
+    const result = await generator.generateMontuno(stateWithSeed, { prefetchVariation: upcomingVariation });
     setGenerated(result);
     setErrors([]);
     resetPlayback();